@@ -0,0 +1,65 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+from ..models.user import User
+
+IDENTITY_CACHE_TTL_SECONDS = float(os.getenv("IDENTITY_CACHE_TTL_SECONDS", "60"))
+IDENTITY_CACHE_MAX_ENTRIES = int(os.getenv("IDENTITY_CACHE_MAX_ENTRIES", "1024"))
+
+class IdentityCache:
+    """
+    In-process TTL + LRU cache of users keyed by token subject (email).
+    Each uvicorn worker has its own copy, so changes made through another
+    worker become visible after at most the TTL.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # subject -> (expires_at, user)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, subject: str) -> Optional[User]:
+        entry = self._entries.get(subject)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del self._entries[subject]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(subject)
+        self.hits += 1
+        return user
+
+    def set(self, subject: str, user: User):
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        self._entries[subject] = (time.monotonic() + self.ttl_seconds, user)
+        self._entries.move_to_end(subject)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, subject: str):
+        self._entries.pop(subject, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0
+        }
+
+identity_cache = IdentityCache(IDENTITY_CACHE_MAX_ENTRIES, IDENTITY_CACHE_TTL_SECONDS)
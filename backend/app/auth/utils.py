@@ -1,22 +1,48 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from ..models.user import User
+from .identity_cache import identity_cache
 import os
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "1440"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt work factor; raising it only affects new hashes unless rehash on login is enabled
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_REHASH_ON_LOGIN = os.getenv("PASSWORD_REHASH_ON_LOGIN", "false").lower() == "true"
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event loop
+password_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        password_hash_executor, pwd_context.verify, plain_password, hashed_password
+    )
+
+async def verify_and_update_password(plain_password: str, hashed_password: str):
+    """Verify a password and return (is_valid, new_hash) where new_hash is set when
+    the stored hash uses an outdated scheme or work factor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        password_hash_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+async def get_password_hash(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_hash_executor, pwd_context.hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -42,7 +68,15 @@ async def authenticate_user(email: str, password: str) -> Optional[User]:
     user = await User.find_one(User.email == email)
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    if PASSWORD_REHASH_ON_LOGIN:
+        is_valid, new_hash = await verify_and_update_password(password, user.password_hash)
+        if not is_valid:
+            return None
+        if new_hash:
+            # Upgrade the stored hash to the current work factor
+            await user.set({User.password_hash: new_hash})
+        return user
+    if not await verify_password(password, user.password_hash):
         return None
     return user
 
@@ -55,7 +89,10 @@ async def get_current_user(token: str) -> User:
     email = verify_token(token)
     if email is None:
         raise credentials_exception
-    user = await User.find_one(User.email == email)
+    user = identity_cache.get(email)
     if user is None:
-        raise credentials_exception
+        user = await User.find_one(User.email == email)
+        if user is None:
+            raise credentials_exception
+        identity_cache.set(email, user)
     return user
\ No newline at end of file
@@ -1,6 +1,8 @@
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
+from pymongo import IndexModel, ASCENDING
+from pymongo.errors import OperationFailure
 from dotenv import load_dotenv
 
 from ..models.expense import Expense
@@ -11,6 +13,10 @@ from ..models.fee import FeeSchedule, Fee
 from ..models.payment import Payment
 from ..models.receipt import Receipt
 from ..models.agreement import Agreement, AgreementInstallment
+from ..models.counter import Counter
+from ..models.job_run import JobRun
+from ..models.ledger import LedgerEntry
+from ..models.report_job import ReportJob
 
 load_dotenv()
 
@@ -31,6 +37,32 @@ client = AsyncIOMotorClient(
 )
 database = client[DATABASE_NAME]
 
+DOCUMENT_MODELS = [User, Property, FeeSchedule, Fee, Payment, Receipt, Agreement, AgreementInstallment, MiscellaneousPayment, Expense, Counter, JobRun, LedgerEntry, ReportJob]
+
+# Unique indexes that existing data may not satisfy yet. They are created here
+# rather than in the model Settings so that duplicates are reported instead of
+# stopping startup (see migrate_fee_unique_key.py).
+UNIQUE_INDEXES = {
+    User: [
+        IndexModel([("email", ASCENDING)], name="users_email_unique", unique=True),
+    ],
+    Property: [
+        IndexModel(
+            [("villa", ASCENDING), ("row_letter", ASCENDING), ("number", ASCENDING)],
+            name="properties_villa_row_number_unique",
+            unique=True
+        ),
+    ],
+    Fee: [
+        # One fee per property, schedule and period; also makes fee generation idempotent
+        IndexModel(
+            [("fee_schedule.$id", ASCENDING), ("year", ASCENDING), ("month", ASCENDING), ("property.$id", ASCENDING)],
+            name="fees_schedule_period_property_unique",
+            unique=True
+        ),
+    ],
+}
+
 async def test_connection():
     """Test MongoDB connection before initializing Beanie"""
     try:
@@ -53,9 +85,61 @@ async def init_db():
     try:
         await init_beanie(
             database=database,
-            document_models=[User, Property, FeeSchedule, Fee, Payment, Receipt, Agreement, AgreementInstallment, MiscellaneousPayment, Expense]
+            document_models=DOCUMENT_MODELS
         )
         print("✅ Database initialized successfully!")
     except Exception as e:
         print(f"❌ Database initialization failed: {e}")
-        raise
\ No newline at end of file
+        raise
+
+    await ensure_unique_indexes()
+    await check_indexes()
+
+async def ensure_unique_indexes():
+    """Create UNIQUE_INDEXES, reporting the ones existing duplicates prevent"""
+    for model, indexes in UNIQUE_INDEXES.items():
+        collection = model.get_motor_collection()
+        for index in indexes:
+            try:
+                await collection.create_indexes([index])
+            except OperationFailure as e:
+                print(f"❌ Could not create unique index '{index.document['name']}' on '{collection.name}': {e}")
+
+async def check_indexes():
+    """
+    Compare the indexes declared in each model's Settings with the ones present
+    in MongoDB and report missing or unused indexes.
+    Usage counters come from $indexStats and are reset when mongod restarts.
+    """
+    print("🔍 Checking MongoDB indexes...")
+    for model in DOCUMENT_MODELS:
+        collection = model.get_motor_collection()
+        collection_name = collection.name
+        declared = [index.name for index in model.get_settings().indexes]
+        declared += [index.document["name"] for index in UNIQUE_INDEXES.get(model, [])]
+
+        try:
+            existing = await collection.index_information()
+        except Exception as e:
+            print(f"⚠️  Could not read indexes for '{collection_name}': {e}")
+            continue
+
+        missing = [name for name in declared if name not in existing]
+        if missing:
+            print(f"❌ Missing indexes on '{collection_name}': {', '.join(missing)}")
+
+        try:
+            stats = await collection.aggregate([{"$indexStats": {}}]).to_list(length=None)
+        except Exception as e:
+            # $indexStats is not available on every deployment (e.g. some shared tiers)
+            print(f"⚠️  Could not read index usage for '{collection_name}': {e}")
+            continue
+
+        unused = [
+            stat["name"] for stat in stats
+            if stat["name"] != "_id_" and stat.get("accesses", {}).get("ops", 0) == 0
+        ]
+        if unused:
+            print(f"ℹ️  Unused indexes on '{collection_name}' since {min(stat['accesses']['since'] for stat in stats):%Y-%m-%d}: {', '.join(unused)}")
+
+    print("✅ Index check completed")
\ No newline at end of file
@@ -1,8 +1,11 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from .config.database import init_db
 from .utils.init_admin import create_initial_admin
+from .utils.scheduler import start_scheduler, stop_scheduler
+from .utils.render_pool import render_pool
+from .utils.data_version import REPORT_DATA_PREFIXES, bump_data_version
 from .routes import users, properties, fees, payments, auth, receipts, fee_schedules, reports, agreements, miscellaneous_payments, expenses, dashboard
 
 app = FastAPI(
@@ -20,6 +23,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def track_report_data_writes(request: Request, call_next):
+    """Bump the data version after a successful write, invalidating cached reports"""
+    response = await call_next(request)
+    if (
+        request.method in ("POST", "PUT", "PATCH", "DELETE")
+        and response.status_code < 400
+        and request.url.path.startswith(REPORT_DATA_PREFIXES)
+    ):
+        await bump_data_version()
+    return response
+
 # Static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -41,6 +56,12 @@ app.include_router(dashboard.router, prefix="/dashboard", tags=["Dashboard"])
 async def startup_event():
     await init_db()
     await create_initial_admin()
+    start_scheduler()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await stop_scheduler()
+    render_pool.shutdown()
 
 @app.get("/")
 async def root():
@@ -3,6 +3,7 @@ from pydantic import BaseModel
 from datetime import datetime
 from typing import List, Optional
 from enum import Enum
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from .property import Property
 from .fee import Fee
 from .user import User
@@ -31,6 +32,13 @@ class AgreementInstallment(Document):
 
     class Settings:
         name = "agreement_installments"
+        indexes = [
+            IndexModel(
+                [("agreement.$id", ASCENDING), ("installment_number", ASCENDING)],
+                name="agreement_installments_agreement_number"
+            ),
+            IndexModel([("status", ASCENDING), ("due_date", ASCENDING)], name="agreement_installments_status_due_date"),
+        ]
 
 class AgreementInstallmentCreate(BaseModel):
     installment_number: int
@@ -73,6 +81,12 @@ class Agreement(Document):
 
     class Settings:
         name = "agreements"
+        indexes = [
+            IndexModel([("agreement_number", ASCENDING)], name="agreements_number"),
+            IndexModel([("property.$id", ASCENDING)], name="agreements_property"),
+            IndexModel([("user.$id", ASCENDING), ("created_at", DESCENDING)], name="agreements_user_created"),
+            IndexModel([("status", ASCENDING)], name="agreements_status"),
+        ]
 
 class AgreementCreate(BaseModel):
     property_id: str
@@ -0,0 +1,13 @@
+from beanie import Document
+from pymongo import IndexModel, ASCENDING
+
+class Counter(Document):
+    prefix: str  # e.g. CUOT, CONV, OTR, REC, AGR
+    year: int
+    value: int = 0  # Last number handed out for this prefix and year
+
+    class Settings:
+        name = "counters"
+        indexes = [
+            IndexModel([("prefix", ASCENDING), ("year", ASCENDING)], name="counters_prefix_year_unique", unique=True),
+        ]
@@ -3,6 +3,7 @@ from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional
 from enum import Enum
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from .user import User
 
 class ExpenseType(str, Enum):
@@ -42,6 +43,11 @@ class Expense(Document):
 
     class Settings:
         name = "expenses"
+        indexes = [
+            IndexModel([("expense_date", DESCENDING)], name="expenses_date"),
+            IndexModel([("year", DESCENDING), ("month", DESCENDING)], name="expenses_period"),
+            IndexModel([("status", ASCENDING), ("expense_type", ASCENDING)], name="expenses_status_type"),
+        ]
 
 class ExpenseCreate(BaseModel):
     expense_type: ExpenseType
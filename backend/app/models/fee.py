@@ -3,6 +3,7 @@ from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional
 from enum import Enum
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from .property import Property
 from .user import User
 
@@ -16,6 +17,9 @@ class FeeSchedule(Document):
 
     class Settings:
         name = "fee_schedules"
+        indexes = [
+            IndexModel([("is_active", ASCENDING), ("due_day", ASCENDING)], name="fee_schedules_active_due_day"),
+        ]
 
 class FeeScheduleCreate(BaseModel):
     amount: float
@@ -48,6 +52,10 @@ class FeeStatus(str, Enum):
     CANCELLED = "cancelled"
     AGREEMENT = "agreement"
     PARTIALLY_PAID = "partially_paid"
+    OVERDUE = "overdue"  # Unpaid and past due_date; set by the overdue sweeper
+
+# Fees that still have to be paid in full
+UNPAID_FEE_STATUSES = [FeeStatus.PENDING, FeeStatus.OVERDUE]
 
 class Fee(Document):
     property: Link[Property]
@@ -62,9 +70,41 @@ class Fee(Document):
     status: FeeStatus = FeeStatus.PENDING
     reference: Optional[str] = None  # Fee reference number
     notes: Optional[str] = None
+    # Copied from the property so the fee list sorts and pages without a join
+    property_row_letter: Optional[str] = None
+    property_number: Optional[int] = None
 
     class Settings:
         name = "fees"
+        indexes = [
+            # Fee list order (and keyset cursor)
+            IndexModel(
+                [
+                    ("year", DESCENDING), ("month", DESCENDING),
+                    ("property_row_letter", ASCENDING), ("property_number", ASCENDING), ("_id", ASCENDING)
+                ],
+                name="fees_list_sort"
+            ),
+            # Fee grid: filter by period/status and sort newest period first
+            IndexModel(
+                [("year", DESCENDING), ("month", DESCENDING), ("status", ASCENDING)],
+                name="fees_period_status"
+            ),
+            IndexModel(
+                [("status", ASCENDING), ("year", DESCENDING), ("month", DESCENDING)],
+                name="fees_status_period"
+            ),
+            IndexModel(
+                [("property.$id", ASCENDING), ("year", DESCENDING), ("month", DESCENDING)],
+                name="fees_property_period"
+            ),
+            IndexModel(
+                [("user.$id", ASCENDING), ("year", DESCENDING), ("month", DESCENDING)],
+                name="fees_user_period"
+            ),
+            # Overdue sweeper and overdue/pending listings
+            IndexModel([("status", ASCENDING), ("due_date", ASCENDING)], name="fees_status_due_date"),
+        ]
 
 class FeeCreate(BaseModel):
     property_id: str
@@ -0,0 +1,45 @@
+from beanie import Document
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+from enum import Enum
+from pymongo import IndexModel, ASCENDING, DESCENDING
+
+class JobRunStatus(str, Enum):
+    RUNNING = "running"
+    SUCCESS = "success"
+    FAILED = "failed"
+
+class JobRun(Document):
+    job: str  # e.g. fee_generation
+    run_date: datetime  # Day the run covers (00:00 UTC); earlier days are catch-up runs
+    instance: str  # Worker that held the scheduler lock
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    duration_ms: Optional[float] = None
+    status: JobRunStatus = JobRunStatus.RUNNING
+    result: dict = {}  # Counts reported by the job
+    error: Optional[str] = None
+
+    class Settings:
+        name = "job_runs"
+        indexes = [
+            # Last successful day per job (catch-up) and run history
+            IndexModel(
+                [("job", ASCENDING), ("status", ASCENDING), ("run_date", DESCENDING)],
+                name="job_runs_job_status_run_date"
+            ),
+            IndexModel([("job", ASCENDING), ("started_at", DESCENDING)], name="job_runs_job_started_at"),
+        ]
+
+class JobRunResponse(BaseModel):
+    id: str
+    job: str
+    run_date: datetime
+    instance: str
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    duration_ms: Optional[float] = None
+    status: JobRunStatus
+    result: dict = {}
+    error: Optional[str] = None
@@ -0,0 +1,61 @@
+from beanie import Document, PydanticObjectId
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+from enum import Enum
+from pymongo import IndexModel, ASCENDING
+
+class LedgerEntryType(str, Enum):
+    FEE_CHARGE = "fee_charge"
+    FEE_REVERSAL = "fee_reversal"  # Fee deleted
+    PAYMENT = "payment"  # Change in a payment's approved amount (negative = credit)
+    AGREEMENT = "agreement"  # Fees replaced by an agreement's installments
+    AGREEMENT_CANCELLATION = "agreement_cancellation"
+    INSTALLMENT_PAYMENT = "installment_payment"
+
+class LedgerEntry(Document):
+    property_id: PydanticObjectId
+    sequence: int  # Position in the property's ledger, starting at 1
+    entry_date: datetime
+    entry_type: LedgerEntryType
+    amount: float  # Positive = charge, negative = credit
+    balance: float  # Property balance after this entry
+    key: str  # Idempotency key, e.g. fee_charge:<fee id>
+    source_id: Optional[str] = None  # Fee, payment, agreement or installment id
+    description: Optional[str] = None
+    created_at: datetime
+
+    class Settings:
+        name = "ledger_entries"
+        indexes = [
+            IndexModel(
+                [("property_id", ASCENDING), ("sequence", ASCENDING)],
+                name="ledger_property_sequence",
+                unique=True
+            ),
+            # Statements: one range read per property and period
+            IndexModel(
+                [("property_id", ASCENDING), ("entry_date", ASCENDING), ("sequence", ASCENDING)],
+                name="ledger_property_entry_date"
+            ),
+            IndexModel([("key", ASCENDING)], name="ledger_key_unique", unique=True),
+        ]
+
+class LedgerEntryResponse(BaseModel):
+    id: str
+    sequence: int
+    entry_date: datetime
+    entry_type: LedgerEntryType
+    amount: float
+    balance: float
+    source_id: Optional[str] = None
+    description: Optional[str] = None
+
+class PropertyLedgerResponse(BaseModel):
+    property_id: str
+    balance: float  # Current balance
+    total_charged: float
+    total_credited: float
+    opening_balance: float  # Balance before the first entry returned
+    closing_balance: float  # Balance after the last entry returned
+    entries: List[LedgerEntryResponse]
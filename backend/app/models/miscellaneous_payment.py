@@ -3,6 +3,7 @@ from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional
 from enum import Enum
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from .user import User
 from .property import Property
 
@@ -37,6 +38,11 @@ class MiscellaneousPayment(Document):
 
     class Settings:
         name = "miscellaneous_payments"
+        indexes = [
+            IndexModel([("user.$id", ASCENDING), ("payment_date", DESCENDING)], name="miscellaneous_payments_user_date"),
+            IndexModel([("property.$id", ASCENDING)], name="miscellaneous_payments_property"),
+            IndexModel([("status", ASCENDING), ("payment_date", DESCENDING)], name="miscellaneous_payments_status_date"),
+        ]
 
 class MiscellaneousPaymentCreate(BaseModel):
     property_id: Optional[str] = None
@@ -1,8 +1,9 @@
-from beanie import Document, Link
+from beanie import Document, Link, PydanticObjectId
 from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional
 from enum import Enum
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from .fee import Fee
 from .user import User
 
@@ -20,13 +21,50 @@ class Payment(Document):
     user: Link[User]  # Who made the payment
     amount: float
     payment_date: datetime
+    # Calendar period of payment_date, stored so month filters can use an index
+    payment_year: Optional[int] = None
+    payment_month: Optional[int] = None
     receipt_file: Optional[str] = None  # Path to uploaded receipt image
     generated_receipt_file: Optional[str] = None  # Path to auto-generated PDF receipt
     status: PaymentStatus = PaymentStatus.PENDING
     notes: Optional[str] = None
+    # Snapshot of fee and property keys so the list can filter and sort without joins
+    property_id: Optional[PydanticObjectId] = None
+    fee_year: Optional[int] = None
+    fee_month: Optional[int] = None
+    property_row_letter: Optional[str] = None
+    property_number: Optional[int] = None
+    approval_batch: Optional[str] = None  # Id of the bulk approval that approved this payment
 
     class Settings:
         name = "payments"
+        indexes = [
+            IndexModel([("fee_id", ASCENDING), ("status", ASCENDING)], name="payments_fee_id_status"),
+            IndexModel([("fee.$id", ASCENDING)], name="payments_fee"),
+            IndexModel([("user.$id", ASCENDING), ("payment_date", DESCENDING)], name="payments_user_date"),
+            IndexModel([("payment_date", DESCENDING)], name="payments_date"),
+            IndexModel([("status", ASCENDING), ("payment_date", DESCENDING)], name="payments_status_date"),
+            IndexModel([("payment_year", DESCENDING), ("payment_month", ASCENDING)], name="payments_year_month"),
+            # "All Januaries" view: month without year
+            IndexModel([("payment_month", ASCENDING), ("payment_year", DESCENDING)], name="payments_month_year"),
+            # Sort order of the payments list
+            IndexModel(
+                [
+                    ("fee_year", DESCENDING),
+                    ("fee_month", DESCENDING),
+                    ("property_row_letter", ASCENDING),
+                    ("property_number", ASCENDING),
+                    ("_id", ASCENDING)
+                ],
+                name="payments_list_sort"
+            ),
+            IndexModel(
+                [("property_id", ASCENDING), ("fee_year", DESCENDING), ("fee_month", DESCENDING)],
+                name="payments_property_period"
+            ),
+            # Property payment history and annual statement
+            IndexModel([("property_id", ASCENDING), ("payment_date", ASCENDING)], name="payments_property_date"),
+        ]
 
 class PaymentCreate(BaseModel):
     fee_id: str
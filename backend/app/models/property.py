@@ -1,5 +1,6 @@
 from beanie import Document, Link
 from pydantic import BaseModel
+from pymongo import IndexModel, ASCENDING
 from typing import Optional
 from .user import User
 
@@ -13,6 +14,10 @@ class Property(Document):
 
     class Settings:
         name = "properties"
+        indexes = [
+            IndexModel([("row_letter", ASCENDING), ("number", ASCENDING)], name="properties_row_number"),
+            IndexModel([("owner.$id", ASCENDING)], name="properties_owner"),
+        ]
 
 class PropertyCreate(BaseModel):
     row_letter: str
@@ -2,6 +2,7 @@ from beanie import Document, Link
 from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional, Union
+from pymongo import IndexModel, ASCENDING
 from .payment import Payment
 from .miscellaneous_payment import MiscellaneousPayment
 from .expense import Expense
@@ -20,6 +21,24 @@ class Receipt(Document):
 
     class Settings:
         name = "receipts"
+        indexes = [
+            IndexModel([("correlative_number", ASCENDING)], name="receipts_correlative_number"),
+            IndexModel(
+                [("payment.$id", ASCENDING)],
+                name="receipts_payment",
+                partialFilterExpression={"payment.$id": {"$exists": True}}
+            ),
+            IndexModel(
+                [("miscellaneous_payment.$id", ASCENDING)],
+                name="receipts_miscellaneous_payment",
+                partialFilterExpression={"miscellaneous_payment.$id": {"$exists": True}}
+            ),
+            IndexModel(
+                [("expense.$id", ASCENDING)],
+                name="receipts_expense",
+                partialFilterExpression={"expense.$id": {"$exists": True}}
+            ),
+        ]
 
 class ReceiptCreate(BaseModel):
     payment_id: str
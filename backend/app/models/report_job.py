@@ -0,0 +1,88 @@
+from beanie import Document, PydanticObjectId
+from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+from typing import Optional
+from enum import Enum
+from pymongo import IndexModel, ASCENDING, DESCENDING
+
+class ReportType(str, Enum):
+    ALL_PAYMENTS = "all_payments"
+    EXPENSES = "expenses"
+    FILTERED_FEES = "filtered_fees"
+    MONTHLY_FEES = "monthly_fees"
+    OUTSTANDING_FEES = "outstanding_fees"
+
+class ReportJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    EXPIRED = "expired"  # Result file evicted from the cache
+
+# Parameters of each report type, also used to normalize the spec before hashing
+class ReportParams(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+class FilteredFeesParams(ReportParams):
+    year: Optional[int] = None
+    month: Optional[int] = None
+    status: Optional[str] = None  # One status or several separated by commas
+    property_id: Optional[str] = None
+
+class MonthlyFeesParams(ReportParams):
+    start_year: int
+    start_month: int
+    end_year: int
+    end_month: int
+
+class OutstandingFeesParams(ReportParams):
+    format: str = "pdf"
+
+class ReportJob(Document):
+    report: ReportType
+    params: dict = {}
+    spec_hash: str  # sha256 of the report type and its normalized params
+    data_version: int  # Data version the result was generated from
+    status: ReportJobStatus = ReportJobStatus.QUEUED
+    user_id: Optional[PydanticObjectId] = None  # Who submitted it
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None  # Refreshed by the worker process while queued or running
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None  # Result (or failure) kept until then
+    file_path: Optional[str] = None
+    filename: Optional[str] = None
+    media_type: Optional[str] = None
+    size: Optional[int] = None
+    error: Optional[str] = None
+
+    class Settings:
+        name = "report_jobs"
+        indexes = [
+            # Cache lookup: the latest job of a spec at a data version
+            IndexModel(
+                [("spec_hash", ASCENDING), ("data_version", ASCENDING), ("created_at", DESCENDING)],
+                name="report_jobs_spec_version"
+            ),
+            IndexModel([("status", ASCENDING), ("expires_at", ASCENDING)], name="report_jobs_status_expires_at"),
+            # Job documents are dropped a day after their result expired
+            IndexModel([("expires_at", ASCENDING)], name="report_jobs_expires_at_ttl", expireAfterSeconds=86400),
+        ]
+
+class ReportJobCreate(BaseModel):
+    report: ReportType
+    params: dict = {}
+
+class ReportJobResponse(BaseModel):
+    id: str
+    report: ReportType
+    params: dict
+    status: ReportJobStatus
+    cached: bool = False  # Served from an identical earlier request
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    filename: Optional[str] = None
+    size: Optional[int] = None
+    error: Optional[str] = None
@@ -1,4 +1,5 @@
 from beanie import Document
+from pymongo import IndexModel, ASCENDING
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 from enum import Enum
@@ -17,6 +18,9 @@ class User(Document):
 
     class Settings:
         name = "users"
+        indexes = [
+            IndexModel([("role", ASCENDING)], name="users_role"),
+        ]
 
 class UserCreate(BaseModel):
     email: EmailStr
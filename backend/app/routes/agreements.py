@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from fastapi.responses import FileResponse
 from typing import List, Optional
+from beanie.operators import In
 from datetime import datetime, timedelta
 import os
 from ..models.agreement import (
@@ -8,11 +9,15 @@ from ..models.agreement import (
     AgreementInstallment, AgreementInstallmentCreate, AgreementInstallmentUpdate, AgreementInstallmentResponse,
     AgreementStatus, AgreementInstallmentStatus
 )
-from ..models.fee import Fee, FeeStatus
+from ..models.fee import Fee, FeeStatus, UNPAID_FEE_STATUSES
+from ..models.ledger import LedgerEntryType
 from ..models.property import Property
 from ..models.user import User, UserRole
 from ..routes.auth import get_current_user
-from ..utils.pdf_generator import generate_agreement_pdf
+from ..utils.fee_balance import overdue_cutoff
+from ..utils.ledger import ledger_movement, money_transaction, post_to_ledger
+from ..utils.render_pool import render
+from ..utils.sequence import reserve_correlative_numbers
 
 router = APIRouter()
 
@@ -209,8 +214,8 @@ async def create_agreement(
                 detail=f"Fee {fee_id} does not belong to the specified property"
             )
 
-        # Check if fee is pending
-        if fee.status != FeeStatus.PENDING:
+        # Check if fee is pending (or overdue)
+        if fee.status not in UNPAID_FEE_STATUSES:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Fee {fee_id} is not pending (status: {fee.status})"
@@ -237,21 +242,8 @@ async def create_agreement(
 
     # Generate agreement number
     current_year = datetime.utcnow().year
-    last_agreement = await Agreement.find(
-        {"agreement_number": {"$regex": f"^AGR-{current_year}"}}
-    ).sort([("agreement_number", -1)]).first_or_none()
-
-    if last_agreement:
-        parts = last_agreement.agreement_number.split("-")
-        if len(parts) == 3:
-            last_number = int(parts[2])
-            new_number = last_number + 1
-        else:
-            new_number = 1
-    else:
-        new_number = 1
-
-    agreement_number = f"AGR-{current_year}-{new_number:05d}"
+    agreement_numbers = await reserve_correlative_numbers(current_year, "AGR", 1)
+    agreement_number = agreement_numbers[0]
 
     # Create agreement
     agreement = Agreement(
@@ -266,34 +258,77 @@ async def create_agreement(
         agreement_number=agreement_number,
         notes=agreement_data.notes
     )
-    await agreement.insert()
-
-    # Update fee statuses to AGREEMENT
-    for fee in fees:
-        fee.status = FeeStatus.AGREEMENT
-        await fee.save()
-
-    # Create installments
-    installments = []
-    for i in range(1, agreement_data.installments_count + 1):
-        due_date = agreement_data.start_date + timedelta(days=30 * (i - 1))
-        installment = AgreementInstallment(
-            agreement=agreement,
-            installment_number=i,
-            amount=agreement_data.monthly_amount,
-            due_date=due_date
-        )
-        await installment.insert()
-        installments.append(installment)
+    # The agreement, its fees, installments and ledger entry are written together
+    async with money_transaction() as session:
+        await agreement.insert(session=session)
+
+        # Update fee statuses to AGREEMENT
+        for fee in fees:
+            fee.status = FeeStatus.AGREEMENT
+            await fee.save(session=session)
+
+        # Create installments
+        installments = []
+        for i in range(1, agreement_data.installments_count + 1):
+            due_date = agreement_data.start_date + timedelta(days=30 * (i - 1))
+            installment = AgreementInstallment(
+                agreement=agreement,
+                installment_number=i,
+                amount=agreement_data.monthly_amount,
+                due_date=due_date
+            )
+            await installment.insert(session=session)
+            installments.append(installment)
+
+        # The fees' debt is replaced by the installments' total
+        await post_to_ledger([ledger_movement(
+            prop.id, LedgerEntryType.AGREEMENT,
+            sum(installment.amount for installment in installments) - total_debt, agreement.id,
+            description=f"Convenio {agreement_number}",
+            key=f"agreement:{agreement.id}"
+        )], session=session)
 
     # Generate PDF
     try:
-        pdf_buffer = generate_agreement_pdf(agreement, prop, fees, installments)
+        pdf_content = await render(
+            "agreement_pdf",
+            {
+                "agreement_number": agreement.agreement_number,
+                "created_at": agreement.created_at,
+                "status": agreement.status.value,
+                "start_date": agreement.start_date,
+                "end_date": agreement.end_date,
+                "total_debt": agreement.total_debt,
+                "monthly_amount": agreement.monthly_amount,
+                "installments_count": agreement.installments_count,
+                "notes": agreement.notes
+            },
+            {
+                "villa": prop.villa,
+                "row_letter": prop.row_letter,
+                "number": prop.number,
+                "owner_name": prop.owner_name,
+                "owner_phone": prop.owner_phone
+            },
+            [
+                {"month": fee.month, "year": fee.year, "amount": fee.amount, "due_date": fee.due_date}
+                for fee in fees
+            ],
+            [
+                {
+                    "installment_number": installment.installment_number,
+                    "amount": installment.amount,
+                    "due_date": installment.due_date,
+                    "status": installment.status.value
+                }
+                for installment in installments
+            ]
+        )
         pdf_filename = f"agreement_{agreement_number}.pdf"
         pdf_path = os.path.join("static", "uploads", pdf_filename)
 
         with open(pdf_path, "wb") as f:
-            f.write(pdf_buffer.getvalue())
+            f.write(pdf_content)
 
         agreement.pdf_file = pdf_path
         await agreement.save()
@@ -449,18 +484,36 @@ async def delete_agreement(agreement_id: str, current_user: User = Depends(get_c
     # Fetch fees links
     await agreement.fetch_link(Agreement.fees)
 
-    # Revert fee statuses back to PENDING
-    for fee in agreement.fees:
-        fee.status = FeeStatus.PENDING
-        await fee.save()
+    cutoff = overdue_cutoff()
+    async with money_transaction() as session:
+        # Revert fee statuses back to PENDING (OVERDUE if already past due)
+        for fee in agreement.fees:
+            fee.status = FeeStatus.OVERDUE if fee.due_date < cutoff else FeeStatus.PENDING
+            await fee.save(session=session)
 
-    # Delete installments
-    await AgreementInstallment.find(
-        AgreementInstallment.agreement.id == agreement.id
-    ).delete()
+        # Undo the agreement in the ledger: its adjustment and the installments already paid
+        installments = await AgreementInstallment.find(
+            AgreementInstallment.agreement.id == agreement.id, session=session
+        ).to_list()
+        installments_total = sum(installment.amount for installment in installments)
+        paid_total = sum(
+            installment.amount for installment in installments
+            if installment.status == AgreementInstallmentStatus.PAID
+        )
+        await post_to_ledger([ledger_movement(
+            agreement.property.ref.id, LedgerEntryType.AGREEMENT_CANCELLATION,
+            agreement.total_debt - installments_total + paid_total, agreement.id,
+            description=f"Convenio {agreement.agreement_number} eliminado",
+            key=f"agreement_cancellation:{agreement.id}"
+        )], session=session)
+
+        # Delete installments
+        await AgreementInstallment.find(
+            AgreementInstallment.agreement.id == agreement.id
+        ).delete(session=session)
 
-    # Delete agreement
-    await agreement.delete()
+        # Delete agreement
+        await agreement.delete(session=session)
 
     return {"message": "Agreement deleted successfully"}
 
@@ -540,7 +593,14 @@ async def create_installment_payment(
         due_date=installment_data.due_date,
         notes=installment_data.notes
     )
-    await installment.insert()
+    async with money_transaction() as session:
+        await installment.insert(session=session)
+
+        # An extra installment raises what is owed under the agreement
+        await post_to_ledger([ledger_movement(
+            agreement.property.ref.id, LedgerEntryType.AGREEMENT, installment.amount, installment.id,
+            description=f"Convenio {agreement.agreement_number} - Cuota {installment.installment_number}"
+        )], session=session)
 
     # Fetch agreement link for response
     await installment.fetch_link(AgreementInstallment.agreement)
@@ -572,7 +632,7 @@ async def get_next_pending_installment(current_user: User = Depends(get_current_
     if not agreements:
         return None
 
-    # Fetch installments for each agreement and find the oldest pending one
+    # Fetch installments for each agreement and find the oldest unpaid one (pending or overdue)
     oldest_pending = None
     oldest_due_date = None
 
@@ -580,7 +640,7 @@ async def get_next_pending_installment(current_user: User = Depends(get_current_
         # Fetch installments for this agreement
         installments = await AgreementInstallment.find(
             AgreementInstallment.agreement.id == agreement.id,
-            AgreementInstallment.status == "pending"
+            In(AgreementInstallment.status, [AgreementInstallmentStatus.PENDING, AgreementInstallmentStatus.OVERDUE])
         ).sort([("due_date", 1)]).to_list()  # Sort by due_date ascending (oldest first)
 
         if installments:
@@ -681,7 +741,15 @@ async def pay_next_installment(
     installment_obj.paid_date = datetime.utcnow()
     installment_obj.payment_reference = payment_reference
     installment_obj.notes = notes
-    await installment_obj.save()
+    async with money_transaction() as session:
+        await installment_obj.save(session=session)
+
+        paid_agreement = await Agreement.get(agreement_data["id"], session=session)
+        if paid_agreement:
+            await post_to_ledger([ledger_movement(
+                paid_agreement.property.ref.id, LedgerEntryType.INSTALLMENT_PAYMENT, -installment_obj.amount, installment_obj.id,
+                description=f"Convenio {paid_agreement.agreement_number} - Cuota {installment_obj.installment_number}"
+            )], session=session)
 
     # Generate receipt for agreement installment payment
     try:
@@ -779,12 +847,24 @@ async def update_installment_payment(
             detail="Not enough permissions"
         )
 
+    was_paid = installment.status == AgreementInstallmentStatus.PAID
+
     # Update fields
     update_data = installment_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(installment, field, value)
 
-    await installment.save()
+    # Marking an installment paid (or unpaid) moves the property balance
+    is_paid = installment.status == AgreementInstallmentStatus.PAID
+    async with money_transaction() as session:
+        await installment.save(session=session)
+
+        if is_paid != was_paid:
+            await post_to_ledger([ledger_movement(
+                agreement.property.ref.id, LedgerEntryType.INSTALLMENT_PAYMENT,
+                -installment.amount if is_paid else installment.amount, installment.id,
+                description=f"Convenio {agreement.agreement_number} - Cuota {installment.installment_number}"
+            )], session=session)
 
     # Fetch agreement link for response
     await installment.fetch_link(AgreementInstallment.agreement)
@@ -26,7 +26,7 @@ async def register(user_data: UserCreate):
         )
 
     # Hash the password
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash(user_data.password)
 
     # Create new user
     user = User(
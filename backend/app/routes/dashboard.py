@@ -3,11 +3,14 @@ from typing import List, Dict, Any
 from datetime import datetime
 from ..models.user import User, UserRole
 from ..models.property import Property
-from ..models.fee import Fee, FeeStatus
+from beanie.operators import In
+from ..models.fee import Fee, FeeStatus, UNPAID_FEE_STATUSES
 from ..models.payment import Payment
 from ..models.agreement import Agreement
 from ..models.expense import Expense
 from ..routes.auth import get_current_user
+from ..config.database import database
+from ..utils.ledger import get_property_balances
 
 router = APIRouter()
 
@@ -36,8 +39,8 @@ async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
         payments = await Payment.find(Payment.user.id == current_user.id).to_list()
         agreements = await Agreement.find(Agreement.user.id == current_user.id).to_list()
 
-        # Calculate debt (pending fees)
-        pending_fees = [fee for fee in fees if fee.status == FeeStatus.PENDING]
+        # Calculate debt (pending and overdue fees)
+        pending_fees = [fee for fee in fees if fee.status in UNPAID_FEE_STATUSES]
         total_debt = sum(fee.amount for fee in pending_fees)
 
         return {
@@ -57,18 +60,24 @@ async def get_owner_debt_summary(current_user: User = Depends(get_current_user))
 
     # Get owner's properties
     properties = await Property.find(Property.owner.id == current_user.id).to_list()
+    property_ids = [prop.id for prop in properties]
+
+    # Balances come from the ledger; the unpaid fees of every property in one query
+    balances = await get_property_balances(property_ids)
+    pending_fees_by_property = {}
+    if property_ids:
+        for fee in await Fee.find(
+            In(Fee.property.id, property_ids),
+            In(Fee.status, UNPAID_FEE_STATUSES)
+        ).sort("year", "month").to_list():
+            pending_fees_by_property.setdefault(fee.property.ref.id, []).append(fee)
 
     debt_summary = []
     total_debt = 0
 
     for prop in properties:
-        # Get pending fees for this property
-        pending_fees = await Fee.find(
-            Fee.property.id == prop.id,
-            Fee.status == FeeStatus.PENDING
-        ).to_list()
-
-        property_debt = sum(fee.amount for fee in pending_fees)
+        pending_fees = pending_fees_by_property.get(prop.id, [])
+        property_debt = balances.get(prop.id, {}).get("balance", 0.0)
         total_debt += property_debt
 
         debt_summary.append({
@@ -94,10 +103,20 @@ async def get_owner_debt_summary(current_user: User = Depends(get_current_user))
         })
 
     return {
-        "total_debt": total_debt,
+        "total_debt": round(total_debt, 2),
         "properties": debt_summary,
     }
 
+async def _count_by_property(collection, property_field: str, property_ids: list, extra: dict = None) -> Dict[Any, int]:
+    """Documents per property, one aggregation for all properties"""
+    counts = {}
+    async for row in collection.aggregate([
+        {"$match": {property_field: {"$in": property_ids}, **(extra or {})}},
+        {"$group": {"_id": f"${property_field}", "count": {"$sum": 1}}}
+    ]):
+        counts[row["_id"]] = row["count"]
+    return counts
+
 @router.get("/owner/property-report")
 async def get_owner_property_report(current_user: User = Depends(get_current_user)):
     """Get property report for owner"""
@@ -106,24 +125,22 @@ async def get_owner_property_report(current_user: User = Depends(get_current_use
 
     # Get owner's properties
     properties = await Property.find(Property.owner.id == current_user.id).to_list()
+    property_ids = [prop.id for prop in properties]
+
+    # Amounts from the ledger, counts with one aggregation per collection
+    balances = await get_property_balances(property_ids)
+    fee_counts = await _count_by_property(database.fees, "property.$id", property_ids)
+    pending_fee_counts = await _count_by_property(
+        database.fees, "property.$id", property_ids,
+        {"status": {"$in": [fee_status.value for fee_status in UNPAID_FEE_STATUSES]}}
+    )
+    payment_counts = await _count_by_property(database.payments, "property_id", property_ids)
+    agreement_counts = await _count_by_property(database.agreements, "property.$id", property_ids)
 
     property_reports = []
 
     for prop in properties:
-        # Get all fees for this property
-        fees = await Fee.find(Fee.property.id == prop.id).to_list()
-
-        # Get payments for this property's fees
-        fee_ids = [str(fee.id) for fee in fees]
-        payments = await Payment.find(Payment.fee_id.in_(fee_ids)).to_list()
-
-        # Get agreements for this property
-        agreements = await Agreement.find(Agreement.property.id == prop.id).to_list()
-
-        total_fees = sum(fee.amount for fee in fees)
-        total_payments = sum(payment.amount for payment in payments)
-        pending_fees = [fee for fee in fees if fee.status == FeeStatus.PENDING]
-        pending_amount = sum(fee.amount for fee in pending_fees)
+        balance = balances.get(prop.id, {})
 
         property_reports.append({
             "property": {
@@ -135,14 +152,14 @@ async def get_owner_property_report(current_user: User = Depends(get_current_use
                 "owner_phone": prop.owner_phone,
             },
             "fees_summary": {
-                "total_fees": len(fees),
-                "total_amount": total_fees,
-                "paid_amount": total_payments,
-                "pending_amount": pending_amount,
-                "pending_fees": len(pending_fees),
+                "total_fees": fee_counts.get(prop.id, 0),
+                "total_amount": balance.get("total_charged", 0.0),
+                "paid_amount": balance.get("total_credited", 0.0),
+                "pending_amount": balance.get("balance", 0.0),
+                "pending_fees": pending_fee_counts.get(prop.id, 0),
             },
-            "agreements": len(agreements),
-            "payments": len(payments),
+            "agreements": agreement_counts.get(prop.id, 0),
+            "payments": payment_counts.get(prop.id, 0),
         })
 
     return {
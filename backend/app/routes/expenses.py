@@ -233,22 +233,9 @@ async def update_expense(
             print(f"Creating receipt for expense {expense_id}")
 
             # Generate correlative number
+            from .receipts import generate_correlative_number
             current_year = datetime.utcnow().year
-            last_receipt = await Receipt.find(
-                {"correlative_number": {"$regex": f"^REC-{current_year}"}}
-            ).sort([("correlative_number", -1)]).first_or_none()
-
-            if last_receipt:
-                parts = last_receipt.correlative_number.split("-")
-                if len(parts) == 3:
-                    last_number = int(parts[2])
-                    new_number = last_number + 1
-                else:
-                    new_number = 1
-            else:
-                new_number = 1
-
-            correlative_number = f"REC-{current_year}-{new_number:05d}"
+            correlative_number = await generate_correlative_number(current_year, "REC")
 
             # Create receipt record
             receipt = Receipt(
@@ -410,22 +397,9 @@ async def bulk_approve_expenses(
                 print(f"Creating receipt for expense {expense_id}")
 
                 # Generate correlative number
+                from .receipts import generate_correlative_number
                 current_year = datetime.utcnow().year
-                last_receipt = await Receipt.find(
-                    {"correlative_number": {"$regex": f"^REC-{current_year}"}}
-                ).sort([("correlative_number", -1)]).first_or_none()
-
-                if last_receipt:
-                    parts = last_receipt.correlative_number.split("-")
-                    if len(parts) == 3:
-                        last_number = int(parts[2])
-                        new_number = last_number + 1
-                    else:
-                        new_number = 1
-                else:
-                    new_number = 1
-
-                correlative_number = f"REC-{current_year}-{new_number:05d}"
+                correlative_number = await generate_correlative_number(current_year, "REC")
 
                 # Create receipt record
                 receipt = Receipt(
@@ -1,13 +1,21 @@
 from beanie import PydanticObjectId
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 from pydantic import BaseModel
+from pymongo.errors import DuplicateKeyError
 from ..models.fee import Fee, FeeCreate, FeeUpdate, FeeResponse, FeeStatus, FeeSchedule
 from ..models.property import Property
+from ..models.payment import Payment
 from ..models.user import User, UserRole
+from ..models.job_run import JobRun, JobRunResponse
+from ..models.ledger import LedgerEntryType
 from ..routes.auth import get_current_user
 from ..config.database import database
+from ..utils.pagination import decode_cursor, keyset_filter, next_cursor, sort_stage
+from ..utils.fee_generation import generate_fee_documents, schedules_due_on
+from ..utils.overdue_sweeper import sweep_overdue
+from ..utils.ledger import ledger_movement, money_transaction, post_to_ledger
 
 class GenerateFeesRequest(BaseModel):
     manual: bool = False
@@ -19,6 +27,54 @@ class PaginatedFeeResponse(BaseModel):
     data: List[FeeResponse]
     pagination: dict
 
+# Sort order of the fee list; also the key of the keyset cursor.
+# All fee-local fields, served by the fees_list_sort index.
+FEE_SORT_KEY = [
+    ("year", -1),
+    ("month", -1),
+    ("property_row_letter", 1),
+    ("property_number", 1),
+    ("_id", 1)
+]
+
+def fee_list_pipeline(query_filters: dict, cursor_values: Optional[list], skip: int, limit: int) -> list:
+    """
+    Fee list page: filter, sort and page on the fee itself, then join only the
+    page's properties. Schedule and user ids are read from the fee's DBRefs.
+    """
+    match = query_filters
+    if cursor_values:
+        match = {"$and": [query_filters, keyset_filter(FEE_SORT_KEY, cursor_values)]}
+
+    return [
+        {"$match": match},
+        sort_stage(FEE_SORT_KEY),
+        {"$skip": skip},
+        {"$limit": limit},
+        {"$project": {
+            "property": 1, "fee_schedule": 1, "user": 1,
+            "amount": 1, "paid_amount": 1, "generated_date": 1,
+            "year": 1, "month": 1, "due_date": 1, "status": 1,
+            "reference": 1, "notes": 1,
+            "property_row_letter": 1, "property_number": 1
+        }},
+        {"$lookup": {
+            "from": "properties",
+            "localField": "property.$id",
+            "foreignField": "_id",
+            "as": "property_data"
+        }},
+        {"$addFields": {"property_data": {"$let": {
+            "vars": {"prop": {"$arrayElemAt": ["$property_data", 0]}},
+            "in": {
+                "villa": "$$prop.villa",
+                "row_letter": "$$prop.row_letter",
+                "number": "$$prop.number",
+                "owner_name": "$$prop.owner_name"
+            }
+        }}}}
+    ]
+
 router = APIRouter()
 
 @router.get("/", response_model=PaginatedFeeResponse)
@@ -29,8 +85,13 @@ async def get_fees(
     year: Optional[int] = None,
     month: Optional[int] = None,
     status: Optional[str] = None,
-    property_id: Optional[str] = None
+    property_id: Optional[str] = None,
+    cursor: Optional[str] = None
 ):
+    """
+    List fees. Pass `cursor` (the `next_cursor` of the previous response)
+    instead of `page` to paginate by keyset, which costs the same for any depth.
+    """
     # Build query filters
     query_filters = {}
 
@@ -58,50 +119,17 @@ async def get_fees(
     # Get motor collection for aggregation
     fee_collection = database.fees
 
-    # Get total count using aggregation
-    count_pipeline = [{"$match": query_filters}, {"$count": "total"}]
-    count_result = await fee_collection.aggregate(count_pipeline).to_list(length=1)
-    total_count = count_result[0]["total"] if count_result else 0
+    # Get total count
+    total_count = await fee_collection.count_documents(query_filters)
 
-    # Calculate skip
-    skip = (page - 1) * limit
-
-    # Aggregation pipeline for paginated results
-    pipeline = [
-        {"$match": query_filters},
-        {"$lookup": {
-            "from": "properties",
-            "localField": "property.$id",
-            "foreignField": "_id",
-            "as": "property_data"
-        }},
-        {"$unwind": "$property_data"},
-        {"$lookup": {
-            "from": "fee_schedules",
-            "localField": "fee_schedule.$id",
-            "foreignField": "_id",
-            "as": "fee_schedule_data"
-        }},
-        {"$unwind": "$fee_schedule_data"},
-        {"$lookup": {
-            "from": "users",
-            "localField": "user.$id",
-            "foreignField": "_id",
-            "as": "user_data"
-        }},
-        {"$unwind": {"path": "$user_data", "preserveNullAndEmptyArrays": True}},
-        {"$sort": {
-            "year": -1,
-            "month": -1,
-            "property_data.row_letter": 1,
-            "property_data.number": 1
-        }},
-        {"$skip": skip},
-        {"$limit": limit}
-    ]
+    # Keyset mode continues after the cursor instead of skipping rows
+    cursor_values = decode_cursor(cursor, FEE_SORT_KEY) if cursor else None
+    skip = 0 if cursor_values else (page - 1) * limit
 
     # Execute aggregation
-    results = await fee_collection.aggregate(pipeline).to_list(length=None)
+    results = await fee_collection.aggregate(
+        fee_list_pipeline(query_filters, cursor_values, skip, limit)
+    ).to_list(length=None)
 
     # Calculate total pages
     total_pages = (total_count + limit - 1) // limit
@@ -111,16 +139,17 @@ async def get_fees(
     for result in results:
         paid_amount = result.get("paid_amount", 0.0)
         remaining_amount = result["amount"] - paid_amount
+        property_data = result.get("property_data") or {}
 
         fee_responses.append(FeeResponse(
             id=str(result["_id"]),
-            property_id=str(result["property_data"]["_id"]),
-            property_villa=result["property_data"]["villa"],
-            property_row_letter=result["property_data"]["row_letter"],
-            property_number=result["property_data"]["number"],
-            property_owner_name=result["property_data"]["owner_name"],
-            fee_schedule_id=str(result["fee_schedule_data"]["_id"]),
-            user_id=str(result["user_data"]["_id"]) if result.get("user_data") else None,
+            property_id=str(result["property"].id),
+            property_villa=property_data.get("villa", ""),
+            property_row_letter=property_data.get("row_letter", result.get("property_row_letter") or ""),
+            property_number=property_data.get("number", result.get("property_number") or 0),
+            property_owner_name=property_data.get("owner_name", ""),
+            fee_schedule_id=str(result["fee_schedule"].id),
+            user_id=str(result["user"].id) if result.get("user") else None,
             amount=result["amount"],
             paid_amount=paid_amount,
             remaining_amount=remaining_amount,
@@ -139,10 +168,43 @@ async def get_fees(
             "page": page,
             "limit": limit,
             "total_count": total_count,
-            "total_pages": total_pages
+            "total_pages": total_pages,
+            "next_cursor": next_cursor(results, FEE_SORT_KEY, limit)
         }
     )
 
+@router.get("/scheduler/runs", response_model=List[JobRunResponse])
+async def get_scheduler_runs(
+    job: Optional[str] = None,
+    limit: int = 50,
+    current_user: User = Depends(get_current_user)
+):
+    """Run history of the background scheduler (automatic fee generation), newest first"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+
+    query = JobRun.find(JobRun.job == job) if job else JobRun.find_all()
+    job_runs = await query.sort(-JobRun.started_at).limit(limit).to_list()
+
+    return [
+        JobRunResponse(
+            id=str(job_run.id),
+            job=job_run.job,
+            run_date=job_run.run_date,
+            instance=job_run.instance,
+            started_at=job_run.started_at,
+            finished_at=job_run.finished_at,
+            duration_ms=job_run.duration_ms,
+            status=job_run.status,
+            result=job_run.result,
+            error=job_run.error
+        )
+        for job_run in job_runs
+    ]
+
 @router.get("/{fee_id}", response_model=FeeResponse)
 async def get_fee(fee_id: str, current_user: User = Depends(get_current_user)):
     fee = await Fee.get(fee_id)
@@ -230,9 +292,25 @@ async def create_fee(
         month=generated_date.month,
         due_date=fee_data.due_date,
         reference=fee_data.reference,
-        notes=fee_data.notes
+        notes=fee_data.notes,
+        property_row_letter=prop.row_letter,
+        property_number=prop.number
     )
-    await fee.insert()
+    # The fee and its charge in the ledger are written together
+    async with money_transaction() as session:
+        try:
+            await fee.insert(session=session)
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A fee already exists for this property, schedule and period"
+            )
+
+        await post_to_ledger([ledger_movement(
+            prop.id, LedgerEntryType.FEE_CHARGE, fee.amount, fee.id,
+            description=f"Cuota {fee.month:02d}/{fee.year}",
+            key=f"fee_charge:{fee.id}"
+        )], session=session)
 
     # Fetch linked documents for the response
     await fee.fetch_link(Fee.property)
@@ -299,11 +377,23 @@ async def update_fee(
     update_data = fee_update.dict(exclude_unset=True)
     if 'amount' in update_data:
         del update_data['amount']  # Prevent updating amount
+    # paid_amount and status follow the fee's approved payments (and its ledger)
+    if 'paid_amount' in update_data or 'status' in update_data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="paid_amount and status are derived from the fee's payments and cannot be edited"
+        )
     for field, value in update_data.items():
         setattr(fee, field, value)
 
     await fee.save()
 
+    # Keep the period copied onto this fee's payments in step
+    if "year" in update_data or "month" in update_data:
+        await Payment.find(Payment.fee_id == str(fee.id)).update(
+            {"$set": {"fee_year": fee.year, "fee_month": fee.month}}
+        )
+
     # Fetch links again after save
     await fee.fetch_link(Fee.property)
     await fee.fetch_link(Fee.fee_schedule)
@@ -353,7 +443,14 @@ async def delete_fee(fee_id: str, current_user: User = Depends(get_current_user)
             detail="Cannot delete fees that are under agreement"
         )
 
-    await fee.delete()
+    async with money_transaction() as session:
+        await fee.delete(session=session)
+
+        await post_to_ledger([ledger_movement(
+            fee.property.ref.id, LedgerEntryType.FEE_REVERSAL, -fee.amount, fee.id,
+            description=f"Cuota {fee.month:02d}/{fee.year} eliminada",
+            key=f"fee_reversal:{fee.id}"
+        )], session=session)
     return {"message": "Fee deleted successfully"}
 
 @router.post("/generate")
@@ -400,54 +497,36 @@ async def generate_fees(request: GenerateFeesRequest, current_user: User = Depen
             fee_schedules = await FeeSchedule.find({"is_active": True}).to_list()
         else:
             # Automatic generation: only schedules with due_day matching today
-            current_day = now.day
-            fee_schedules = await FeeSchedule.find({
-                "is_active": True,
-                "due_day": current_day
-            }).to_list()
-
-    generated_count = 0
-
-    for current_month in months_to_generate:
-        for fee_schedule in fee_schedules:
-            # Get all properties
-            properties = await Property.find_all().to_list()
-
-            for prop in properties:
-                # Check if fee already exists for this property, fee_schedule, month, year
-                existing_fee = await Fee.find_one(
-                    Fee.property.id == prop.id,
-                    Fee.fee_schedule.id == fee_schedule.id,
-                    Fee.generated_date >= datetime(current_year, current_month, 1),
-                    Fee.generated_date < datetime(current_year if current_month < 12 else current_year + 1, current_month % 12 + 1, 1)
-                )
+            fee_schedules = await schedules_due_on(now)
+
+    # For past/future months, set generated_date to the specified month/year
+    if request.year or request.months:
+        generated_date = lambda month: datetime(current_year, month, 1)  # Use first day of month
+    else:
+        generated_date = lambda month: now
+
+    result = await generate_fee_documents(
+        fee_schedules,
+        current_year,
+        months_to_generate,
+        reference_prefix="Manual" if request.manual else "Auto",
+        generated_date=generated_date
+    )
+    generated_count = result["generated"]
+
+    return {
+        "message": f"Generated {generated_count} fees",
+        "generated_count": generated_count,
+        "skipped_count": result["skipped"]
+    }
+
+@router.post("/sweep-overdue")
+async def sweep_overdue_fees(current_user: User = Depends(get_current_user)):
+    """Run the overdue sweep now (it also runs daily from the scheduler)"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
 
-                if not existing_fee:
-                    # Calculate due date: use the due_day from fee schedule
-                    due_day = fee_schedule.due_day
-                    try:
-                        due_date = datetime(current_year, current_month, due_day)
-                    except ValueError:
-                        # Handle months with fewer days (e.g., February)
-                        due_date = datetime(current_year, current_month + 1, 1) - timedelta(days=1)
-
-                    # For past/future months, set generated_date to the specified month/year
-                    if request.year or request.months:
-                        generated_date = datetime(current_year, current_month, 1)  # Use first day of month
-                    else:
-                        generated_date = now
-
-                    fee = Fee(
-                        property=prop,
-                        fee_schedule=fee_schedule,
-                        amount=fee_schedule.amount,
-                        generated_date=generated_date,
-                        year=current_year,
-                        month=current_month,
-                        due_date=due_date,
-                        reference=f"{'Manual' if request.manual else 'Auto'}-{current_year}-{current_month:02d}"
-                    )
-                    await fee.insert()
-                    generated_count += 1
-
-    return {"message": f"Generated {generated_count} fees"}
\ No newline at end of file
+    return await sweep_overdue()
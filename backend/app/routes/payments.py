@@ -1,3 +1,5 @@
+from beanie import PydanticObjectId
+from bson.errors import InvalidId
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from fastapi.responses import FileResponse
 from typing import List, Optional
@@ -5,45 +7,56 @@ from pydantic import BaseModel
 from datetime import datetime
 import os
 import shutil
-from openpyxl import load_workbook
 from openpyxl.utils.exceptions import InvalidFileException
 from ..models.payment import Payment, PaymentCreate, PaymentUpdate, PaymentResponse, PaymentStatus
 from ..models.fee import Fee, FeeStatus
 from ..models.user import User, UserRole
 from ..models.receipt import Receipt, ReceiptResponse
 from ..models.property import Property
+from ..models.ledger import LedgerEntryType
 from ..routes.auth import get_current_user
 from ..config.database import database
+from ..utils.pagination import decode_cursor, keyset_filter, next_cursor, sort_stage
+from ..utils.fee_balance import apply_payment_to_fee, reconcile_fee_balances
+from ..utils.ledger import ledger_movement, money_transaction, post_to_ledger
+from ..utils.payment_approval import approve_payments_in_bulk
+from ..utils.payment_import import InvalidImportFormat, import_payments
+
+def payment_snapshot(fee: Fee, prop: Optional[Property]) -> dict:
+    """Fee and property keys copied onto Payment so the list can filter and sort without joins"""
+    if not isinstance(prop, Property):
+        prop = None
+    return {
+        "property_id": prop.id if prop else None,
+        "fee_year": fee.year,
+        "fee_month": fee.month,
+        "property_row_letter": prop.row_letter if prop else None,
+        "property_number": prop.number if prop else None
+    }
 
-async def update_fee_status_based_on_payments(fee: Fee):
-    """Update fee status and paid_amount based on total approved payments"""
-    # Get all approved payments for this fee
-    approved_payments = await Payment.find(
-        Payment.fee_id == str(fee.id),
-        Payment.status == PaymentStatus.APPROVED
-    ).to_list()
-
-    # Calculate total approved payment amount
-    total_paid = sum(payment.amount for payment in approved_payments)
-
-    # Update paid_amount and status
-    fee.paid_amount = total_paid
-    if total_paid >= fee.amount:
-        fee.status = FeeStatus.COMPLETED
-    elif total_paid > 0:
-        fee.status = FeeStatus.PARTIALLY_PAID
-    else:
-        fee.status = FeeStatus.PENDING
-
-    await fee.save()
+def approved_amount(payment_status: PaymentStatus, amount: float) -> float:
+    """What a payment contributes to its fee's paid_amount"""
+    return amount if payment_status == PaymentStatus.APPROVED else 0.0
 
 class BulkApproveRequest(BaseModel):
     payment_ids: List[str]
 
+class ReconcileFeesRequest(BaseModel):
+    fee_ids: Optional[List[str]] = None  # None reconciles every fee
+
 class PaginatedPaymentResponse(BaseModel):
     data: List[PaymentResponse]
     pagination: dict
 
+# Sort order of the payments list; also the key of the keyset cursor
+PAYMENT_SORT_KEY = [
+    ("fee_year", -1),
+    ("fee_month", -1),
+    ("property_row_letter", 1),
+    ("property_number", 1),
+    ("_id", 1)
+]
+
 router = APIRouter()
 
 @router.get("/", response_model=PaginatedPaymentResponse)
@@ -55,31 +68,24 @@ async def get_payments(
     status: Optional[str] = None,
     fee_id: Optional[str] = None,
     property_id: Optional[str] = None,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
+    """
+    List payments. Pass `cursor` (the `next_cursor` of the previous response)
+    instead of `page` to paginate by keyset, which costs the same for any depth.
+    """
     # Build query filters
     query_filters = {}
     if current_user.role != UserRole.ADMIN:
         # Owners can only see their own payments
         query_filters["user.id"] = current_user.id
 
-    # Add filter parameters
-    if year is not None and month is not None:
-        # Filter by specific year and month
-        start_date = datetime(year, month, 1)
-        if month == 12:
-            end_date = datetime(year + 1, 1, 1)
-        else:
-            end_date = datetime(year, month + 1, 1)
-        query_filters["payment_date"] = {"$gte": start_date, "$lt": end_date}
-    elif year is not None:
-        # Filter by year only
-        start_date = datetime(year, 1, 1)
-        end_date = datetime(year + 1, 1, 1)
-        query_filters["payment_date"] = {"$gte": start_date, "$lt": end_date}
-    elif month is not None:
-        # Filter by month across all years (this is more complex, but we'll do it by month number)
-        query_filters["$expr"] = {"$eq": [{"$month": "$payment_date"}, month]}
+    # Add filter parameters (stored period of payment_date, served by the period indexes)
+    if year is not None:
+        query_filters["payment_year"] = year
+    if month is not None:
+        query_filters["payment_month"] = month
 
     if status is not None:
         query_filters["status"] = status
@@ -88,56 +94,49 @@ async def get_payments(
         query_filters["fee_id"] = fee_id
 
     if property_id is not None:
-        # Filter payments by property through the fee relationship
-        query_filters["fee.property.id"] = property_id
+        try:
+            query_filters["property_id"] = PydanticObjectId(property_id)
+        except (InvalidId, TypeError):
+            # `status` is the query parameter here, not fastapi.status
+            raise HTTPException(status_code=400, detail="Invalid property_id")
 
     # Get motor collection for aggregation
     payment_collection = database.payments
 
-    # Get total count using aggregation
-    count_pipeline = [{"$match": query_filters}, {"$count": "total"}]
-    count_result = await payment_collection.aggregate(count_pipeline).to_list(length=1)
-    total_count = count_result[0]["total"] if count_result else 0
+    # Keyset mode continues after the cursor instead of skipping rows
+    cursor_values = decode_cursor(cursor, PAYMENT_SORT_KEY) if cursor else None
+    skip = 0 if cursor_values else (page - 1) * limit
 
-    # Calculate skip
-    skip = (page - 1) * limit
+    # Page rows and total count in a single aggregation. The sort key lives on the
+    # payment itself, so sort and paging run on the payments_list_sort index and
+    # only the rows of the page are joined.
+    page_pipeline = [
+        *([{"$match": keyset_filter(PAYMENT_SORT_KEY, cursor_values)}] if cursor_values else []),
+        sort_stage(PAYMENT_SORT_KEY),
+        {"$skip": skip},
+        {"$limit": limit},
+        {"$lookup": {
+            "from": "receipts",
+            "localField": "_id",
+            "foreignField": "payment.$id",
+            "as": "receipt_data"
+        }},
+        {"$addFields": {"receipt_data": {"$arrayElemAt": ["$receipt_data", 0]}}}
+    ]
 
-    # Aggregation pipeline for paginated results
     pipeline = [
         {"$match": query_filters},
-        {"$lookup": {
-            "from": "fees",
-            "localField": "fee.$id",
-            "foreignField": "_id",
-            "as": "fee_data"
-        }},
-        {"$unwind": "$fee_data"},
-        {"$lookup": {
-            "from": "properties",
-            "localField": "fee_data.property.$id",
-            "foreignField": "_id",
-            "as": "property_data"
-        }},
-        {"$unwind": "$property_data"},
-        {"$lookup": {
-            "from": "users",
-            "localField": "user.$id",
-            "foreignField": "_id",
-            "as": "user_data"
-        }},
-        {"$unwind": {"path": "$user_data", "preserveNullAndEmptyArrays": True}},
-        {"$sort": {
-            "fee_data.year": -1,
-            "fee_data.month": -1,
-            "property_data.row_letter": 1,
-            "property_data.number": 1
-        }},
-        {"$skip": skip},
-        {"$limit": limit}
+        {"$facet": {
+            "data": page_pipeline,
+            "total": [{"$count": "total"}]
+        }}
     ]
 
     # Execute aggregation
-    results = await payment_collection.aggregate(pipeline).to_list(length=None)
+    facet_result = await payment_collection.aggregate(pipeline).to_list(length=1)
+    results = facet_result[0]["data"] if facet_result else []
+    total_result = facet_result[0]["total"] if facet_result else []
+    total_count = total_result[0]["total"] if total_result else 0
 
     # Calculate total pages
     total_pages = (total_count + limit - 1) // limit
@@ -145,26 +144,25 @@ async def get_payments(
     # Build payment responses from aggregated data
     payment_responses = []
     for result in results:
-        # Find associated receipt
-        receipt = await Receipt.find_one(Receipt.payment.id == result["_id"])
-        receipt_correlative = receipt.correlative_number if receipt else None
-        receipt_issue_date = receipt.issue_date if receipt else None
+        receipt_data = result.get("receipt_data") or {}
+        receipt_correlative = receipt_data.get("correlative_number")
+        receipt_issue_date = receipt_data.get("issue_date")
 
         payment_responses.append(
             PaymentResponse(
                 id=str(result["_id"]),
-                fee_id=str(result["fee_data"]["_id"]),
-                user_id=str(result["user_data"]["_id"]) if result.get("user_data") else None,
+                fee_id=result["fee_id"],
+                user_id=str(result["user"].id) if result.get("user") else None,
                 amount=result["amount"],
                 payment_date=result["payment_date"],
                 receipt_file=result.get("receipt_file"),
                 generated_receipt_file=result.get("generated_receipt_file"),
                 status=result["status"],
                 notes=result.get("notes"),
-                property_row_letter=result["property_data"]["row_letter"],
-                property_number=result["property_data"]["number"],
-                fee_month=result["fee_data"]["month"],
-                fee_year=result["fee_data"]["year"],
+                property_row_letter=result.get("property_row_letter"),
+                property_number=result.get("property_number"),
+                fee_month=result.get("fee_month"),
+                fee_year=result.get("fee_year"),
                 receipt_correlative_number=receipt_correlative,
                 receipt_issue_date=receipt_issue_date
             )
@@ -176,7 +174,8 @@ async def get_payments(
             "page": page,
             "limit": limit,
             "total_count": total_count,
-            "total_pages": total_pages
+            "total_pages": total_pages,
+            "next_cursor": next_cursor(results, PAYMENT_SORT_KEY, limit)
         }
     )
 
@@ -265,14 +264,19 @@ async def create_payment(
 
         receipt_file_path = file_path
 
+    await fee.fetch_link(Fee.property)
+    payment_date = datetime.utcnow()
     payment = Payment(
         fee=fee,
         fee_id=str(fee.id),
         user=current_user,
         amount=amount,
-        payment_date=datetime.utcnow(),
+        payment_date=payment_date,
+        payment_year=payment_date.year,
+        payment_month=payment_date.month,
         receipt_file=receipt_file_path,
-        notes=notes
+        notes=notes,
+        **payment_snapshot(fee, fee.property)
     )
     await payment.insert()
 
@@ -347,6 +351,11 @@ async def update_payment(
 
         payment.receipt_file = file_path
 
+    # Status and amount before the update, and what they contributed to the fee
+    previous_status = payment.status
+    previous_amount = payment.amount
+    previous_contribution = approved_amount(previous_status, previous_amount)
+
     # Update fields
     if amount is not None:
         payment.amount = amount
@@ -355,8 +364,53 @@ async def update_payment(
     if notes is not None:
         payment.notes = notes
 
+    # Stored period of payment_date (also fills it in for payments not yet migrated)
+    payment.payment_year = payment.payment_date.year
+    payment.payment_month = payment.payment_date.month
+
+    # Refresh the fee/property snapshot (also fills it in for payments not yet migrated)
+    snapshot = {}
+    if payment.fee:
+        await payment.fee.fetch_link('property')
+        snapshot = payment_snapshot(payment.fee, payment.fee.property)
+
+    # The payment, its fee balance and its ledger entry change together
+    async with money_transaction() as session:
+        # Claim the status/amount transition: only a request that still finds the
+        # previous values writes them, so a repeated approval (e.g. a double click)
+        # cannot apply the payment to its fee and ledger twice
+        claim = await database.payments.update_one(
+            {"_id": payment.id, "status": previous_status.value, "amount": previous_amount},
+            {"$set": {"status": payment.status.value, "amount": payment.amount}},
+            session=session
+        )
+        if claim.matched_count != 1:
+            # `status` is the form field here, not fastapi.status
+            raise HTTPException(
+                status_code=409,
+                detail="Payment was modified by another request, reload it and try again"
+            )
+
+        # The remaining fields; status and amount were written by the claim
+        await payment.set({
+            "receipt_file": payment.receipt_file,
+            "notes": payment.notes,
+            "payment_year": payment.payment_year,
+            "payment_month": payment.payment_month,
+            **snapshot
+        }, session=session)
+
+        # Move the fee balance (and the property's ledger) by the change in this payment's approved amount
+        contribution_change = approved_amount(payment.status, payment.amount) - previous_contribution
+        await apply_payment_to_fee(payment.fee_id, contribution_change, session=session)
+        if contribution_change:
+            await post_to_ledger([ledger_movement(
+                payment.property_id, LedgerEntryType.PAYMENT, -contribution_change, payment.id,
+                description="Pago aprobado" if contribution_change > 0 else "Pago revertido"
+            )], session=session)
+
     # Create receipt in database if status changed to approved
-    if status == "approved":
+    if payment.status == PaymentStatus.APPROVED and previous_status != PaymentStatus.APPROVED:
         try:
             print(f"Creating receipt for payment {payment_id}")
 
@@ -417,12 +471,6 @@ async def update_payment(
             import traceback
             traceback.print_exc()
 
-    await payment.save()
-
-    # Update fee status based on total payments if payment was approved
-    if status == "approved" and payment.fee:
-        await update_fee_status_based_on_payments(payment.fee)
-
     print(f"Payment saved with generated_receipt_file: {payment.generated_receipt_file}")
 
     # Fetch links again after save
@@ -472,7 +520,23 @@ async def delete_payment(payment_id: str, current_user: User = Depends(get_curre
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Payment not found"
         )
-    await payment.delete()
+    async with money_transaction() as session:
+        # Only the request that actually deletes the payment takes its contribution back
+        result = await database.payments.delete_one({"_id": payment.id}, session=session)
+        if result.deleted_count != 1:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Payment not found"
+            )
+
+        # An approved payment no longer counts towards its fee
+        contribution = approved_amount(payment.status, payment.amount)
+        await apply_payment_to_fee(payment.fee_id, -contribution, session=session)
+        if contribution:
+            await post_to_ledger([ledger_movement(
+                payment.property_id, LedgerEntryType.PAYMENT, contribution, payment.id,
+                description="Pago eliminado"
+            )], session=session)
     return {"message": "Payment deleted successfully"}
 
 @router.get("/{payment_id}/download-receipt")
@@ -529,9 +593,13 @@ async def download_generated_receipt(payment_id: str, current_user: User = Depen
 @router.post("/bulk-import")
 async def bulk_import_payments(
     file: UploadFile = File(...),
+    dry_run: bool = False,
     current_user: User = Depends(get_current_user)
 ):
-    """Bulk import payments from Excel file"""
+    """
+    Bulk import payments from Excel file. With `dry_run` the sheet is only
+    validated and matched, and a preview of what would be imported is returned.
+    """
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -545,234 +613,12 @@ async def bulk_import_payments(
         )
 
     try:
-        # Load workbook
-        wb = load_workbook(file.file)
-        ws = wb.active
-
-        # Expected columns: Villa, Fila, Número, Año, Mes, Monto, Fecha de Pago, Notas
-        expected_headers = ['Villa', 'Fila', 'Número', 'Año', 'Mes', 'Monto', 'Fecha de Pago', 'Notas']
-
-        # Check headers
-        actual_headers = []
-        for col in range(1, 9):
-            cell_value = ws.cell(row=1, column=col).value
-            if cell_value:
-                actual_headers.append(str(cell_value).strip())
-            else:
-                actual_headers.append("")
-
-        if actual_headers[:7] != expected_headers[:7]:  # Notas is optional
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid Excel format. Expected headers: {', '.join(expected_headers[:7])}"
-            )
-
-        results = {
-            "successful_imports": 0,
-            "failed_imports": 0,
-            "errors": []
-        }
-
-        # Process each row starting from row 2
-        for row_idx in range(2, ws.max_row + 1):
-            try:
-                # Extract data
-                villa = str(ws.cell(row=row_idx, column=1).value or "").strip()
-                fila = str(ws.cell(row=row_idx, column=2).value or "").strip()
-                numero = ws.cell(row=row_idx, column=3).value
-                year = ws.cell(row=row_idx, column=4).value
-                month = ws.cell(row=row_idx, column=5).value
-                amount = ws.cell(row=row_idx, column=6).value
-                payment_date_cell = ws.cell(row=row_idx, column=7).value
-                notes = str(ws.cell(row=row_idx, column=8).value or "").strip()
-
-                # Validate required fields
-                if not all([villa, fila, numero is not None, year is not None, month is not None, amount is not None, payment_date_cell is not None]):
-                    results["errors"].append({
-                        "row": row_idx,
-                        "error": "Missing required fields"
-                    })
-                    results["failed_imports"] += 1
-                    continue
-
-                # Convert types
-                try:
-                    numero = int(numero)
-                    year = int(year)
-                    month = int(month)
-                    amount = float(amount)
-                    print(payment_date_cell)
-
-                    if isinstance(payment_date_cell, datetime):
-                        payment_date = payment_date_cell
-                    else:
-                        payment_date = datetime.strptime(str(payment_date_cell), '%Y-%m-%d')
-
-                    print(f"Parsed payment_date: {payment_date}")
-
-                except (ValueError, TypeError) as e:
-                    results["errors"].append({
-                        "row": row_idx,
-                        "error": f"Invalid data types: {str(e)}"
-                    })
-                    results["failed_imports"] += 1
-                    continue
-
-                # Validate data ranges
-                if month < 1 or month > 12:
-                    results["errors"].append({
-                        "row": row_idx,
-                        "error": "Month must be between 1 and 12"
-                    })
-                    results["failed_imports"] += 1
-                    continue
-
-                if amount <= 0:
-                    results["errors"].append({
-                        "row": row_idx,
-                        "error": "Amount must be greater than 0"
-                    })
-                    results["failed_imports"] += 1
-                    continue
-
-                if payment_date > datetime.utcnow():
-                    results["errors"].append({
-                        "row": row_idx,
-                        "error": "Payment date cannot be in the future"
-                    })
-                    results["failed_imports"] += 1
-                    continue
-
-                # Find property
-                property_obj = await Property.find_one(
-                    Property.villa == villa,
-                    Property.row_letter == fila,
-                    Property.number == numero
-                )
-
-                if not property_obj:
-                    results["errors"].append({
-                        "row": row_idx,
-                        "error": f"Property not found: Villa {villa}, {fila}{numero}"
-                    })
-                    results["failed_imports"] += 1
-                    continue
-
-                # Find fee for this property and period
-                fee = await Fee.find_one(
-                    Fee.property.id == property_obj.id,
-                    Fee.year == year,
-                    Fee.month == month,
-                    Fee.status == FeeStatus.PENDING
-                )
-
-                if not fee:
-                    results["errors"].append({
-                        "row": row_idx,
-                        "error": f"No pending fee found for property {villa}-{fila}{numero} in {month}/{year}"
-                    })
-                    results["failed_imports"] += 1
-                    continue
-
-                # Check if payment already exists for this fee
-                existing_payment = await Payment.find_one(Payment.fee_id == str(fee.id))
-                if existing_payment:
-                    results["errors"].append({
-                        "row": row_idx,
-                        "error": f"Payment already exists for this fee"
-                    })
-                    results["failed_imports"] += 1
-                    continue
-
-                # Create payment
-                payment = Payment(
-                    fee=fee,
-                    fee_id=str(fee.id),
-                    user=current_user,  # Admin user creating the bulk import
-                    amount=amount,
-                    payment_date=payment_date,
-                    notes=notes if notes else None
-                )
-                await payment.insert()
-
-                # Auto-approve the payment and generate receipt
-                try:
-                    # Set payment status to approved
-                    payment.status = PaymentStatus.APPROVED
-                    await payment.save()
-
-                    # Fetch property and fee_schedule from fee if not already fetched
-                    if payment.fee:
-                        await payment.fee.fetch_link('property')
-                        await payment.fee.fetch_link('fee_schedule')
-
-                    # Generate correlative number - fee payments use CUOT
-                    from .receipts import generate_correlative_number
-                    correlative_number = await generate_correlative_number(payment.payment_date.year, "CUOT")
-
-                    # Create property and owner details snapshot
-                    if not payment.fee or not payment.fee.property:
-                        # If no property linked, create default details
-                        property_details = {
-                            "villa": "N/A",
-                            "row_letter": "N/A",
-                            "number": 0,
-                            "owner_name": "Propietario no registrado",
-                            "owner_phone": "N/A"
-                        }
-                        owner_details = {
-                            "name": "Propietario no registrado",
-                            "phone": "N/A"
-                        }
-                    else:
-                        property_details = {
-                            "villa": getattr(payment.fee.property, 'villa', 'N/A'),
-                            "row_letter": getattr(payment.fee.property, 'row_letter', 'N/A'),
-                            "number": getattr(payment.fee.property, 'number', 0),
-                            "owner_name": getattr(payment.fee.property, 'owner_name', 'Propietario no registrado'),
-                            "owner_phone": getattr(payment.fee.property, 'owner_phone', 'N/A') or "N/A"
-                        }
-                        owner_details = {
-                            "name": getattr(payment.fee.property, 'owner_name', 'Propietario no registrado'),
-                            "phone": getattr(payment.fee.property, 'owner_phone', 'N/A') or "N/A"
-                        }
-
-                    # Create receipt record
-                    receipt = Receipt(
-                        correlative_number=correlative_number,
-                        payment=payment,
-                        issue_date=payment.payment_date,
-                        total_amount=payment.amount,
-                        property_details=property_details,
-                        owner_details=owner_details,
-                        fee_period=f"Cuota {payment.fee.reference or 'N/A'}" if payment.fee else "N/A",
-                        notes=f"Recibo generado automáticamente al aprobar el pago (subida masiva)"
-                    )
-
-                    await receipt.insert()
-
-                    print(f"Receipt created in database with ID: {receipt.id} for bulk import payment {payment.id}")
-                except Exception as e:
-                    # Log the error but don't fail the bulk import
-                    print(f"Error creating receipt for bulk import payment {payment.id}: {e}")
-                    import traceback
-                    traceback.print_exc()
-
-                # Update fee status based on total payments
-                await update_fee_status_based_on_payments(fee)
-
-                results["successful_imports"] += 1
-
-            except Exception as e:
-                results["errors"].append({
-                    "row": row_idx,
-                    "error": f"Unexpected error: {str(e)}"
-                })
-                results["failed_imports"] += 1
-                continue
-
-        return results
-
+        return await import_payments(file.file, current_user, dry_run=dry_run)
+    except InvalidImportFormat as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except InvalidFileException:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -789,115 +635,31 @@ async def bulk_approve_payments(
     request: BulkApproveRequest,
     current_user: User = Depends(get_current_user)
 ):
-    payment_ids = request.payment_ids
-    """Bulk approve multiple payments"""
+    """Bulk approve multiple payments, reporting a result per payment"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
 
-    if not payment_ids:
+    if not request.payment_ids:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No payment IDs provided"
         )
 
-    approved_count = 0
-    errors = []
-
-    for payment_id in payment_ids:
-        try:
-            payment = await Payment.get(payment_id)
-            if not payment:
-                errors.append(f"Payment {payment_id} not found")
-                continue
-
-            # Check if payment is already approved
-            if payment.status == PaymentStatus.APPROVED:
-                errors.append(f"Payment {payment_id} is already approved")
-                continue
-
-            # Fetch linked documents
-            await payment.fetch_link(Payment.fee)
-            await payment.fetch_link(Payment.user)
-
-            # Update payment status
-            payment.status = PaymentStatus.APPROVED
-            await payment.save()
+    return await approve_payments_in_bulk(request.payment_ids)
 
-            # Update fee status based on total payments
-            if payment.fee:
-                await update_fee_status_based_on_payments(payment.fee)
-
-            # Generate receipt (similar to individual approval)
-            try:
-                print(f"Creating receipt for payment {payment_id}")
-
-                # Fetch property and fee_schedule from fee if not already fetched
-                if payment.fee:
-                    await payment.fee.fetch_link('property')
-                    await payment.fee.fetch_link('fee_schedule')
-
-                # Generate correlative number - fee payments use CUOT
-                from .receipts import generate_correlative_number
-                correlative_number = await generate_correlative_number(payment.payment_date.year, "CUOT")
-
-                # Create property and owner details snapshot
-                if not payment.fee or not payment.fee.property:
-                    # If no property linked, create default details
-                    property_details = {
-                        "villa": "N/A",
-                        "row_letter": "N/A",
-                        "number": 0,
-                        "owner_name": "Propietario no registrado",
-                        "owner_phone": "N/A"
-                    }
-                    owner_details = {
-                        "name": "Propietario no registrado",
-                        "phone": "N/A"
-                    }
-                else:
-                    property_details = {
-                        "villa": getattr(payment.fee.property, 'villa', 'N/A'),
-                        "row_letter": getattr(payment.fee.property, 'row_letter', 'N/A'),
-                        "number": getattr(payment.fee.property, 'number', 0),
-                        "owner_name": getattr(payment.fee.property, 'owner_name', 'Propietario no registrado'),
-                        "owner_phone": getattr(payment.fee.property, 'owner_phone', 'N/A') or "N/A"
-                    }
-                    owner_details = {
-                        "name": getattr(payment.fee.property, 'owner_name', 'Propietario no registrado'),
-                        "phone": getattr(payment.fee.property, 'owner_phone', 'N/A') or "N/A"
-                    }
-
-                # Create receipt record
-                receipt = Receipt(
-                    correlative_number=correlative_number,
-                    payment=payment,
-                    issue_date=payment.payment_date,
-                    total_amount=payment.amount,
-                    property_details=property_details,
-                    owner_details=owner_details,
-                    fee_period=f"Cuota {payment.fee.reference or 'N/A'}" if payment.fee else "N/A",
-                    notes=f"Recibo generado automáticamente al aprobar el pago (aprobación masiva)"
-                )
-
-                await receipt.insert()
-
-                print(f"Receipt created in database with ID: {receipt.id}")
-            except Exception as e:
-                # Log the error but don't fail the bulk operation
-                print(f"Error creating receipt for payment {payment_id}: {e}")
-                import traceback
-                traceback.print_exc()
-
-            approved_count += 1
-
-        except Exception as e:
-            errors.append(f"Error processing payment {payment_id}: {str(e)}")
+@router.post("/reconcile-fees")
+async def reconcile_fees(
+    request: ReconcileFeesRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Recompute fee balances and statuses from the approved payments (repair tool)"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
 
-    return {
-        "message": f"Successfully approved {approved_count} payments",
-        "approved_count": approved_count,
-        "errors": errors
-    }
\ No newline at end of file
+    return await reconcile_fee_balances(request.fee_ids)
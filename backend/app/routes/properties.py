@@ -1,9 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 from pydantic import BaseModel
 from ..models.property import Property, PropertyCreate, PropertyUpdate, PropertyResponse
 from ..models.user import User, UserRole
+from ..models.payment import Payment
+from ..models.fee import Fee
+from ..models.ledger import LedgerEntryResponse, PropertyLedgerResponse
 from ..routes.auth import get_current_user
+from ..utils.ledger import get_property_ledger
 import openpyxl
 
 class BulkImportResponse(BaseModel):
@@ -51,6 +56,47 @@ async def get_property(property_id: str, current_user: User = Depends(get_curren
         owner_id=str(prop.owner.id) if prop.owner else None
     )
 
+@router.get("/{property_id}/ledger", response_model=PropertyLedgerResponse)
+async def get_property_ledger_entries(
+    property_id: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Account statement of a property: ledger entries in [start_date, end_date) with running balance"""
+    prop = await Property.get(property_id)
+    if not prop:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Property not found"
+        )
+
+    # Owners can only see the ledger of their own properties
+    if (current_user.role != UserRole.ADMIN and
+        (not prop.owner or str(prop.owner.ref.id) != str(current_user.id))):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+
+    ledger = await get_property_ledger(prop.id, start_date, end_date)
+    return PropertyLedgerResponse(
+        **{key: value for key, value in ledger.items() if key != "entries"},
+        entries=[
+            LedgerEntryResponse(
+                id=str(entry["_id"]),
+                sequence=entry["sequence"],
+                entry_date=entry["entry_date"],
+                entry_type=entry["entry_type"],
+                amount=entry["amount"],
+                balance=entry["balance"],
+                source_id=entry.get("source_id"),
+                description=entry.get("description")
+            )
+            for entry in ledger["entries"]
+        ]
+    )
+
 @router.post("/", response_model=PropertyResponse)
 async def create_property(
     property_data: PropertyCreate,
@@ -116,6 +162,16 @@ async def update_property(
         setattr(prop, field, value)
 
     await prop.save()
+
+    # Keep the sort key copied onto this property's fees and payments in step
+    if "row_letter" in update_data or "number" in update_data:
+        await Fee.find(Fee.property.id == prop.id).update(
+            {"$set": {"property_row_letter": prop.row_letter, "property_number": prop.number}}
+        )
+        await Payment.find(Payment.property_id == prop.id).update(
+            {"$set": {"property_row_letter": prop.row_letter, "property_number": prop.number}}
+        )
+
     return PropertyResponse(
         id=str(prop.id),
         row_letter=prop.row_letter,
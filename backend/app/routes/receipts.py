@@ -1,3 +1,4 @@
+import io
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
 from typing import List
@@ -6,32 +7,16 @@ from ..models.receipt import Receipt, ReceiptCreate, ReceiptResponse
 from ..models.payment import Payment
 from ..models.user import User, UserRole
 from ..routes.auth import get_current_user
-from ..utils.pdf_generator import generate_receipt_pdf
+from ..utils.render_pool import render
 from ..config.database import database
+from ..utils.sequence import reserve_correlative_numbers
 
 router = APIRouter()
 
 async def generate_correlative_number(year: int, prefix: str = "REC") -> str:
     """Generate a correlative receipt number with specified prefix"""
-
-    # Find the last receipt for this year and prefix
-    last_receipt = await Receipt.find(
-        {"correlative_number": {"$regex": f"^{prefix}-{year}"}}
-    ).sort([("correlative_number", -1)]).first_or_none()
-
-    if last_receipt:
-        # Extract the sequential number from the last receipt
-        parts = last_receipt.correlative_number.split("-")
-        if len(parts) == 3:
-            last_number = int(parts[2])
-            new_number = last_number + 1
-        else:
-            new_number = 1
-    else:
-        new_number = 1
-
-    # Format: PREFIX-YYYY-XXXXX (padded to 5 digits)
-    return f"{prefix}-{year}-{new_number:05d}"
+    correlative_numbers = await reserve_correlative_numbers(year, prefix, 1)
+    return correlative_numbers[0]
 
 @router.get("/", response_model=List[ReceiptResponse])
 async def get_receipts(current_user: User = Depends(get_current_user)):
@@ -216,7 +201,7 @@ async def download_receipt_pdf(receipt_id: str, current_user: User = Depends(get
     }
 
     # Generate PDF
-    pdf_buffer = generate_receipt_pdf(pdf_data)
+    pdf_buffer = io.BytesIO(await render("receipt_pdf", pdf_data))
 
     # Return PDF as streaming response
     filename = f"recibo_{receipt.correlative_number}.pdf"
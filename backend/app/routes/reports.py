@@ -1,31 +1,148 @@
+import io
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from typing import Optional
 from datetime import datetime
-from ..models.fee import Fee, FeeStatus
-from ..models.payment import Payment
+from ..models.fee import UNPAID_FEE_STATUSES
 from ..models.property import Property
+from ..models.report_job import ReportJob, ReportJobCreate, ReportJobResponse, ReportJobStatus
 from ..models.user import User, UserRole
-from ..models.expense import Expense
 from ..routes.auth import get_current_user
-from ..utils.pdf_generator import (
-    generate_property_payment_history_pdf,
-    generate_outstanding_fees_pdf,
-    generate_monthly_payment_summary_pdf,
-    generate_annual_property_statement_pdf
-)
 from ..utils.excel_generator import (
-    generate_property_payment_history_excel,
-    generate_outstanding_fees_excel,
-    generate_monthly_payment_summary_excel,
-    generate_monthly_fees_excel,
-    generate_annual_property_statement_excel,
-    generate_all_payments_excel,
-    generate_filtered_fees_excel
+    stream_outstanding_fees_excel,
+    stream_monthly_payment_summary_excel,
+    stream_monthly_fees_excel,
+    stream_all_payments_excel,
+    stream_expenses_excel,
+    stream_filtered_fees_excel
+)
+from ..utils.render_pool import render, render_pool
+from ..utils.row_spool import spool_rows
+from ..utils.report_jobs import submit_report_job, mark_if_stale, result_available
+from ..utils.annual_statements import stream_annual_statements_zip
+from ..utils.aging_report import AGING_GROUPS, fee_aging_report
+from ..utils.report_queries import (
+    property_activity,
+    outstanding_fee_rows,
+    monthly_payment_rows,
+    monthly_fee_rows,
+    all_payment_rows,
+    expense_rows,
+    filtered_fee_rows,
+    annual_activity_rows,
+    fee_report_filters,
+    period_range_error
 )
 
 router = APIRouter()
 
+@router.get("/render-stats")
+async def get_render_stats(current_user: User = Depends(get_current_user)):
+    """Counters of the document rendering process pool for this worker"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return render_pool.stats()
+
+def _job_response(job: ReportJob, cached: bool = False) -> ReportJobResponse:
+    return ReportJobResponse(
+        id=str(job.id),
+        report=job.report,
+        params=job.params,
+        status=job.status,
+        cached=cached,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        expires_at=job.expires_at,
+        filename=job.filename,
+        size=job.size,
+        error=job.error
+    )
+
+async def _get_report_job(job_id: str) -> ReportJob:
+    job = await ReportJob.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Report job not found"
+        )
+    return await mark_if_stale(job)
+
+@router.post("/jobs", response_model=ReportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_report_job(
+    job_data: ReportJobCreate,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Generate a report in the background. An identical request made since the
+    last data change returns the existing job, finished or not.
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+
+    try:
+        job, cached = await submit_report_job(job_data.report, job_data.params, current_user.id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return _job_response(job, cached)
+
+@router.get("/jobs/{job_id}", response_model=ReportJobResponse)
+async def get_report_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Status of a report job"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return _job_response(await _get_report_job(job_id))
+
+@router.get("/jobs/{job_id}/download")
+async def download_report_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Download the result of a completed report job"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+
+    job = await _get_report_job(job_id)
+    if job.status in (ReportJobStatus.QUEUED, ReportJobStatus.RUNNING):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The report is not ready yet"
+        )
+    if job.status == ReportJobStatus.FAILED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"The report failed: {job.error}"
+        )
+    if not result_available(job):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="The report has expired, please request it again"
+        )
+
+    return FileResponse(
+        path=job.file_path,
+        filename=job.filename,
+        media_type=job.media_type
+    )
+
 @router.get("/property/{property_id}/payment-history")
 async def download_property_payment_history(
     property_id: str,
@@ -48,30 +165,8 @@ async def download_property_payment_history(
             detail="Property not found"
         )
 
-    # Get payments for this property through fee relationship
-    payments = await Payment.find().to_list()
-
-    # Filter payments by property through fee
-    filtered_payments = []
-    for payment in payments:
-        await payment.fetch_link(Payment.fee)
-        if payment.fee:
-            await payment.fee.fetch_link(Fee.property)
-            if payment.fee.property and str(payment.fee.property.id) == property_id:
-                filtered_payments.append(payment)
-
-    payments = filtered_payments
-
-    # Get outstanding fees for this property
-    fees = await Fee.find(
-        Fee.property.id == property_obj.id,
-        Fee.status == FeeStatus.PENDING
-    ).to_list()
-
-    # Filter by year if specified
-    if year:
-        payments = [p for p in payments if p.payment_date.year == year]
-        fees = [f for f in fees if f.year == year]
+    # Payments and outstanding fees of this property in one aggregation
+    activity = await property_activity(property_obj.id, year=year, fee_statuses=UNPAID_FEE_STATUSES)
 
     # Prepare data
     property_data = {
@@ -82,34 +177,16 @@ async def download_property_payment_history(
         "owner_phone": property_obj.owner_phone
     }
 
-    payments_data = [
-        {
-            "payment_date": payment.payment_date,
-            "amount": payment.amount,
-            "status": payment.status,
-            "reference": payment.fee_id  # Use fee_id as reference
-        }
-        for payment in payments
-    ]
-
-    fees_data = [
-        {
-            "month": fee.month,
-            "year": fee.year,
-            "amount": fee.amount,
-            "due_date": fee.due_date,
-            "status": fee.status
-        }
-        for fee in fees
-    ]
+    payments_data = activity["payments"]
+    fees_data = activity["fees"]
 
     # Generate report based on format
     if format.lower() == "excel":
-        buffer = generate_property_payment_history_excel(property_data, payments_data, fees_data)
+        buffer = io.BytesIO(await render("property_payment_history_excel", property_data, payments_data, fees_data))
         media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         extension = "xlsx"
     else:
-        buffer = generate_property_payment_history_pdf(property_data, payments_data, fees_data)
+        buffer = io.BytesIO(await render("property_payment_history_pdf", property_data, payments_data, fees_data))
         media_type = "application/pdf"
         extension = "pdf"
 
@@ -132,38 +209,71 @@ async def download_outstanding_fees_report(
             detail="Not enough permissions"
         )
 
-    # Get all outstanding fees
-    fees = await Fee.find(Fee.status == FeeStatus.PENDING).to_list()
-
-    # Fetch property details for each fee
-    for fee in fees:
-        await fee.fetch_link(Fee.property)
-
-    fees_data = [
-        {
-            "property_villa": fee.property.villa,
-            "property_row_letter": fee.property.row_letter,
-            "property_number": fee.property.number,
-            "property_owner_name": fee.property.owner_name,
-            "month": fee.month,
-            "year": fee.year,
-            "amount": fee.amount,
-            "due_date": fee.due_date
-        }
-        for fee in fees if fee.property
-    ]
+    # Generate report based on format (Excel is streamed while rows are read)
+    if format.lower() == "excel":
+        buffer = stream_outstanding_fees_excel(outstanding_fee_rows())
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        extension = "xlsx"
+    else:
+        # Rows go to the render worker through a temporary file, not a list
+        fees_data = await spool_rows(outstanding_fee_rows())
+        try:
+            buffer = io.BytesIO(await render("outstanding_fees_pdf", fees_data))
+        finally:
+            fees_data.close()
+        media_type = "application/pdf"
+        extension = "pdf"
+
+    filename = f"cuotas_pendientes_{datetime.now().strftime('%Y%m%d')}.{extension}"
+    return StreamingResponse(
+        buffer,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+@router.get("/aging")
+async def get_fee_aging_report(
+    format: str = "json",
+    group_by: str = "property",
+    top: int = 10,
+    as_of: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Outstanding balance by days past due (0-30, 31-60, 61-90, 90+) with the top debtors"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+
+    if group_by not in AGING_GROUPS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"group_by must be one of: {', '.join(AGING_GROUPS)}"
+        )
+
+    if top < 1 or top > 100:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="top must be between 1 and 100"
+        )
+
+    report = await fee_aging_report(as_of=as_of, group_by=group_by, top=top)
+
+    if format.lower() == "json":
+        return report
 
     # Generate report based on format
     if format.lower() == "excel":
-        buffer = generate_outstanding_fees_excel(fees_data)
+        buffer = io.BytesIO(await render("fee_aging_excel", report))
         media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         extension = "xlsx"
     else:
-        buffer = generate_outstanding_fees_pdf(fees_data)
+        buffer = io.BytesIO(await render("fee_aging_pdf", report))
         media_type = "application/pdf"
         extension = "pdf"
 
-    filename = f"cuotas_pendientes_{datetime.now().strftime('%Y%m%d')}.{extension}"
+    filename = f"antiguedad_deuda_{report['as_of'].strftime('%Y%m%d')}.{extension}"
     return StreamingResponse(
         buffer,
         media_type=media_type,
@@ -191,44 +301,17 @@ async def download_monthly_payment_summary(
             detail="Month must be between 1 and 12"
         )
 
-    # Get payments for the specified month
-    start_date = datetime(year, month, 1)
-    if month == 12:
-        end_date = datetime(year + 1, 1, 1)
-    else:
-        end_date = datetime(year, month + 1, 1)
-
-    payments = await Payment.find(
-        Payment.payment_date >= start_date,
-        Payment.payment_date < end_date
-    ).to_list()
-
-    # Fetch property details through fee
-    for payment in payments:
-        await payment.fetch_link(Payment.fee)
-        if payment.fee:
-            await payment.fee.fetch_link(Fee.property)
-
-    payments_data = [
-        {
-            "property_villa": payment.fee.property.villa,
-            "property_row_letter": payment.fee.property.row_letter,
-            "property_number": payment.fee.property.number,
-            "property_owner_name": payment.fee.property.owner_name,
-            "payment_date": payment.payment_date,
-            "amount": payment.amount,
-            "status": payment.status
-        }
-        for payment in payments if payment.fee and payment.fee.property
-    ]
-
-    # Generate report based on format
+    # Generate report based on format (Excel is streamed while rows are read)
     if format.lower() == "excel":
-        buffer = generate_monthly_payment_summary_excel(year, month, payments_data)
+        buffer = stream_monthly_payment_summary_excel(year, month, monthly_payment_rows(year, month))
         media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         extension = "xlsx"
     else:
-        buffer = generate_monthly_payment_summary_pdf(year, month, payments_data)
+        payments_data = await spool_rows(monthly_payment_rows(year, month))
+        try:
+            buffer = io.BytesIO(await render("monthly_payment_summary_pdf", year, month, payments_data))
+        finally:
+            payments_data.close()
         media_type = "application/pdf"
         extension = "pdf"
 
@@ -255,62 +338,18 @@ async def download_monthly_fees_report(
             detail="Not enough permissions"
         )
 
-    # Validate months
-    if start_month < 1 or start_month > 12 or end_month < 1 or end_month > 12:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Months must be between 1 and 12"
-        )
-
-    # Validate period range
-    start_period = start_year * 12 + start_month
-    end_period = end_year * 12 + end_month
-    if start_period > end_period:
+    error = period_range_error(start_year, start_month, end_year, end_month)
+    if error:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Start period must be before or equal to end period"
+            detail=error
         )
 
-    # Get fees for the specified period range
-    # Using a simpler approach to avoid complex query syntax issues
-    fees = await Fee.find().to_list()
-
-    # Filter fees by period range in Python
-    filtered_fees = []
-    for fee in fees:
-        fee_period = fee.year * 12 + fee.month
-        start_period_num = start_year * 12 + start_month
-        end_period_num = end_year * 12 + end_month
-
-        if start_period_num <= fee_period <= end_period_num:
-            filtered_fees.append(fee)
-
-    fees = filtered_fees
-
-    # Fetch property details for each fee
-    for fee in fees:
-        await fee.fetch_link(Fee.property)
-
-    fees_data = [
-        {
-            "property_villa": fee.property.villa,
-            "property_row_letter": fee.property.row_letter,
-            "property_number": fee.property.number,
-            "property_owner_name": fee.property.owner_name,
-            "month": fee.month,
-            "year": fee.year,
-            "amount": fee.amount,
-            "due_date": fee.due_date,
-            "status": fee.status
-        }
-        for fee in fees if fee.property
-    ]
-
-    # Sort by property and then by period
-    fees_data.sort(key=lambda x: (x['property_villa'], x['property_row_letter'], x['property_number'], x['year'], x['month']))
-
-    # Generate Excel report
-    buffer = generate_monthly_fees_excel(fees_data, start_year, start_month, end_year, end_month)
+    # Stream the Excel report while rows are read
+    buffer = stream_monthly_fees_excel(
+        monthly_fee_rows(start_year, start_month, end_year, end_month),
+        start_year, start_month, end_year, end_month
+    )
     media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     extension = "xlsx"
 
@@ -345,28 +384,8 @@ async def download_annual_property_statement(
             detail="Not enough permissions"
         )
 
-    # Get fees for this property and year
-    fees = await Fee.find(
-        Fee.property.id == property_obj.id,
-        Fee.year == year
-    ).to_list()
-
-    # Get payments for this property and year through fee relationship
-    payments = await Payment.find(
-        Payment.payment_date >= datetime(year, 1, 1),
-        Payment.payment_date < datetime(year + 1, 1, 1)
-    ).to_list()
-
-    # Filter payments by property through fee
-    filtered_payments = []
-    for payment in payments:
-        await payment.fetch_link(Payment.fee)
-        if payment.fee:
-            await payment.fee.fetch_link(Fee.property)
-            if payment.fee.property and str(payment.fee.property.id) == property_id:
-                filtered_payments.append(payment)
-
-    payments = filtered_payments
+    # Fees and payments of this property and year in one aggregation
+    activity = await property_activity(property_obj.id, year=year)
 
     # Prepare data
     property_data = {
@@ -377,30 +396,16 @@ async def download_annual_property_statement(
         "owner_phone": property_obj.owner_phone
     }
 
-    fees_data = [
-        {
-            "month": fee.month,
-            "year": fee.year,
-            "amount": fee.amount
-        }
-        for fee in fees
-    ]
-
-    payments_data = [
-        {
-            "payment_date": payment.payment_date,
-            "amount": payment.amount
-        }
-        for payment in payments
-    ]
+    fees_data = activity["fees"]
+    payments_data = activity["payments"]
 
     # Generate report based on format
     if format.lower() == "excel":
-        buffer = generate_annual_property_statement_excel(property_data, year, fees_data, payments_data)
+        buffer = io.BytesIO(await render("annual_property_statement_excel", property_data, year, fees_data, payments_data))
         media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         extension = "xlsx"
     else:
-        buffer = generate_annual_property_statement_pdf(property_data, year, fees_data, payments_data)
+        buffer = io.BytesIO(await render("annual_property_statement_pdf", property_data, year, fees_data, payments_data))
         media_type = "application/pdf"
         extension = "pdf"
 
@@ -411,6 +416,30 @@ async def download_annual_property_statement(
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
+@router.get("/annual-statements/{year}")
+async def download_annual_statements(
+    year: int,
+    format: str = "pdf",
+    current_user: User = Depends(get_current_user)
+):
+    """ZIP with the annual statement of every property"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+
+    # Every property's fees and payments come from one aggregation and the
+    # statements render in parallel in the process pool
+    buffer = stream_annual_statements_zip(annual_activity_rows(year), year, format)
+
+    filename = f"estados_anuales_{year}.zip"
+    return StreamingResponse(
+        buffer,
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
 @router.get("/all-payments")
 async def download_all_payments_report(
     format: str = "excel",
@@ -423,35 +452,8 @@ async def download_all_payments_report(
             detail="Not enough permissions"
         )
 
-    # Get all payments
-    payments = await Payment.find_all().to_list()
-
-    # Fetch property and fee details for each payment
-    for payment in payments:
-        await payment.fetch_link(Payment.fee)
-        if payment.fee:
-            await payment.fee.fetch_link(Fee.property)
-
-    payments_data = [
-        {
-            "payment_date": payment.payment_date,
-            "property_villa": payment.fee.property.villa if payment.fee and payment.fee.property else "N/A",
-            "property_row_letter": payment.fee.property.row_letter if payment.fee and payment.fee.property else "N/A",
-            "property_number": payment.fee.property.number if payment.fee and payment.fee.property else 0,
-            "property_owner_name": payment.fee.property.owner_name if payment.fee and payment.fee.property else "Propietario no registrado",
-            "amount": payment.amount,
-            "status": payment.status,
-            "fee_reference": payment.fee.reference if payment.fee else "N/A",
-            "notes": payment.notes
-        }
-        for payment in payments if payment.fee
-    ]
-
-    # Sort by payment date descending (newest first)
-    payments_data.sort(key=lambda x: x['payment_date'], reverse=True)
-
-    # Generate Excel report
-    buffer = generate_all_payments_excel(payments_data)
+    # Stream the Excel report while rows are read
+    buffer = stream_all_payments_excel(all_payment_rows())
     media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     extension = "xlsx"
 
@@ -474,33 +476,8 @@ async def download_expenses_report(
             detail="Not enough permissions"
         )
 
-    # Get all expenses
-    expenses = await Expense.find_all().to_list()
-
-    # Fetch user details for each expense
-    for expense in expenses:
-        await expense.fetch_link(Expense.user)
-
-    expenses_data = [
-        {
-            "expense_date": expense.expense_date,
-            "expense_type": expense.expense_type,
-            "beneficiary": expense.beneficiary,
-            "beneficiary_details": expense.beneficiary_details,
-            "amount": expense.amount,
-            "status": expense.status,
-            "description": expense.description,
-            "notes": expense.notes,
-            "created_by": expense.user.full_name if expense.user else "N/A"
-        }
-        for expense in expenses
-    ]
-
-    # Sort by expense date descending (newest first)
-    expenses_data.sort(key=lambda x: x['expense_date'], reverse=True)
-
-    # Generate Excel report
-    buffer = generate_expenses_excel(expenses_data)
+    # Stream the Excel report while rows are read
+    buffer = stream_expenses_excel(expense_rows())
     media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     extension = "xlsx"
 
@@ -526,61 +503,10 @@ async def download_filtered_fees_report(
             detail="Not enough permissions"
         )
 
-    # Build query filters (same as in fees.py)
-    query_filters = {}
+    query_filters = fee_report_filters(year, month, status, property_id)
 
-    if current_user.role != UserRole.ADMIN:
-        # Owners can only see their own fees
-        query_filters["user.$id"] = PydanticObjectId(current_user.id)
-
-    if year is not None:
-        query_filters["year"] = year
-
-    if month is not None:
-        query_filters["month"] = month
-
-    if status is not None and status.strip():
-        # Support multiple statuses separated by comma
-        status_list = [s.strip() for s in status.split(',')]
-        if len(status_list) == 1:
-            query_filters["status"] = status_list[0]
-        else:
-            query_filters["status"] = {"$in": status_list}
-
-    if property_id is not None and property_id.strip():
-        query_filters["property.$id"] = PydanticObjectId(property_id)
-
-    # Get fees with filters
-    fees = await Fee.find(query_filters).to_list()
-
-    # Fetch property details for each fee
-    for fee in fees:
-        await fee.fetch_link(Fee.property)
-
-    # Sort by period (same as in fees.py)
-    fees_data = [
-        {
-            "property_villa": fee.property.villa,
-            "property_row_letter": fee.property.row_letter,
-            "property_number": fee.property.number,
-            "property_owner_name": fee.property.owner_name,
-            "amount": fee.amount,
-            "paid_amount": fee.paid_amount,
-            "remaining_amount": fee.amount - fee.paid_amount,
-            "year": fee.year,
-            "month": fee.month,
-            "due_date": fee.due_date,
-            "status": fee.status,
-            "notes": fee.notes
-        }
-        for fee in fees if fee.property
-    ]
-
-    # Sort by year desc, month desc, property
-    fees_data.sort(key=lambda x: (-x['year'], -x['month'], x['property_villa'], x['property_row_letter'], x['property_number']))
-
-    # Generate Excel report
-    buffer = generate_filtered_fees_excel(fees_data)
+    # Stream the Excel report while rows are read
+    buffer = stream_filtered_fees_excel(filtered_fee_rows(query_filters))
     media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     extension = "xlsx"
 
@@ -3,6 +3,7 @@ from typing import List
 from ..models.user import User, UserCreate, UserUpdate, UserResponse, UserRole
 from ..routes.auth import get_current_user
 from ..auth.utils import get_password_hash
+from ..auth.identity_cache import identity_cache
 
 router = APIRouter()
 
@@ -37,6 +38,16 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
         is_active=current_user.is_active
     )
 
+@router.get("/identity-cache/stats")
+async def get_identity_cache_stats(current_user: User = Depends(get_current_user)):
+    """Hit/miss counters of the authentication identity cache for this worker"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return identity_cache.stats()
+
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(user_id: str, current_user: User = Depends(get_current_user)):
     if current_user.role != UserRole.ADMIN and str(current_user.id) != user_id:
@@ -78,11 +89,14 @@ async def update_user(
         )
 
     # Update fields
+    previous_email = user.email
     update_data = user_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(user, field, value)
 
     await user.save()
+    identity_cache.invalidate(previous_email)
+    identity_cache.invalidate(user.email)
     return UserResponse(
         id=str(user.id),
         email=user.email,
@@ -106,4 +120,5 @@ async def delete_user(user_id: str, current_user: User = Depends(get_current_use
             detail="User not found"
         )
     await user.delete()
+    identity_cache.invalidate(user.email)
     return {"message": "User deleted successfully"}
@@ -0,0 +1,153 @@
+from datetime import datetime
+from typing import Optional
+from ..models.fee import FeeStatus, UNPAID_FEE_STATUSES
+from ..config.database import database
+
+# (key, label, first day, last day) of each aging bucket; None = open ended
+AGING_BUCKETS = [
+    ("days_0_30", "0-30 días", 0, 30),
+    ("days_31_60", "31-60 días", 31, 60),
+    ("days_61_90", "61-90 días", 61, 90),
+    ("days_over_90", "Más de 90 días", 91, None),
+]
+
+# Breakdown of the aging report -> fields of the group key
+AGING_GROUPS = {
+    "property": ["villa", "row_letter", "number", "owner_name", "property_id"],
+    "row": ["villa", "row_letter"],
+    "villa": ["villa"],
+}
+
+# Fees that still owe money (fees under an agreement are settled through installments)
+OWING_FEE_STATUSES = [*UNPAID_FEE_STATUSES, FeeStatus.PARTIALLY_PAID]
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+def _bucket_sums() -> dict:
+    """$sum accumulators re-adding per-property bucket amounts"""
+    return {
+        **{key: {"$sum": f"${key}"} for key, _, _, _ in AGING_BUCKETS},
+        "total": {"$sum": "$total"},
+        "fee_count": {"$sum": "$fee_count"},
+    }
+
+def aging_pipeline(as_of: datetime, group_by: str, top: int) -> list:
+    """
+    Aging of the outstanding balance, entirely in the database: fees are reduced
+    to one row per property (bucketed by days past due) before the only join,
+    then broken down by `group_by` with the top debtors and grand totals.
+    """
+    group_fields = AGING_GROUPS[group_by]
+    bucket_branches = [
+        {"case": {"$lte": ["$days", last]}, "then": key}
+        for key, _, _, last in AGING_BUCKETS if last is not None
+    ]
+
+    return [
+        {"$match": {
+            "status": {"$in": [fee_status.value for fee_status in OWING_FEE_STATUSES]},
+            "due_date": {"$lte": as_of}
+        }},
+        {"$project": {
+            "property_id": "$property.$id",
+            "due_date": 1,
+            "remaining": {"$subtract": ["$amount", {"$ifNull": ["$paid_amount", 0]}]},
+            "days": {"$floor": {"$divide": [{"$subtract": [as_of, "$due_date"]}, DAY_MS]}}
+        }},
+        {"$match": {"remaining": {"$gt": 0}}},
+        {"$set": {"bucket": {"$switch": {
+            "branches": bucket_branches,
+            "default": AGING_BUCKETS[-1][0]
+        }}}},
+        {"$group": {
+            "_id": "$property_id",
+            **{
+                key: {"$sum": {"$cond": [{"$eq": ["$bucket", key]}, "$remaining", 0]}}
+                for key, _, _, _ in AGING_BUCKETS
+            },
+            "total": {"$sum": "$remaining"},
+            "fee_count": {"$sum": 1},
+            "oldest_due_date": {"$min": "$due_date"}
+        }},
+        {"$lookup": {
+            "from": "properties",
+            "localField": "_id",
+            "foreignField": "_id",
+            "as": "property_data"
+        }},
+        {"$set": {
+            "property_id": "$_id",
+            "villa": {"$ifNull": [{"$arrayElemAt": ["$property_data.villa", 0]}, "N/A"]},
+            "row_letter": {"$ifNull": [{"$arrayElemAt": ["$property_data.row_letter", 0]}, ""]},
+            "number": {"$ifNull": [{"$arrayElemAt": ["$property_data.number", 0]}, 0]},
+            "owner_name": {"$ifNull": [{"$arrayElemAt": ["$property_data.owner_name", 0]}, ""]}
+        }},
+        {"$unset": "property_data"},
+        {"$facet": {
+            "groups": [
+                {"$group": {
+                    "_id": {field: f"${field}" for field in group_fields},
+                    **_bucket_sums(),
+                    "oldest_due_date": {"$min": "$oldest_due_date"}
+                }},
+                {"$sort": {f"_id.{field}": 1 for field in group_fields}}
+            ],
+            "top_debtors": [
+                {"$sort": {"total": -1, "oldest_due_date": 1}},
+                {"$limit": top}
+            ],
+            "totals": [{"$group": {"_id": None, **_bucket_sums()}}]
+        }}
+    ]
+
+def aging_group_label(group_by: str, row: dict) -> str:
+    """Display name of a breakdown row, e.g. 'Villa 1 - A12' or 'Villa 1 - Fila A'"""
+    if group_by == "villa":
+        return row["villa"]
+    if group_by == "row":
+        return f"{row['villa']} - Fila {row['row_letter']}"
+    return f"{row['villa']} - {row['row_letter']}{row['number']}"
+
+async def fee_aging_report(as_of: Optional[datetime] = None, group_by: str = "property", top: int = 10) -> dict:
+    """Outstanding balance by days past due, broken down by property, row or villa"""
+    as_of = as_of or datetime.utcnow()
+    result = await database.fees.aggregate(
+        aging_pipeline(as_of, group_by, top), allowDiskUse=True
+    ).to_list(length=1)
+    facets = result[0] if result else {"groups": [], "top_debtors": [], "totals": []}
+
+    def amounts(row: dict) -> dict:
+        return {
+            **{key: round(row.get(key, 0.0), 2) for key, _, _, _ in AGING_BUCKETS},
+            "total": round(row.get("total", 0.0), 2),
+            "fee_count": row.get("fee_count", 0)
+        }
+
+    def debtor(row: dict) -> dict:
+        return {
+            "label": aging_group_label("property", row),
+            "property_id": str(row["property_id"]),
+            "villa": row["villa"],
+            "row_letter": row["row_letter"],
+            "number": row["number"],
+            "owner_name": row["owner_name"],
+            "oldest_due_date": row["oldest_due_date"],
+            **amounts(row)
+        }
+
+    groups = []
+    for row in facets["groups"]:
+        key = dict(row["_id"])
+        if "property_id" in key:
+            key["property_id"] = str(key["property_id"])
+        groups.append({"label": aging_group_label(group_by, key), **key, "oldest_due_date": row["oldest_due_date"], **amounts(row)})
+
+    totals = facets["totals"][0] if facets["totals"] else {}
+    return {
+        "as_of": as_of,
+        "group_by": group_by,
+        "buckets": [{"key": key, "label": label} for key, label, _, _ in AGING_BUCKETS],
+        "totals": amounts(totals),
+        "groups": groups,
+        "top_debtors": [debtor(row) for row in facets["top_debtors"]]
+    }
@@ -0,0 +1,82 @@
+import asyncio
+import io
+import os
+import time
+import zipfile
+from collections import deque
+from typing import AsyncIterator
+from .render_pool import RenderQueueFull, render_pool
+
+# Statements submitted to the render pool at once: enough to keep every worker busy
+# while finished ones are zipped, few enough to leave room in its queue for others
+ANNUAL_STATEMENT_CONCURRENCY = int(os.getenv("ANNUAL_STATEMENT_CONCURRENCY", str(render_pool.workers * 2)))
+RENDER_RETRY_SECONDS = 0.25  # Wait before retrying a statement the saturated pool rejected
+
+class _ZipSink(io.RawIOBase):
+    """Unseekable file object collecting what ZipFile writes until it is taken"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer += data
+        return len(data)
+
+    def take(self) -> bytes:
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+def statement_filename(property_data: dict, year: int, extension: str) -> str:
+    return (
+        f"estado_anual_{property_data['villa']}_{property_data['row_letter']}"
+        f"{property_data['number']}_{year}.{extension}"
+    )
+
+async def _render_statement(renderer: str, row: dict, year: int) -> bytes:
+    """Render one statement, waiting for room while other requests fill the pool"""
+    deadline = time.monotonic() + render_pool.timeout_seconds
+    while True:
+        try:
+            return await render_pool.render(renderer, row["property"], year, row["fees"], row["payments"])
+        except RenderQueueFull:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(RENDER_RETRY_SECONDS)
+
+async def stream_annual_statements_zip(rows: AsyncIterator[dict], year: int, format: str = "pdf") -> AsyncIterator[bytes]:
+    """
+    ZIP of one annual statement per row of annual_activity_rows, in row order.
+    Up to ANNUAL_STATEMENT_CONCURRENCY statements render in the pool while the
+    finished ones are written; the archive is sent as it grows.
+    """
+    renderer, extension = (
+        ("annual_property_statement_excel", "xlsx") if format.lower() == "excel"
+        else ("annual_property_statement_pdf", "pdf")
+    )
+    sink = _ZipSink()
+    archive = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED)
+    pending = deque()  # (filename, render task), oldest first
+
+    async def write_oldest():
+        filename, task = pending.popleft()
+        archive.writestr(filename, await task)
+        return sink.take()
+
+    try:
+        async for row in rows:
+            filename = statement_filename(row["property"], year, extension)
+            pending.append((filename, asyncio.ensure_future(_render_statement(renderer, row, year))))
+            if len(pending) >= max(1, ANNUAL_STATEMENT_CONCURRENCY):
+                yield await write_oldest()
+        while pending:
+            yield await write_oldest()
+        archive.close()
+        yield sink.take()
+    finally:
+        # Client went away or a statement failed: drop the statements still rendering
+        for _, task in pending:
+            task.cancel()
@@ -0,0 +1,23 @@
+from datetime import datetime
+from ..config.database import database
+
+# Counter bumped after every write to the data reports are built from (see the
+# middleware in main.py and the scheduler); cached report results are keyed by it
+DATA_VERSIONS = "data_versions"
+REPORT_DATA_ID = "reports"
+
+# Routes whose successful POST/PUT/PATCH/DELETE requests change report data
+REPORT_DATA_PREFIXES = (
+    "/fees", "/fee-schedules", "/payments", "/expenses", "/properties", "/agreements", "/users"
+)
+
+async def bump_data_version():
+    await database[DATA_VERSIONS].update_one(
+        {"_id": REPORT_DATA_ID},
+        {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+async def get_data_version() -> int:
+    doc = await database[DATA_VERSIONS].find_one({"_id": REPORT_DATA_ID}, {"version": 1})
+    return doc["version"] if doc else 0
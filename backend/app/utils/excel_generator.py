@@ -1,9 +1,20 @@
+import asyncio
 import io
+import queue
 from datetime import datetime
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
 
+CURRENCY_FORMAT = '"S/ "#,##0.00'
+
+# Streamed (write-only) reports: size of the chunks sent to the client, how many
+# may wait in memory for a slow client, and rows written per worker thread call
+STREAM_CHUNK_SIZE = 64 * 1024
+STREAM_QUEUE_CHUNKS = 16
+STREAM_BATCH_ROWS = 1000
+
 def generate_property_payment_history_excel(property_data, payments_data, fees_data):
     """
     Generate an Excel report of payment history for a specific property
@@ -112,501 +123,441 @@ def generate_property_payment_history_excel(property_data, payments_data, fees_d
     return buffer
 
 
-def generate_outstanding_fees_excel(fees_data):
+def _report_styles():
     """
-    Generate an Excel report of all outstanding fees
+    Named styles shared by every cell of a streamed report. Each workbook gets its
+    own copies (a NamedStyle is bound to one workbook), registered once.
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Cuotas Pendientes"
-
-    # Title
-    ws['A1'] = "PAGO VECINAL - Cuotas Pendientes - Reporte General"
-    ws['A1'].font = Font(size=16, bold=True)
-    ws.merge_cells('A1:F1')
-
-    if fees_data:
-        headers = ["Propiedad", "Propietario", "Período", "Monto", "Fecha Vencimiento"]
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=3, column=col)
-            cell.value = header
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-
-        for row, fee in enumerate(fees_data, 4):
-            property_str = f"{fee['property_villa']} - {fee['property_row_letter']}{fee['property_number']}"
-            ws.cell(row=row, column=1).value = property_str
-            ws.cell(row=row, column=2).value = fee['property_owner_name']
-            ws.cell(row=row, column=3).value = f"{fee['month']}/{fee['year']}"
-            ws.cell(row=row, column=4).value = float(fee['amount'])
-            ws.cell(row=row, column=4).number_format = '"S/ "#,##0.00'
-            ws.cell(row=row, column=5).value = fee['due_date'].strftime("%d/%m/%Y")
-
-        # Summary
-        row = len(fees_data) + 6
-        total_amount = sum(f['amount'] for f in fees_data)
-        ws[f'A{row}'] = "Total Cuotas Pendientes:"
-        ws[f'A{row}'].font = Font(bold=True)
-        ws[f'B{row}'] = len(fees_data)
-        ws[f'B{row}'].font = Font(bold=True)
-
-        ws[f'A{row+1}'] = "Monto Total Pendiente:"
-        ws[f'A{row+1}'].font = Font(bold=True)
-        ws[f'B{row+1}'] = float(total_amount)
-        ws[f'B{row+1}'].number_format = '"S/ "#,##0.00'
-        ws[f'B{row+1}'].font = Font(bold=True)
-    else:
-        ws['A3'] = "No hay cuotas pendientes."
-
-    # Footer
-    footer_row = len(fees_data) + 9 if fees_data else 5
-    ws[f'A{footer_row}'] = f"Reporte generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}"
-
-    # Auto-adjust column widths
-    for col in range(1, 7):
-        ws.column_dimensions[get_column_letter(col)].width = 18
-
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    return buffer
+    header = NamedStyle(name="report_header", font=Font(bold=True))
+    header.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+    bold_currency = NamedStyle(name="report_bold_currency", font=Font(bold=True))
+    bold_currency.number_format = CURRENCY_FORMAT
+    currency = NamedStyle(name="report_currency")
+    currency.number_format = CURRENCY_FORMAT
+    return [
+        NamedStyle(name="report_title", font=Font(size=16, bold=True)),
+        NamedStyle(name="report_section", font=Font(size=12, bold=True)),
+        header,
+        NamedStyle(name="report_bold", font=Font(bold=True)),
+        currency,
+        bold_currency,
+    ]
 
 
-def generate_monthly_payment_summary_excel(year, month, payments_data):
+class _ReportSheet:
     """
-    Generate an Excel summary of payments for a specific month
+    Write-only worksheet of a streamed report. Rows are appended in order and
+    written straight to a temporary file by openpyxl, so memory does not grow
+    with the number of rows; cells only reference the workbook's named styles.
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = f"Resumen {month:02d}-{year}"
-
-    # Title
-    ws['A1'] = f"PAGO VECINAL - Resumen de Pagos - {month:02d}/{year}"
-    ws['A1'].font = Font(size=16, bold=True)
-    ws.merge_cells('A1:F1')
-
-    if payments_data:
-        headers = ["Propiedad", "Propietario", "Fecha Pago", "Monto", "Estado"]
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=3, column=col)
-            cell.value = header
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-
-        for row, payment in enumerate(payments_data, 4):
-            property_str = f"{payment['property_villa']} - {payment['property_row_letter']}{payment['property_number']}"
-            ws.cell(row=row, column=1).value = property_str
-            ws.cell(row=row, column=2).value = payment['property_owner_name']
-            ws.cell(row=row, column=3).value = payment['payment_date'].strftime("%d/%m/%Y")
-            ws.cell(row=row, column=4).value = float(payment['amount'])
-            ws.cell(row=row, column=4).number_format = '"S/ "#,##0.00'
-            ws.cell(row=row, column=5).value = payment['status']
-
-        # Summary
-        row = len(payments_data) + 6
-        total_payments = len(payments_data)
-        total_amount = sum(p['amount'] for p in payments_data)
-        ws[f'A{row}'] = "Total Pagos:"
-        ws[f'A{row}'].font = Font(bold=True)
-        ws[f'B{row}'] = total_payments
-        ws[f'B{row}'].font = Font(bold=True)
-
-        ws[f'A{row+1}'] = "Monto Total Recaudado:"
-        ws[f'A{row+1}'].font = Font(bold=True)
-        ws[f'B{row+1}'] = float(total_amount)
-        ws[f'B{row+1}'].number_format = '"S/ "#,##0.00'
-        ws[f'B{row+1}'].font = Font(bold=True)
-    else:
-        ws['A3'] = "No hay pagos registrados para este período."
-
-    # Footer
-    footer_row = len(payments_data) + 9 if payments_data else 5
-    ws[f'A{footer_row}'] = f"Reporte generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}"
 
-    # Auto-adjust column widths
-    for col in range(1, 7):
-        ws.column_dimensions[get_column_letter(col)].width = 18
-
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    return buffer
-
-
-def generate_expenses_excel(expenses_data):
+    def __init__(self, sheet_title, widths):
+        self.workbook = Workbook(write_only=True)
+        for style in _report_styles():
+            self.workbook.add_named_style(style)
+        self.ws = self.workbook.create_sheet(sheet_title)
+        for col, width in enumerate(widths, 1):
+            self.ws.column_dimensions[get_column_letter(col)].width = width
+        self.last_column = get_column_letter(len(widths))
+        self.row_count = 0
+
+    def cell(self, value, style=None):
+        cell = WriteOnlyCell(self.ws, value=value)
+        if style:
+            cell.style = style
+        return cell
+
+    def append(self, *cells):
+        """Append one row; each cell is a value or a (value, named style) pair"""
+        self.ws.append([self.cell(*cell) if isinstance(cell, tuple) else cell for cell in cells])
+        self.row_count += 1
+
+    def blank(self, count=1):
+        for _ in range(count):
+            self.append()
+
+    def section(self, text, style="report_section"):
+        """A title row spanning every column"""
+        self.ws.merged_cells.add(f"A{self.row_count + 1}:{self.last_column}{self.row_count + 1}")
+        self.append((text, style))
+
+    def header(self, headers):
+        self.append(*[(header, "report_header") for header in headers])
+
+    def summary(self, label, value, style="report_bold"):
+        self.append((label, "report_bold"), (value, style))
+
+    def footer(self):
+        self.blank(2)
+        self.append(f"Reporte generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}")
+
+    async def rows(self, rows, headers, to_cells, empty_text):
+        """
+        Write the data rows of an async row iterator under `headers` (written with
+        the first row), or `empty_text` when there are none. Rows are converted and
+        written in batches of STREAM_BATCH_ROWS in a worker thread, so the event loop
+        keeps serving while a large sheet is built. Returns the number of rows.
+        """
+        def write(batch):
+            for row in batch:
+                self.append(*to_cells(row))
+
+        count = 0
+        batch = []
+        async for row in rows:
+            if not count:
+                self.header(headers)
+            batch.append(row)
+            count += 1
+            if len(batch) >= STREAM_BATCH_ROWS:
+                await asyncio.to_thread(write, batch)
+                batch = []
+        if batch:
+            await asyncio.to_thread(write, batch)
+        if not count:
+            self.append(empty_text)
+        return count
+
+    async def stream(self):
+        """Save the workbook and yield the .xlsx bytes in chunks as they are written"""
+        async for chunk in _stream_workbook(self.workbook):
+            yield chunk
+
+
+class _ChunkWriter(io.RawIOBase):
     """
-    Generate an Excel report of all administrative expenses
+    Unseekable file object for ZipFile (which then writes data descriptors instead
+    of seeking back): bytes are handed to the event loop in STREAM_CHUNK_SIZE
+    chunks through a bounded queue, so a slow client throttles the writer.
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Gastos Administrativos"
 
-    # Title
-    ws['A1'] = "PAGO VECINAL - Reporte de Gastos Administrativos"
-    ws['A1'].font = Font(size=16, bold=True)
-    ws.merge_cells('A1:I1')
-
-    if expenses_data:
-        headers = ["Fecha Gasto", "Tipo", "Beneficiario", "Detalles Beneficiario", "Monto", "Estado", "Descripción", "Notas", "Creado Por"]
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=3, column=col)
-            cell.value = header
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-
-        for row, expense in enumerate(expenses_data, 4):
-            ws.cell(row=row, column=1).value = expense['expense_date'].strftime("%d/%m/%Y")
-            ws.cell(row=row, column=2).value = expense['expense_type']
-            ws.cell(row=row, column=3).value = expense['beneficiary']
-            ws.cell(row=row, column=4).value = expense.get('beneficiary_details', '')
-            ws.cell(row=row, column=5).value = float(expense['amount'])
-            ws.cell(row=row, column=5).number_format = '"S/ "#,##0.00'
-            ws.cell(row=row, column=6).value = expense['status']
-            ws.cell(row=row, column=7).value = expense['description']
-            ws.cell(row=row, column=8).value = expense.get('notes', '')
-            ws.cell(row=row, column=9).value = expense.get('created_by', 'N/A')
-
-        # Summary section
-        summary_row = len(expenses_data) + 6
-        ws[f'A{summary_row}'] = "Resumen del Reporte"
-        ws[f'A{summary_row}'].font = Font(size=12, bold=True)
-        ws.merge_cells(f'A{summary_row}:I{summary_row}')
-
-        # Calculate totals by status and type
-        status_counts = {}
-        type_totals = {}
-        total_amount = 0
-
-        for expense in expenses_data:
-            status = expense['status']
-            expense_type = expense['expense_type']
-            amount = expense['amount']
-
-            if status not in status_counts:
-                status_counts[status] = 0
-            status_counts[status] += 1
-
-            if expense_type not in type_totals:
-                type_totals[expense_type] = 0
-            type_totals[expense_type] += amount
-
-            total_amount += amount
-
-        # Display status summary
-        current_row = summary_row + 2
-        for status, count in status_counts.items():
-            ws[f'A{current_row}'] = f"Gastos {status.title()}:"
-            ws[f'A{current_row}'].font = Font(bold=True)
-            ws[f'B{current_row}'] = count
-            current_row += 1
-
-        # Display type totals
-        current_row += 1
-        ws[f'A{current_row}'] = "Totales por Tipo:"
-        ws[f'A{current_row}'].font = Font(size=11, bold=True)
-        ws.merge_cells(f'A{current_row}:B{current_row}')
-
-        current_row += 1
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.buffer = bytearray()
+        self.cancelled = False
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if self.cancelled:
+            raise OSError("Report download cancelled")
+        self.buffer += data
+        if len(self.buffer) >= STREAM_CHUNK_SIZE:
+            self.push()
+        return len(data)
+
+    def push(self):
+        if self.buffer:
+            self.chunks.put(bytes(self.buffer))
+            self.buffer.clear()
+
+
+async def _stream_workbook(wb):
+    """Save a workbook in a worker thread, yielding its bytes while they are produced"""
+    chunks = queue.Queue(maxsize=STREAM_QUEUE_CHUNKS)
+    writer = _ChunkWriter(chunks)
+
+    def save():
+        try:
+            wb.save(writer)
+            writer.push()
+        finally:
+            chunks.put(None)
+
+    saving = asyncio.ensure_future(asyncio.to_thread(save))
+    try:
+        while True:
+            chunk = await asyncio.to_thread(chunks.get)
+            if chunk is None:
+                break
+            yield chunk
+        await saving
+    finally:
+        if not saving.done():
+            # Client went away: stop the writer and unblock it until it exits
+            writer.cancelled = True
+            while not saving.done():
+                try:
+                    chunks.get_nowait()
+                except queue.Empty:
+                    await asyncio.sleep(0.01)
+            saving.exception()
+
+
+def _property_label(row):
+    return f"{row['property_villa']} - {row['property_row_letter']}{row['property_number']}"
+
+
+async def stream_outstanding_fees_excel(fees_rows):
+    """
+    Stream an Excel report of all outstanding fees
+    """
+    sheet = _ReportSheet("Cuotas Pendientes", [18] * 6)
+    sheet.section("PAGO VECINAL - Cuotas Pendientes - Reporte General", "report_title")
+    sheet.blank()
+
+    total_amount = 0.0
+
+    def to_cells(fee):
+        nonlocal total_amount
+        total_amount += fee['amount']
+        return (
+            _property_label(fee),
+            fee['property_owner_name'],
+            f"{fee['month']}/{fee['year']}",
+            (float(fee['amount']), "report_currency"),
+            fee['due_date'].strftime("%d/%m/%Y"),
+        )
+
+    count = await sheet.rows(
+        fees_rows, ["Propiedad", "Propietario", "Período", "Monto", "Fecha Vencimiento"],
+        to_cells, "No hay cuotas pendientes."
+    )
+    if count:
+        sheet.blank(2)
+        sheet.summary("Total Cuotas Pendientes:", count)
+        sheet.summary("Monto Total Pendiente:", float(total_amount), "report_bold_currency")
+
+    sheet.footer()
+    async for chunk in sheet.stream():
+        yield chunk
+
+
+async def stream_monthly_payment_summary_excel(year, month, payments_rows):
+    """
+    Stream an Excel summary of payments for a specific month
+    """
+    sheet = _ReportSheet(f"Resumen {month:02d}-{year}", [18] * 6)
+    sheet.section(f"PAGO VECINAL - Resumen de Pagos - {month:02d}/{year}", "report_title")
+    sheet.blank()
+
+    total_amount = 0.0
+
+    def to_cells(payment):
+        nonlocal total_amount
+        total_amount += payment['amount']
+        return (
+            _property_label(payment),
+            payment['property_owner_name'],
+            payment['payment_date'].strftime("%d/%m/%Y"),
+            (float(payment['amount']), "report_currency"),
+            payment['status'],
+        )
+
+    count = await sheet.rows(
+        payments_rows, ["Propiedad", "Propietario", "Fecha Pago", "Monto", "Estado"],
+        to_cells, "No hay pagos registrados para este período."
+    )
+    if count:
+        sheet.blank(2)
+        sheet.summary("Total Pagos:", count)
+        sheet.summary("Monto Total Recaudado:", float(total_amount), "report_bold_currency")
+
+    sheet.footer()
+    async for chunk in sheet.stream():
+        yield chunk
+
+
+async def stream_expenses_excel(expenses_rows):
+    """
+    Stream an Excel report of all administrative expenses
+    """
+    sheet = _ReportSheet("Gastos Administrativos", [18] * 9)
+    sheet.section("PAGO VECINAL - Reporte de Gastos Administrativos", "report_title")
+    sheet.blank()
+
+    status_counts = {}
+    type_totals = {}
+    total_amount = 0.0
+
+    def to_cells(expense):
+        nonlocal total_amount
+        status_counts[expense['status']] = status_counts.get(expense['status'], 0) + 1
+        type_totals[expense['expense_type']] = type_totals.get(expense['expense_type'], 0) + expense['amount']
+        total_amount += expense['amount']
+        return (
+            expense['expense_date'].strftime("%d/%m/%Y"),
+            expense['expense_type'],
+            expense['beneficiary'],
+            expense.get('beneficiary_details', ''),
+            (float(expense['amount']), "report_currency"),
+            expense['status'],
+            expense['description'],
+            expense.get('notes', ''),
+            expense.get('created_by', 'N/A'),
+        )
+
+    count = await sheet.rows(
+        expenses_rows,
+        ["Fecha Gasto", "Tipo", "Beneficiario", "Detalles Beneficiario", "Monto", "Estado", "Descripción", "Notas", "Creado Por"],
+        to_cells, "No hay gastos administrativos registrados."
+    )
+    if count:
+        sheet.blank(2)
+        sheet.section("Resumen del Reporte")
+        sheet.blank()
+        for status, status_count in status_counts.items():
+            sheet.summary(f"Gastos {status.title()}:", status_count)
+
+        sheet.blank()
+        sheet.append(("Totales por Tipo:", "report_bold"))
         for expense_type, amount in type_totals.items():
-            ws[f'A{current_row}'] = f"{expense_type.title()}:"
-            ws[f'A{current_row}'].font = Font(bold=True)
-            ws[f'B{current_row}'] = float(amount)
-            ws[f'B{current_row}'].number_format = '"S/ "#,##0.00'
-            current_row += 1
-
-        # Total summary
-        ws[f'A{current_row}'] = "Total Gastos:"
-        ws[f'A{current_row}'].font = Font(bold=True)
-        ws[f'B{current_row}'] = len(expenses_data)
-        ws[f'B{current_row}'].font = Font(bold=True)
-
-        ws[f'A{current_row+1}'] = "Monto Total:"
-        ws[f'A{current_row+1}'].font = Font(bold=True)
-        ws[f'B{current_row+1}'] = float(total_amount)
-        ws[f'B{current_row+1}'].number_format = '"S/ "#,##0.00'
-        ws[f'B{current_row+1}'].font = Font(bold=True)
-    else:
-        ws['A3'] = "No hay gastos administrativos registrados."
-
-    # Footer
-    footer_row = len(expenses_data) + 20 if expenses_data else 5
-    ws[f'A{footer_row}'] = f"Reporte generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+            sheet.append((f"{expense_type.title()}:", "report_bold"), (float(amount), "report_currency"))
 
-    # Auto-adjust column widths
-    for col in range(1, 10):
-        ws.column_dimensions[get_column_letter(col)].width = 18
+        sheet.summary("Total Gastos:", count)
+        sheet.summary("Monto Total:", float(total_amount), "report_bold_currency")
 
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    return buffer
+    sheet.footer()
+    async for chunk in sheet.stream():
+        yield chunk
 
 
-def generate_all_payments_excel(payments_data):
+async def stream_all_payments_excel(payments_rows):
     """
-    Generate an Excel report of all payments
+    Stream an Excel report of all payments
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Todos los Pagos"
-
-    # Title
-    ws['A1'] = "PAGO VECINAL - Reporte General de Pagos"
-    ws['A1'].font = Font(size=16, bold=True)
-    ws.merge_cells('A1:H1')
-
-    if payments_data:
-        headers = ["Fecha Pago", "Propiedad", "Propietario", "Monto", "Estado", "Referencia", "Notas"]
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=3, column=col)
-            cell.value = header
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-
-        for row, payment in enumerate(payments_data, 4):
-            property_str = f"{payment['property_villa']} - {payment['property_row_letter']}{payment['property_number']}"
-            ws.cell(row=row, column=1).value = payment['payment_date'].strftime("%d/%m/%Y %H:%M")
-            ws.cell(row=row, column=2).value = property_str
-            ws.cell(row=row, column=3).value = payment['property_owner_name']
-            ws.cell(row=row, column=4).value = float(payment['amount'])
-            ws.cell(row=row, column=4).number_format = '"S/ "#,##0.00'
-            ws.cell(row=row, column=5).value = payment['status']
-            ws.cell(row=row, column=6).value = payment.get('fee_reference', 'N/A')
-            ws.cell(row=row, column=7).value = payment.get('notes', '')
-
-        # Summary
-        summary_row = len(payments_data) + 6
-        total_payments = len(payments_data)
-        total_amount = sum(p['amount'] for p in payments_data)
-
-        # Status breakdown
-        status_counts = {}
-        for payment in payments_data:
-            status = payment['status']
-            if status not in status_counts:
-                status_counts[status] = 0
-            status_counts[status] += 1
-
-        ws[f'A{summary_row}'] = "Resumen General"
-        ws[f'A{summary_row}'].font = Font(size=12, bold=True)
-        ws.merge_cells(f'A{summary_row}:H{summary_row}')
-
-        current_row = summary_row + 2
-        ws[f'A{current_row}'] = "Total Pagos:"
-        ws[f'A{current_row}'].font = Font(bold=True)
-        ws[f'B{current_row}'] = total_payments
-        ws[f'B{current_row}'].font = Font(bold=True)
-
-        ws[f'A{current_row+1}'] = "Monto Total:"
-        ws[f'A{current_row+1}'].font = Font(bold=True)
-        ws[f'B{current_row+1}'] = float(total_amount)
-        ws[f'B{current_row+1}'].number_format = '"S/ "#,##0.00'
-        ws[f'B{current_row+1}'].font = Font(bold=True)
-
-        # Status breakdown
-        current_row += 3
-        for status, count in status_counts.items():
-            ws[f'A{current_row}'] = f"Pagos {status.title()}:"
-            ws[f'A{current_row}'].font = Font(bold=True)
-            ws[f'B{current_row}'] = count
-            current_row += 1
-    else:
-        ws['A3'] = "No hay pagos registrados."
-
-    # Footer
-    footer_row = len(payments_data) + 15 if payments_data else 5
-    ws[f'A{footer_row}'] = f"Reporte generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}"
-
-    # Auto-adjust column widths
-    for col in range(1, 9):
-        ws.column_dimensions[get_column_letter(col)].width = 18
-
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    return buffer
-
-
-def generate_monthly_fees_excel(fees_data, start_year, start_month, end_year, end_month):
+    sheet = _ReportSheet("Todos los Pagos", [18] * 8)
+    sheet.section("PAGO VECINAL - Reporte General de Pagos", "report_title")
+    sheet.blank()
+
+    status_counts = {}
+    total_amount = 0.0
+
+    def to_cells(payment):
+        nonlocal total_amount
+        status_counts[payment['status']] = status_counts.get(payment['status'], 0) + 1
+        total_amount += payment['amount']
+        return (
+            payment['payment_date'].strftime("%d/%m/%Y %H:%M"),
+            _property_label(payment),
+            payment['property_owner_name'],
+            (float(payment['amount']), "report_currency"),
+            payment['status'],
+            payment.get('fee_reference', 'N/A'),
+            payment.get('notes', ''),
+        )
+
+    count = await sheet.rows(
+        payments_rows, ["Fecha Pago", "Propiedad", "Propietario", "Monto", "Estado", "Referencia", "Notas"],
+        to_cells, "No hay pagos registrados."
+    )
+    if count:
+        sheet.blank(2)
+        sheet.section("Resumen General")
+        sheet.blank()
+        sheet.summary("Total Pagos:", count)
+        sheet.summary("Monto Total:", float(total_amount), "report_bold_currency")
+
+        sheet.blank()
+        for status, status_count in status_counts.items():
+            sheet.append((f"Pagos {status.title()}:", "report_bold"), status_count)
+
+    sheet.footer()
+    async for chunk in sheet.stream():
+        yield chunk
+
+
+async def stream_monthly_fees_excel(fees_rows, start_year, start_month, end_year, end_month):
     """
-    Generate an Excel report of monthly fees for a specific period range
+    Stream an Excel report of monthly fees for a specific period range
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Cuotas Mensuales"
-
-    # Title
-    ws['A1'] = "PAGO VECINAL - Reporte de Cuotas Mensuales"
-    ws['A1'].font = Font(size=16, bold=True)
-    ws.merge_cells('A1:F1')
-
-    # Period information
-    period_text = f"Período: {start_month:02d}/{start_year} - {end_month:02d}/{end_year}"
-    ws['A3'] = period_text
-    ws['A3'].font = Font(size=12, bold=True)
-    ws.merge_cells('A3:F3')
-
-    if fees_data:
-        # Headers
-        headers = ["Propiedad", "Propietario", "Período", "Monto", "Estado", "Fecha Vencimiento"]
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=5, column=col)
-            cell.value = header
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-
-        # Data rows
-        for row, fee in enumerate(fees_data, 6):
-            property_str = f"{fee['property_villa']} - {fee['property_row_letter']}{fee['property_number']}"
-            ws.cell(row=row, column=1).value = property_str
-            ws.cell(row=row, column=2).value = fee['property_owner_name']
-            ws.cell(row=row, column=3).value = f"{fee['month']:02d}/{fee['year']}"
-            ws.cell(row=row, column=4).value = float(fee['amount'])
-            ws.cell(row=row, column=4).number_format = '"S/ "#,##0.00'
-            ws.cell(row=row, column=5).value = fee['status']
-            ws.cell(row=row, column=6).value = fee['due_date'].strftime("%d/%m/%Y")
-
-        # Summary section
-        summary_row = len(fees_data) + 8
-        ws[f'A{summary_row}'] = "Resumen del Reporte"
-        ws[f'A{summary_row}'].font = Font(size=12, bold=True)
-        ws.merge_cells(f'A{summary_row}:F{summary_row}')
-
-        # Calculate totals by status
-        status_counts = {}
-        total_amount = 0
-        for fee in fees_data:
-            status = fee['status']
-            if status not in status_counts:
-                status_counts[status] = {'count': 0, 'amount': 0}
-            status_counts[status]['count'] += 1
-            status_counts[status]['amount'] += fee['amount']
-            total_amount += fee['amount']
-
-        # Display status summary
-        current_row = summary_row + 2
-        for status, data in status_counts.items():
-            ws[f'A{current_row}'] = f"Cuotas {status.title()}:"
-            ws[f'A{current_row}'].font = Font(bold=True)
-            ws[f'B{current_row}'] = data['count']
-            ws[f'C{current_row}'] = float(data['amount'])
-            ws[f'C{current_row}'].number_format = '"S/ "#,##0.00'
-            current_row += 1
-
-        # Total summary
-        ws[f'A{current_row}'] = "Total Cuotas:"
-        ws[f'A{current_row}'].font = Font(bold=True)
-        ws[f'B{current_row}'] = len(fees_data)
-        ws[f'B{current_row}'].font = Font(bold=True)
-
-        ws[f'A{current_row+1}'] = "Monto Total:"
-        ws[f'A{current_row+1}'].font = Font(bold=True)
-        ws[f'B{current_row+1}'] = float(total_amount)
-        ws[f'B{current_row+1}'].number_format = '"S/ "#,##0.00'
-        ws[f'B{current_row+1}'].font = Font(bold=True)
-    else:
-        ws['A5'] = "No hay cuotas registradas para el período especificado."
-
-    # Footer
-    footer_row = len(fees_data) + 12 if fees_data else 7
-    ws[f'A{footer_row}'] = f"Reporte generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}"
-
-    # Auto-adjust column widths
-    for col in range(1, 7):
-        ws.column_dimensions[get_column_letter(col)].width = 18
-
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    return buffer
-
-
-def generate_filtered_fees_excel(fees_data):
+    sheet = _ReportSheet("Cuotas Mensuales", [18] * 6)
+    sheet.section("PAGO VECINAL - Reporte de Cuotas Mensuales", "report_title")
+    sheet.blank()
+    sheet.section(f"Período: {start_month:02d}/{start_year} - {end_month:02d}/{end_year}")
+    sheet.blank()
+
+    status_totals = {}
+    total_amount = 0.0
+
+    def to_cells(fee):
+        nonlocal total_amount
+        totals = status_totals.setdefault(fee['status'], {'count': 0, 'amount': 0})
+        totals['count'] += 1
+        totals['amount'] += fee['amount']
+        total_amount += fee['amount']
+        return (
+            _property_label(fee),
+            fee['property_owner_name'],
+            f"{fee['month']:02d}/{fee['year']}",
+            (float(fee['amount']), "report_currency"),
+            fee['status'],
+            fee['due_date'].strftime("%d/%m/%Y"),
+        )
+
+    count = await sheet.rows(
+        fees_rows, ["Propiedad", "Propietario", "Período", "Monto", "Estado", "Fecha Vencimiento"],
+        to_cells, "No hay cuotas registradas para el período especificado."
+    )
+    if count:
+        sheet.blank(2)
+        sheet.section("Resumen del Reporte")
+        sheet.blank()
+        for status, totals in status_totals.items():
+            sheet.append(
+                (f"Cuotas {status.title()}:", "report_bold"),
+                totals['count'],
+                (float(totals['amount']), "report_currency")
+            )
+
+        sheet.summary("Total Cuotas:", count)
+        sheet.summary("Monto Total:", float(total_amount), "report_bold_currency")
+
+    sheet.footer()
+    async for chunk in sheet.stream():
+        yield chunk
+
+
+async def stream_filtered_fees_excel(fees_rows):
     """
-    Generate an Excel report of fees based on applied filters
+    Stream an Excel report of fees based on applied filters
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Cuotas Filtradas"
-
-    # Title
-    ws['A1'] = "PAGO VECINAL - Reporte de Cuotas Filtradas"
-    ws['A1'].font = Font(size=16, bold=True)
-    ws.merge_cells('A1:J1')
-
-    if fees_data:
-        headers = ["Propiedad", "Propietario", "Monto Total", "Monto Pagado", "Monto Pendiente", "Año", "Mes", "Fecha Vencimiento", "Estado", "Notas"]
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=3, column=col)
-            cell.value = header
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-
-        for row, fee in enumerate(fees_data, 4):
-            property_str = f"{fee['property_villa']} - {fee['property_row_letter']}{fee['property_number']}"
-            ws.cell(row=row, column=1).value = property_str
-            ws.cell(row=row, column=2).value = fee['property_owner_name']
-            ws.cell(row=row, column=3).value = float(fee['amount'])
-            ws.cell(row=row, column=3).number_format = '"S/ "#,##0.00'
-            ws.cell(row=row, column=4).value = float(fee.get('paid_amount', 0))
-            ws.cell(row=row, column=4).number_format = '"S/ "#,##0.00'
-            ws.cell(row=row, column=5).value = float(fee.get('remaining_amount', fee['amount']))
-            ws.cell(row=row, column=5).number_format = '"S/ "#,##0.00'
-            ws.cell(row=row, column=6).value = fee['year']
-            ws.cell(row=row, column=7).value = fee['month']
-            ws.cell(row=row, column=8).value = fee['due_date'].strftime("%d/%m/%Y")
-            ws.cell(row=row, column=9).value = fee['status']
-            ws.cell(row=row, column=10).value = fee.get('notes', '')
-
-        # Summary section
-        summary_row = len(fees_data) + 6
-        ws[f'A{summary_row}'] = "Resumen del Reporte"
-        ws[f'A{summary_row}'].font = Font(size=12, bold=True)
-        ws.merge_cells(f'A{summary_row}:J{summary_row}')
-
-        # Calculate totals
-        total_amount = sum(f['amount'] for f in fees_data)
-        total_paid = sum(f.get('paid_amount', 0) for f in fees_data)
-        total_remaining = sum(f.get('remaining_amount', f['amount']) for f in fees_data)
-
-        current_row = summary_row + 2
-        ws[f'A{current_row}'] = "Total Cuotas:"
-        ws[f'A{current_row}'].font = Font(bold=True)
-        ws[f'B{current_row}'] = len(fees_data)
-        ws[f'B{current_row}'].font = Font(bold=True)
-
-        ws[f'A{current_row+1}'] = "Monto Total:"
-        ws[f'A{current_row+1}'].font = Font(bold=True)
-        ws[f'B{current_row+1}'] = float(total_amount)
-        ws[f'B{current_row+1}'].number_format = '"S/ "#,##0.00'
-        ws[f'B{current_row+1}'].font = Font(bold=True)
-
-        ws[f'A{current_row+2}'] = "Total Pagado:"
-        ws[f'A{current_row+2}'].font = Font(bold=True)
-        ws[f'B{current_row+2}'] = float(total_paid)
-        ws[f'B{current_row+2}'].number_format = '"S/ "#,##0.00'
-        ws[f'B{current_row+2}'].font = Font(bold=True)
-
-        ws[f'A{current_row+3}'] = "Total Pendiente:"
-        ws[f'A{current_row+3}'].font = Font(bold=True)
-        ws[f'B{current_row+3}'] = float(total_remaining)
-        ws[f'B{current_row+3}'].number_format = '"S/ "#,##0.00'
-        ws[f'B{current_row+3}'].font = Font(bold=True)
-    else:
-        ws['A3'] = "No hay cuotas que coincidan con los filtros aplicados."
-
-    # Footer
-    footer_row = len(fees_data) + 12 if fees_data else 5
-    ws[f'A{footer_row}'] = f"Reporte generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}"
-
-    # Auto-adjust column widths
-    for col in range(1, 11):
-        ws.column_dimensions[get_column_letter(col)].width = 18
-
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    return buffer
+    sheet = _ReportSheet("Cuotas Filtradas", [18] * 10)
+    sheet.section("PAGO VECINAL - Reporte de Cuotas Filtradas", "report_title")
+    sheet.blank()
+
+    total_amount = 0.0
+    total_paid = 0.0
+    total_remaining = 0.0
+
+    def to_cells(fee):
+        nonlocal total_amount, total_paid, total_remaining
+        paid_amount = fee.get('paid_amount', 0)
+        remaining_amount = fee.get('remaining_amount', fee['amount'])
+        total_amount += fee['amount']
+        total_paid += paid_amount
+        total_remaining += remaining_amount
+        return (
+            _property_label(fee),
+            fee['property_owner_name'],
+            (float(fee['amount']), "report_currency"),
+            (float(paid_amount), "report_currency"),
+            (float(remaining_amount), "report_currency"),
+            fee['year'],
+            fee['month'],
+            fee['due_date'].strftime("%d/%m/%Y"),
+            fee['status'],
+            fee.get('notes', ''),
+        )
+
+    count = await sheet.rows(
+        fees_rows,
+        ["Propiedad", "Propietario", "Monto Total", "Monto Pagado", "Monto Pendiente", "Año", "Mes", "Fecha Vencimiento", "Estado", "Notas"],
+        to_cells, "No hay cuotas que coincidan con los filtros aplicados."
+    )
+    if count:
+        sheet.blank(2)
+        sheet.section("Resumen del Reporte")
+        sheet.blank()
+        sheet.summary("Total Cuotas:", count)
+        sheet.summary("Monto Total:", float(total_amount), "report_bold_currency")
+        sheet.summary("Total Pagado:", float(total_paid), "report_bold_currency")
+        sheet.summary("Total Pendiente:", float(total_remaining), "report_bold_currency")
+
+    sheet.footer()
+    async for chunk in sheet.stream():
+        yield chunk
 
 
 def generate_annual_property_statement_excel(property_data, year, fees_data, payments_data):
@@ -716,4 +667,78 @@ def generate_annual_property_statement_excel(property_data, year, fees_data, pay
     buffer = io.BytesIO()
     wb.save(buffer)
     buffer.seek(0)
-    return buffer
\ No newline at end of file
+    return buffer
+
+def generate_fee_aging_excel(report):
+    """
+    Generate an Excel aging report of the outstanding balance, with the top debtors
+    """
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Antigüedad de Deuda"
+
+    bucket_keys = [bucket['key'] for bucket in report['buckets']]
+    headers = ["Grupo", "Cuotas"] + [bucket['label'] for bucket in report['buckets']] + ["Total"]
+    last_column = get_column_letter(len(headers))
+
+    # Title
+    ws['A1'] = "PAGO VECINAL - Antigüedad de Deuda"
+    ws['A1'].font = Font(size=16, bold=True)
+    ws.merge_cells(f'A1:{last_column}1')
+    ws['A2'] = f"Al {report['as_of'].strftime('%d/%m/%Y')}"
+
+    def write_table(start_row, title, rows, first_header):
+        ws[f'A{start_row}'] = title
+        ws[f'A{start_row}'].font = Font(size=12, bold=True)
+
+        for col, header in enumerate([first_header] + headers[1:], 1):
+            cell = ws.cell(row=start_row + 1, column=col)
+            cell.value = header
+            cell.font = Font(bold=True)
+            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+
+        row = start_row + 2
+        for item in rows:
+            label = item['label']
+            if item.get('owner_name'):
+                label = f"{label} ({item['owner_name']})"
+            ws.cell(row=row, column=1).value = label
+            ws.cell(row=row, column=2).value = item['fee_count']
+            for col, key in enumerate(bucket_keys + ['total'], 3):
+                ws.cell(row=row, column=col).value = float(item[key])
+                ws.cell(row=row, column=col).number_format = '"S/ "#,##0.00'
+            row += 1
+        return row
+
+    group_titles = {"property": "Propiedad", "row": "Fila", "villa": "Villa"}
+
+    if report['groups']:
+        row = write_table(4, "Detalle", report['groups'], group_titles.get(report['group_by'], "Grupo"))
+
+        # Totals
+        totals = report['totals']
+        ws.cell(row=row, column=1).value = "Total"
+        ws.cell(row=row, column=2).value = totals['fee_count']
+        for col, key in enumerate(bucket_keys + ['total'], 3):
+            ws.cell(row=row, column=col).value = float(totals[key])
+            ws.cell(row=row, column=col).number_format = '"S/ "#,##0.00'
+        for col in range(1, len(headers) + 1):
+            ws.cell(row=row, column=col).font = Font(bold=True)
+
+        row = write_table(row + 2, f"Principales Deudores (Top {len(report['top_debtors'])})", report['top_debtors'], "Propiedad")
+    else:
+        ws['A4'] = "No hay cuotas vencidas pendientes de pago."
+        row = 4
+
+    # Footer
+    ws[f'A{row + 2}'] = f"Reporte generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+
+    # Auto-adjust column widths
+    ws.column_dimensions['A'].width = 36
+    for col in range(2, len(headers) + 1):
+        ws.column_dimensions[get_column_letter(col)].width = 16
+
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,113 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from beanie import PydanticObjectId
+from pymongo import UpdateOne
+from ..models.fee import FeeStatus
+from ..models.payment import PaymentStatus
+from ..config.database import database
+
+RECONCILE_BATCH_SIZE = 1000
+
+def overdue_cutoff(now: Optional[datetime] = None) -> datetime:
+    """Unpaid fees and installments due before this moment (start of today, UTC) are overdue"""
+    now = now or datetime.utcnow()
+    return datetime(now.year, now.month, now.day)
+
+def _derive_status_stage() -> dict:
+    """
+    Fee status as a function of paid_amount, evaluated by the server inside the update.
+    Fees under an agreement keep their status: they are settled through installments.
+    """
+    return {"$set": {"status": {"$switch": {
+        "branches": [
+            {"case": {"$eq": ["$status", FeeStatus.AGREEMENT.value]}, "then": "$status"},
+            {"case": {"$gte": ["$paid_amount", "$amount"]}, "then": FeeStatus.COMPLETED.value},
+            {"case": {"$gt": ["$paid_amount", 0]}, "then": FeeStatus.PARTIALLY_PAID.value},
+            {"case": {"$lt": ["$due_date", overdue_cutoff()]}, "then": FeeStatus.OVERDUE.value},
+        ],
+        "default": FeeStatus.PENDING.value
+    }}}}
+
+def derive_fee_status(paid_amount: float, amount: float, due_date: Optional[datetime] = None) -> FeeStatus:
+    """Same rule as _derive_status_stage, for fees already loaded in memory"""
+    if paid_amount >= amount:
+        return FeeStatus.COMPLETED
+    if paid_amount > 0:
+        return FeeStatus.PARTIALLY_PAID
+    if due_date and due_date < overdue_cutoff():
+        return FeeStatus.OVERDUE
+    return FeeStatus.PENDING
+
+def _apply_delta_update(delta: float) -> list:
+    return [
+        # Rounded like the amounts themselves, so reversals leave no float residue
+        {"$set": {"paid_amount": {"$round": [{"$add": [{"$ifNull": ["$paid_amount", 0]}, delta]}, 2]}}},
+        _derive_status_stage()
+    ]
+
+def _set_total_update(total: float) -> list:
+    return [{"$set": {"paid_amount": total}}, _derive_status_stage()]
+
+async def apply_payment_to_fee(fee_id: str, delta: float, session=None):
+    """
+    Add `delta` (negative to take an approval back) to the fee's paid_amount and
+    derive its status in the same single-document update, so concurrent
+    approvals of the same fee cannot overwrite each other.
+    """
+    if not delta:
+        return
+    await database.fees.update_one({"_id": PydanticObjectId(fee_id)}, _apply_delta_update(delta), session=session)
+
+async def apply_payments_to_fees(deltas: Dict[str, float], session=None):
+    """apply_payment_to_fee for many fees in one bulk write (fee id -> delta)"""
+    operations = [
+        UpdateOne({"_id": PydanticObjectId(fee_id)}, _apply_delta_update(delta))
+        for fee_id, delta in deltas.items() if delta
+    ]
+    if operations:
+        await database.fees.bulk_write(operations, ordered=False, session=session)
+
+async def reconcile_fee_balances(fee_ids: Optional[List[str]] = None) -> dict:
+    """
+    Repair mode: recompute paid_amount and status from the approved payments.
+    Checks the given fees, or every fee when `fee_ids` is None, and rewrites
+    only those that drifted.
+    """
+    payment_match = {"status": PaymentStatus.APPROVED.value}
+    fee_filter = {}
+    if fee_ids is not None:
+        payment_match["fee_id"] = {"$in": fee_ids}
+        fee_filter["_id"] = {"$in": [PydanticObjectId(fee_id) for fee_id in fee_ids]}
+
+    totals = {
+        row["_id"]: row["total"]
+        async for row in database.payments.aggregate([
+            {"$match": payment_match},
+            {"$group": {"_id": "$fee_id", "total": {"$sum": "$amount"}}}
+        ])
+    }
+
+    checked = 0
+    repaired = 0
+    operations = []
+    projection = {"amount": 1, "paid_amount": 1, "status": 1, "due_date": 1}
+    async for fee in database.fees.find(fee_filter, projection):
+        checked += 1
+        total = round(totals.get(str(fee["_id"]), 0.0), 2)
+        if fee.get("status") == FeeStatus.AGREEMENT.value:
+            expected_status = FeeStatus.AGREEMENT
+        else:
+            expected_status = derive_fee_status(total, fee["amount"], fee.get("due_date"))
+        if abs(fee.get("paid_amount", 0.0) - total) > 1e-9 or fee.get("status") != expected_status.value:
+            operations.append(UpdateOne({"_id": fee["_id"]}, _set_total_update(total)))
+
+        if len(operations) >= RECONCILE_BATCH_SIZE:
+            await database.fees.bulk_write(operations, ordered=False)
+            repaired += len(operations)
+            operations = []
+
+    if operations:
+        await database.fees.bulk_write(operations, ordered=False)
+        repaired += len(operations)
+
+    return {"checked": checked, "repaired": repaired}
@@ -0,0 +1,138 @@
+import calendar
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional
+from bson import DBRef, ObjectId
+from pymongo.errors import BulkWriteError
+from ..models.fee import FeeSchedule, FeeStatus
+from ..models.property import Property
+from ..models.ledger import LedgerEntryType
+from ..config.database import database
+from .ledger import ledger_movement, post_to_ledger
+
+FEE_INSERT_BATCH_SIZE = 5000
+DUPLICATE_KEY_ERROR = 11000
+
+def fee_due_date(year: int, month: int, due_day: int) -> datetime:
+    """The schedule's due day, clamped to the last day of shorter months (e.g. February)"""
+    return datetime(year, month, min(due_day, calendar.monthrange(year, month)[1]))
+
+async def existing_fee_keys(schedule_ids: List, year: int, months: List[int]) -> set:
+    """(property id, schedule id, month) of every fee already generated, in one query"""
+    keys = set()
+    async for fee in database.fees.find(
+        {"fee_schedule.$id": {"$in": schedule_ids}, "year": year, "month": {"$in": months}},
+        {"property": 1, "fee_schedule": 1, "month": 1, "_id": 0}
+    ):
+        keys.add((fee["property"].id, fee["fee_schedule"].id, fee["month"]))
+    return keys
+
+async def generate_fee_documents(
+    fee_schedules: List[FeeSchedule],
+    year: int,
+    months: Iterable[int],
+    reference_prefix: str,
+    generated_date: Callable[[int], datetime],
+    property_filter: Optional[dict] = None
+) -> dict:
+    """
+    Generate the missing fees for every property x schedule x month with a fixed
+    number of queries: properties once, existing keys once, then unordered
+    insert_many batches, each followed by its ledger charges. The
+    fees_schedule_period_property_unique index turns fees inserted concurrently
+    by another run into skipped duplicates.
+    """
+    months = list(months)
+    properties = await database.properties.find(
+        property_filter or {}, {"row_letter": 1, "number": 1}
+    ).to_list(length=None)
+    existing = await existing_fee_keys([schedule.id for schedule in fee_schedules], year, months)
+
+    property_collection = Property.get_settings().name
+    schedule_collection = FeeSchedule.get_settings().name
+
+    generated = 0
+    skipped = 0
+    batch = []
+
+    async def flush():
+        nonlocal generated, skipped
+        failed = set()
+        try:
+            await database.fees.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            duplicates = [error for error in e.details["writeErrors"] if error["code"] == DUPLICATE_KEY_ERROR]
+            if len(duplicates) != len(e.details["writeErrors"]):
+                raise
+            failed = {error["index"] for error in duplicates}
+        inserted = [fee for index, fee in enumerate(batch) if index not in failed]
+        generated += len(inserted)
+        skipped += len(failed)
+
+        await post_to_ledger([
+            ledger_movement(
+                fee["property"].id, LedgerEntryType.FEE_CHARGE, fee["amount"], fee["_id"],
+                description=f"Cuota {fee['month']:02d}/{fee['year']}",
+                key=f"fee_charge:{fee['_id']}"
+            )
+            for fee in inserted
+        ])
+        batch.clear()
+
+    for month in months:
+        for fee_schedule in fee_schedules:
+            due_date = fee_due_date(year, month, fee_schedule.due_day)
+            for prop in properties:
+                property_id = prop["_id"]
+                if (property_id, fee_schedule.id, month) in existing:
+                    skipped += 1
+                    continue
+
+                # Same fields Fee(...).insert() would store
+                batch.append({
+                    "_id": ObjectId(),  # Known up front for the ledger entries
+                    "property": DBRef(property_collection, property_id),
+                    "fee_schedule": DBRef(schedule_collection, fee_schedule.id),
+                    "user": None,
+                    "amount": fee_schedule.amount,
+                    "paid_amount": 0.0,
+                    "generated_date": generated_date(month),
+                    "year": year,
+                    "month": month,
+                    "due_date": due_date,
+                    "status": FeeStatus.PENDING.value,
+                    "reference": f"{reference_prefix}-{year}-{month:02d}",
+                    "notes": None,
+                    "property_row_letter": prop.get("row_letter"),
+                    "property_number": prop.get("number")
+                })
+                if len(batch) >= FEE_INSERT_BATCH_SIZE:
+                    await flush()
+
+    if batch:
+        await flush()
+
+    return {"generated": generated, "skipped": skipped}
+
+async def schedules_due_on(day: datetime) -> List[FeeSchedule]:
+    """
+    Active schedules whose due_day falls on `day`. On the last day of a short
+    month this includes the schedules due on the days the month does not have.
+    """
+    last_day = calendar.monthrange(day.year, day.month)[1]
+    due_day = {"$gte": day.day} if day.day == last_day else day.day
+    return await FeeSchedule.find({"is_active": True, "due_day": due_day}).to_list()
+
+async def generate_due_fees(run_date: datetime) -> dict:
+    """Scheduled job: automatic generation for the schedules due on `run_date`"""
+    fee_schedules = await schedules_due_on(run_date)
+    if not fee_schedules:
+        return {"schedules": 0, "generated": 0, "skipped": 0}
+
+    result = await generate_fee_documents(
+        fee_schedules,
+        run_date.year,
+        [run_date.month],
+        reference_prefix="Auto",
+        generated_date=lambda month: run_date
+    )
+    return {"schedules": len(fee_schedules), **result}
@@ -29,7 +29,7 @@ async def create_initial_admin():
             return
 
         # Hash the password
-        hashed_password = get_password_hash(admin_password)
+        hashed_password = await get_password_hash(admin_password)
 
         # Create the admin user
         admin = User(
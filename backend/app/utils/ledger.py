@@ -0,0 +1,464 @@
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from ..models.ledger import LedgerEntryType
+from ..models.payment import PaymentStatus
+from ..models.agreement import AgreementInstallmentStatus
+from ..config.database import client, database
+
+# One document per property: last sequence, running balance and totals. dirty is
+# set when a write outside a transaction failed for the property.
+PROPERTY_BALANCES = "property_balances"
+# {"_id": "backfill"} is written once a full rebuild_ledger has run. Until then,
+# and for dirty properties, balances and statements are computed from source.
+LEDGER_STATE = "ledger_state"
+LEDGER_BACKFILL_ID = "backfill"
+REBUILD_BATCH_SIZE = 500
+
+CREDIT_ENTRY_TYPES = {LedgerEntryType.PAYMENT.value, LedgerEntryType.INSTALLMENT_PAYMENT.value}
+
+_transactions_supported: Optional[bool] = None
+_ledger_backfilled = False
+
+async def transactions_supported() -> bool:
+    """Multi-document transactions need a replica set or sharded cluster (e.g. Atlas)"""
+    global _transactions_supported
+    if _transactions_supported is None:
+        hello = await client.admin.command("hello")
+        _transactions_supported = bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
+    return _transactions_supported
+
+@asynccontextmanager
+async def money_transaction() -> AsyncIterator[Optional[object]]:
+    """
+    Session for a change of money and its ledger entries: a transaction,
+    committed when the block ends, when the deployment supports one. A
+    standalone mongod (as in docker-compose) has none; the block then gets None,
+    the writes are separate and post_to_ledger marks the property dirty if its
+    entries fail.
+    """
+    if not await transactions_supported():
+        yield None
+        return
+    async with await client.start_session() as session:
+        async with session.start_transaction():
+            yield session
+
+def ledger_movement(
+    property_id,
+    entry_type: LedgerEntryType,
+    amount: float,
+    source_id,
+    description: Optional[str] = None,
+    key: Optional[str] = None,
+    entry_date: Optional[datetime] = None
+) -> dict:
+    """
+    A ledger entry to record; positive amounts are charges, negative ones credits.
+    Without `key` every call is a separate movement; pass a fixed key for
+    movements that may only happen once (e.g. a fee's charge).
+    """
+    return {
+        "property_id": ObjectId(property_id) if property_id else None,
+        "entry_type": entry_type.value,
+        "amount": round(amount, 2),
+        "source_id": str(source_id) if source_id else None,
+        "description": description,
+        "key": key or f"{entry_type.value}:{source_id}:{ObjectId()}",
+        "entry_date": entry_date or datetime.utcnow()
+    }
+
+def _totals(movements: Iterable[dict]) -> dict:
+    charged = 0.0
+    credited = 0.0
+    for movement in movements:
+        if movement["entry_type"] in CREDIT_ENTRY_TYPES:
+            credited -= movement["amount"]
+        else:
+            charged += movement["amount"]
+    return {"total": round(charged - credited, 2), "charged": round(charged, 2), "credited": round(credited, 2)}
+
+def _add(field: str, value: float) -> dict:
+    return {"$round": [{"$add": [{"$ifNull": [f"${field}", 0]}, value]}, 2]}
+
+async def _write_entries(by_property: Dict[ObjectId, List[dict]], session=None) -> int:
+    """
+    Reserve sequence numbers and the starting balance of every property in one
+    bulk pipeline update (each property's previous values are kept under a
+    per-batch key), read them back, then insert the entries.
+    """
+    batch = uuid.uuid4().hex
+    now = datetime.utcnow()
+    balances = database[PROPERTY_BALANCES]
+    property_ids = list(by_property)
+
+    operations = []
+    for property_id, movements in by_property.items():
+        totals = _totals(movements)
+        operations.append(UpdateOne(
+            {"_id": property_id},
+            [{"$set": {
+                f"reservations.{batch}": {
+                    "sequence": {"$ifNull": ["$sequence", 0]},
+                    "balance": {"$ifNull": ["$balance", 0]}
+                },
+                "sequence": {"$add": [{"$ifNull": ["$sequence", 0]}, len(movements)]},
+                "balance": _add("balance", totals["total"]),
+                "total_charged": _add("total_charged", totals["charged"]),
+                "total_credited": _add("total_credited", totals["credited"]),
+                "updated_at": now
+            }}],
+            upsert=True
+        ))
+    await balances.bulk_write(operations, ordered=False, session=session)
+
+    reservations = {
+        doc["_id"]: doc["reservations"][batch]
+        async for doc in balances.find(
+            {"_id": {"$in": property_ids}}, {f"reservations.{batch}": 1}, session=session
+        )
+    }
+    await balances.update_many(
+        {"_id": {"$in": property_ids}}, {"$unset": {f"reservations.{batch}": ""}}, session=session
+    )
+
+    entries = []
+    for property_id, movements in by_property.items():
+        sequence = reservations[property_id]["sequence"]
+        balance = reservations[property_id]["balance"]
+        for movement in movements:
+            sequence += 1
+            balance = round(balance + movement["amount"], 2)
+            entries.append({**movement, "sequence": sequence, "balance": balance, "created_at": now})
+
+    try:
+        await database.ledger_entries.insert_many(entries, ordered=False, session=session)
+    except BulkWriteError as e:
+        # In a transaction nothing is kept; otherwise give back what the entries
+        # that were not inserted (e.g. a key another writer just recorded) added
+        if session is None:
+            await _take_back([entries[error["index"]] for error in e.details.get("writeErrors", [])])
+        raise
+    return len(entries)
+
+async def _take_back(entries: List[dict]):
+    """Subtract entries that were reserved but not inserted from their property balances"""
+    by_property: Dict[ObjectId, List[dict]] = {}
+    for entry in entries:
+        by_property.setdefault(entry["property_id"], []).append(entry)
+    operations = []
+    for property_id, property_entries in by_property.items():
+        totals = _totals(property_entries)
+        operations.append(UpdateOne(
+            {"_id": property_id},
+            [{"$set": {
+                "balance": _add("balance", -totals["total"]),
+                "total_charged": _add("total_charged", -totals["charged"]),
+                "total_credited": _add("total_credited", -totals["credited"])
+            }}]
+        ))
+    if operations:
+        await database[PROPERTY_BALANCES].bulk_write(operations, ordered=False)
+
+async def record_ledger_entries(movements: List[dict], session=None) -> int:
+    """
+    Append movements to their properties' ledgers, in the caller's transaction
+    (`session`) or else in one of their own when the deployment supports it.
+    Movements whose key is already recorded are skipped.
+    Returns the number of entries written.
+    """
+    movements = [movement for movement in movements if movement["property_id"]]
+    if not movements:
+        return 0
+
+    recorded = {
+        doc["key"]
+        async for doc in database.ledger_entries.find(
+            {"key": {"$in": [movement["key"] for movement in movements]}}, {"key": 1}, session=session
+        )
+    }
+    by_property: Dict[ObjectId, List[dict]] = {}
+    for movement in movements:
+        if movement["key"] in recorded:
+            continue
+        recorded.add(movement["key"])
+        by_property.setdefault(movement["property_id"], []).append(movement)
+
+    if not by_property:
+        return 0
+
+    if session is not None:
+        return await _write_entries(by_property, session=session)
+
+    if await transactions_supported():
+        async with await client.start_session() as session:
+            written = 0
+
+            async def write(transaction_session):
+                nonlocal written
+                written = await _write_entries(by_property, session=transaction_session)
+
+            await session.with_transaction(write)
+            return written
+
+    return await _write_entries(by_property)
+
+async def mark_ledgers_dirty(property_ids: Iterable):
+    """Flag properties whose ledger missed a write: they are read from source until repaired"""
+    operations = [
+        UpdateOne({"_id": ObjectId(property_id)}, {"$set": {"dirty": True}}, upsert=True)
+        for property_id in set(property_ids) if property_id
+    ]
+    if operations:
+        await database[PROPERTY_BALANCES].bulk_write(operations, ordered=False)
+
+async def post_to_ledger(movements: List[dict], session=None):
+    """
+    Record movements from a route. Inside a money_transaction (`session` set) a
+    failure propagates and aborts the change of money with its entries. Without
+    a transaction it is logged and the properties are marked dirty: they are
+    read from source until rebuild_ledger.py --dirty repairs them.
+    """
+    if session is not None:
+        await record_ledger_entries(movements, session=session)
+        return
+
+    try:
+        await record_ledger_entries(movements)
+    except Exception as e:
+        property_ids = {movement["property_id"] for movement in movements}
+        print(f"❌ Could not record {len(movements)} ledger entries, marking {len(property_ids)} properties dirty: {e}")
+        import traceback
+        traceback.print_exc()
+        try:
+            await mark_ledgers_dirty(property_ids)
+        except Exception as mark_error:
+            print(f"❌ Could not mark properties dirty, run rebuild_ledger.py to repair: {mark_error}")
+
+async def ledger_backfilled() -> bool:
+    """Whether a full rebuild_ledger has run, so stored balances can be served"""
+    global _ledger_backfilled
+    if not _ledger_backfilled:
+        _ledger_backfilled = bool(await database[LEDGER_STATE].find_one({"_id": LEDGER_BACKFILL_ID}))
+    return _ledger_backfilled
+
+def _ledger_from_movements(
+    movements: Dict[ObjectId, List[dict]], now: Optional[datetime] = None
+) -> Tuple[List[dict], Dict[ObjectId, dict]]:
+    """Entries (in date order, with sequence and running balance) and balance documents per property"""
+    now = now or datetime.utcnow()
+    entries = []
+    balances = {}
+    for property_id, property_movements in movements.items():
+        property_movements.sort(key=lambda movement: movement["entry_date"])
+        balance = 0.0
+        for sequence, movement in enumerate(property_movements, start=1):
+            balance = round(balance + movement["amount"], 2)
+            entries.append({**movement, "sequence": sequence, "balance": balance, "created_at": now})
+        totals = _totals(property_movements)
+        balances[property_id] = {
+            "_id": property_id,
+            "sequence": len(property_movements),
+            "balance": balance,
+            "total_charged": totals["charged"],
+            "total_credited": totals["credited"],
+            "updated_at": now
+        }
+    return entries, balances
+
+async def get_property_balances(property_ids: List) -> Dict[ObjectId, dict]:
+    """
+    Current balance and totals per property, one indexed read. Before the
+    backfill, and for properties marked dirty, they are computed from fees,
+    payments and agreements instead, without writing anything.
+    """
+    property_ids = [ObjectId(property_id) for property_id in property_ids]
+    balances = {
+        doc["_id"]: doc
+        async for doc in database[PROPERTY_BALANCES].find({"_id": {"$in": property_ids}}, {"reservations": 0})
+    }
+
+    backfilled = await ledger_backfilled()
+    from_source = [
+        property_id for property_id in property_ids
+        if not backfilled or balances.get(property_id, {}).get("dirty")
+    ]
+    if from_source:
+        _, computed = _ledger_from_movements(await _source_movements(from_source))
+        balances.update(computed)
+    return balances
+
+async def get_property_ledger(
+    property_id,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> dict:
+    """
+    Entries of one property between two dates, with the balance before and after
+    them. Computed from source (entries without _id) when the stored ledger
+    cannot be served, as in get_property_balances.
+    """
+    property_id = ObjectId(property_id)
+    stored = await database[PROPERTY_BALANCES].find_one({"_id": property_id}, {"reservations": 0})
+
+    if await ledger_backfilled() and not (stored or {}).get("dirty"):
+        totals = stored or {}
+        date_range = {}
+        if start_date:
+            date_range["$gte"] = start_date
+        if end_date:
+            date_range["$lt"] = end_date
+
+        query = {"property_id": property_id}
+        if date_range:
+            query["entry_date"] = date_range
+        entries = await database.ledger_entries.find(query).sort(
+            [("entry_date", 1), ("sequence", 1)]
+        ).to_list(length=None)
+
+        previous_balance = 0.0
+        if not entries and start_date:
+            previous = await database.ledger_entries.find(
+                {"property_id": property_id, "entry_date": {"$lt": start_date}}
+            ).sort([("entry_date", -1), ("sequence", -1)]).limit(1).to_list(length=1)
+            previous_balance = previous[0]["balance"] if previous else 0.0
+    else:
+        all_entries, computed = _ledger_from_movements(await _source_movements([property_id]))
+        totals = computed[property_id]
+        entries = [
+            entry for entry in all_entries
+            if (not start_date or entry["entry_date"] >= start_date)
+            and (not end_date or entry["entry_date"] < end_date)
+        ]
+        earlier = [entry for entry in all_entries if start_date and entry["entry_date"] < start_date]
+        previous_balance = earlier[-1]["balance"] if earlier else 0.0
+
+    opening_balance = 0.0
+    if entries:
+        opening_balance = round(entries[0]["balance"] - entries[0]["amount"], 2)
+    elif start_date:
+        opening_balance = previous_balance
+
+    return {
+        "property_id": str(property_id),
+        "balance": totals.get("balance", 0.0),
+        "total_charged": totals.get("total_charged", 0.0),
+        "total_credited": totals.get("total_credited", 0.0),
+        "opening_balance": opening_balance,
+        "closing_balance": entries[-1]["balance"] if entries else opening_balance,
+        "entries": entries
+    }
+
+async def _source_movements(property_ids: List[ObjectId]) -> Dict[ObjectId, List[dict]]:
+    """Ledger movements of a batch of properties derived from fees, payments and agreements"""
+    movements: Dict[ObjectId, List[dict]] = {property_id: [] for property_id in property_ids}
+
+    async for fee in database.fees.find(
+        {"property.$id": {"$in": property_ids}},
+        {"property": 1, "amount": 1, "generated_date": 1, "year": 1, "month": 1}
+    ):
+        movements[fee["property"].id].append(ledger_movement(
+            fee["property"].id, LedgerEntryType.FEE_CHARGE, fee["amount"], fee["_id"],
+            description=f"Cuota {fee['month']:02d}/{fee['year']}",
+            key=f"fee_charge:{fee['_id']}",
+            entry_date=fee["generated_date"]
+        ))
+
+    async for payment in database.payments.find(
+        {"property_id": {"$in": property_ids}, "status": PaymentStatus.APPROVED.value},
+        {"property_id": 1, "amount": 1, "payment_date": 1}
+    ):
+        movements[payment["property_id"]].append(ledger_movement(
+            payment["property_id"], LedgerEntryType.PAYMENT, -payment["amount"], payment["_id"],
+            description="Pago aprobado",
+            key=f"payment:{payment['_id']}:rebuild",
+            entry_date=payment["payment_date"]
+        ))
+
+    agreements = {
+        agreement["_id"]: agreement
+        async for agreement in database.agreements.find(
+            {"property.$id": {"$in": property_ids}},
+            {"property": 1, "total_debt": 1, "agreement_number": 1, "created_at": 1}
+        )
+    }
+    installment_totals: Dict[ObjectId, float] = {agreement_id: 0.0 for agreement_id in agreements}
+    async for installment in database.agreement_installments.find(
+        {"agreement.$id": {"$in": list(agreements)}},
+        {"agreement": 1, "amount": 1, "status": 1, "paid_date": 1, "due_date": 1, "installment_number": 1}
+    ):
+        agreement = agreements[installment["agreement"].id]
+        installment_totals[agreement["_id"]] += installment["amount"]
+        if installment["status"] == AgreementInstallmentStatus.PAID.value:
+            movements[agreement["property"].id].append(ledger_movement(
+                agreement["property"].id, LedgerEntryType.INSTALLMENT_PAYMENT, -installment["amount"], installment["_id"],
+                description=f"Convenio {agreement['agreement_number']} - Cuota {installment['installment_number']}",
+                key=f"installment_payment:{installment['_id']}:rebuild",
+                entry_date=installment.get("paid_date") or installment["due_date"]
+            ))
+
+    for agreement_id, agreement in agreements.items():
+        movements[agreement["property"].id].append(ledger_movement(
+            agreement["property"].id, LedgerEntryType.AGREEMENT,
+            installment_totals[agreement_id] - agreement["total_debt"], agreement_id,
+            description=f"Convenio {agreement['agreement_number']}",
+            key=f"agreement:{agreement_id}",
+            entry_date=agreement["created_at"]
+        ))
+
+    return movements
+
+async def rebuild_ledger(property_ids: Optional[List] = None) -> dict:
+    """
+    Recompute the ledger of the given properties (all by default) from fees,
+    approved payments and agreements, in batches of REBUILD_BATCH_SIZE properties.
+    Fee adjustments and reversed movements collapse into the current state.
+    Entries are deleted and rewritten without a lock, so only run it while no
+    money is being recorded (rebuild_ledger.py), never from a request.
+    """
+    query = {} if property_ids is None else {"_id": {"$in": [ObjectId(property_id) for property_id in property_ids]}}
+    balances = database[PROPERTY_BALANCES]
+    now = datetime.utcnow()
+    rebuilt_properties = 0
+    rebuilt_entries = 0
+
+    async def rebuild_batch(batch: List[ObjectId]):
+        nonlocal rebuilt_properties, rebuilt_entries
+        entries, computed = _ledger_from_movements(await _source_movements(batch), now)
+        # Replacing the balance document also clears its dirty flag
+        balance_documents = [
+            ReplaceOne({"_id": property_id}, balance, upsert=True)
+            for property_id, balance in computed.items()
+        ]
+
+        await database.ledger_entries.delete_many({"property_id": {"$in": batch}})
+        if entries:
+            await database.ledger_entries.insert_many(entries, ordered=False)
+        await balances.bulk_write(balance_documents, ordered=False)
+
+        rebuilt_properties += len(batch)
+        rebuilt_entries += len(entries)
+
+    batch = []
+    async for prop in database.properties.find(query, {"_id": 1}).sort("_id", 1):
+        batch.append(prop["_id"])
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            await rebuild_batch(batch)
+            batch = []
+    if batch:
+        await rebuild_batch(batch)
+
+    if property_ids is None:
+        await database[LEDGER_STATE].update_one(
+            {"_id": LEDGER_BACKFILL_ID}, {"$set": {"completed_at": now}}, upsert=True
+        )
+
+    return {"properties": rebuilt_properties, "entries": rebuilt_entries}
+
+async def dirty_property_ids() -> List[ObjectId]:
+    """Properties a failed ledger write left marked dirty"""
+    return [doc["_id"] async for doc in database[PROPERTY_BALANCES].find({"dirty": True}, {"_id": 1})]
@@ -0,0 +1,50 @@
+import os
+from datetime import datetime
+from typing import Optional
+from ..models.fee import FeeStatus
+from ..models.agreement import AgreementStatus, AgreementInstallmentStatus
+from ..config.database import database
+from .fee_balance import overdue_cutoff
+
+# Mark an active agreement as defaulted once this many of its installments are overdue (0 = never)
+AGREEMENT_DEFAULT_OVERDUE_INSTALLMENTS = int(os.getenv("AGREEMENT_DEFAULT_OVERDUE_INSTALLMENTS", "0"))
+
+async def sweep_overdue(run_date: Optional[datetime] = None) -> dict:
+    """
+    Flip unpaid fees and installments whose due_date has passed to overdue.
+    Each flip is one update_many on the (status, due_date) indexes, so the
+    sweep costs the same however many rows it touches; running it again is a no-op.
+    """
+    cutoff = overdue_cutoff(run_date)
+
+    fees = await database.fees.update_many(
+        {"status": FeeStatus.PENDING.value, "due_date": {"$lt": cutoff}},
+        {"$set": {"status": FeeStatus.OVERDUE.value}}
+    )
+    installments = await database.agreement_installments.update_many(
+        {"status": AgreementInstallmentStatus.PENDING.value, "due_date": {"$lt": cutoff}},
+        {"$set": {"status": AgreementInstallmentStatus.OVERDUE.value}}
+    )
+
+    defaulted = 0
+    if AGREEMENT_DEFAULT_OVERDUE_INSTALLMENTS > 0:
+        agreement_ids = [
+            row["_id"]
+            async for row in database.agreement_installments.aggregate([
+                {"$match": {"status": AgreementInstallmentStatus.OVERDUE.value}},
+                {"$group": {"_id": "$agreement.$id", "overdue": {"$sum": 1}}},
+                {"$match": {"overdue": {"$gte": AGREEMENT_DEFAULT_OVERDUE_INSTALLMENTS}}}
+            ])
+        ]
+        if agreement_ids:
+            result = await database.agreements.update_many(
+                {"_id": {"$in": agreement_ids}, "status": AgreementStatus.ACTIVE.value},
+                {"$set": {"status": AgreementStatus.DEFAULTED.value, "updated_at": datetime.utcnow()}}
+            )
+            defaulted = result.modified_count
+
+    return {
+        "overdue_fees": fees.modified_count,
+        "overdue_installments": installments.modified_count,
+        "defaulted_agreements": defaulted
+    }
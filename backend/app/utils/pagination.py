@@ -0,0 +1,71 @@
+import base64
+import binascii
+import json
+from typing import Any, List, Optional, Tuple
+from bson import json_util
+from fastapi import HTTPException, status
+
+# (field path, direction) pairs, e.g. [("year", -1), ("_id", 1)]
+SortKey = List[Tuple[str, int]]
+
+def encode_cursor(values: List[Any]) -> str:
+    """Encode the sort key values of the last row of a page as an opaque cursor"""
+    raw = json_util.dumps(values).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor: str, sort_key: SortKey) -> List[Any]:
+    """Decode a cursor produced by encode_cursor for the given sort key"""
+    try:
+        values = json_util.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (binascii.Error, ValueError, UnicodeError, json.JSONDecodeError):
+        values = None
+
+    if not isinstance(values, list) or len(values) != len(sort_key):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return values
+
+def keyset_filter(sort_key: SortKey, values: List[Any]) -> dict:
+    """
+    Build a $match filter selecting the rows that come strictly after `values`
+    in the order defined by `sort_key` (mixed directions allowed).
+    Null (or missing) sorts before every other value, and $gt/$lt never match
+    across types, so null cursor values and the nulls of descending fields get
+    their own conditions.
+    """
+    conditions = []
+    for i, (field, direction) in enumerate(sort_key):
+        equal = {
+            previous_field: values[j]
+            for j, (previous_field, _) in enumerate(sort_key[:i])
+        }
+        value = values[i]
+        if value is None:
+            # Ascending, every non-null value comes after null; descending, nothing does
+            if direction > 0:
+                conditions.append({**equal, field: {"$ne": None}})
+        elif direction < 0:
+            conditions.append({**equal, field: {"$lt": value}})
+            # Nulls come last in descending order
+            conditions.append({**equal, field: None})
+        else:
+            conditions.append({**equal, field: {"$gt": value}})
+    return {"$or": conditions}
+
+def sort_stage(sort_key: SortKey) -> dict:
+    return {"$sort": {field: direction for field, direction in sort_key}}
+
+def _get_path(document: dict, path: str) -> Any:
+    value = document
+    for part in path.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+def next_cursor(results: List[dict], sort_key: SortKey, limit: int) -> Optional[str]:
+    """Cursor for the page after `results`, or None when this was the last page"""
+    if len(results) < limit or not results:
+        return None
+    last = results[-1]
+    return encode_cursor([_get_path(last, field) for field, _ in sort_key])
@@ -0,0 +1,181 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from uuid import uuid4
+from beanie import PydanticObjectId
+from bson.errors import InvalidId
+from ..models.payment import Payment, PaymentStatus
+from ..models.fee import Fee
+from ..models.property import Property
+from ..models.receipt import Receipt
+from ..models.ledger import LedgerEntryType
+from ..config.database import database
+from .fee_balance import apply_payments_to_fees
+from .ledger import ledger_movement, post_to_ledger
+from .sequence import reserve_correlative_numbers
+
+def receipt_details(prop: Optional[Property]) -> tuple:
+    """Property and owner snapshot stored on a fee payment receipt"""
+    if not prop:
+        # If no property linked, create default details
+        return (
+            {
+                "villa": "N/A",
+                "row_letter": "N/A",
+                "number": 0,
+                "owner_name": "Propietario no registrado",
+                "owner_phone": "N/A"
+            },
+            {
+                "name": "Propietario no registrado",
+                "phone": "N/A"
+            }
+        )
+
+    return (
+        {
+            "villa": prop.villa,
+            "row_letter": prop.row_letter,
+            "number": prop.number,
+            "owner_name": prop.owner_name,
+            "owner_phone": prop.owner_phone or "N/A"
+        },
+        {
+            "name": prop.owner_name,
+            "phone": prop.owner_phone or "N/A"
+        }
+    )
+
+async def approve_payments_in_bulk(payment_ids: List[str]) -> dict:
+    """
+    Approve many fee payments with a fixed number of queries:
+    one $in load each for payments, fees and properties, one conditional
+    update_many to claim the approvals, one counter reservation per receipt
+    year, one insert_many for the receipts and one bulk_write for the fees.
+    Returns a result per requested id, in request order.
+    """
+    results: Dict[str, dict] = OrderedDict(
+        (payment_id, {"payment_id": payment_id}) for payment_id in payment_ids
+    )
+
+    def fail(payment_id: str, error: str):
+        results[payment_id].update({"status": "error", "error": error})
+
+    # Load all target payments in one query
+    object_ids = {}
+    for payment_id in results:
+        try:
+            object_ids[payment_id] = PydanticObjectId(payment_id)
+        except (InvalidId, TypeError):
+            fail(payment_id, f"Payment {payment_id} not found")
+
+    payments = {
+        str(payment.id): payment
+        for payment in await Payment.find({"_id": {"$in": list(object_ids.values())}}).to_list()
+    }
+
+    candidates = []
+    for payment_id in object_ids:
+        payment = payments.get(payment_id)
+        if not payment:
+            fail(payment_id, f"Payment {payment_id} not found")
+        elif payment.status == PaymentStatus.APPROVED:
+            fail(payment_id, f"Payment {payment_id} is already approved")
+        else:
+            candidates.append(payment)
+
+    if not candidates:
+        return _summary(results)
+
+    # Claim the approvals. The batch id tells which payments this call flipped,
+    # so a concurrent approval of the same payment is never counted twice.
+    approval_batch = uuid4().hex
+    await database.payments.update_many(
+        {
+            "_id": {"$in": [payment.id for payment in candidates]},
+            "status": {"$ne": PaymentStatus.APPROVED.value}
+        },
+        {"$set": {"status": PaymentStatus.APPROVED.value, "approval_batch": approval_batch}}
+    )
+    claimed_ids = {
+        document["_id"]
+        async for document in database.payments.find({"approval_batch": approval_batch}, {"_id": 1})
+    }
+
+    approved = []
+    for payment in candidates:
+        if payment.id in claimed_ids:
+            payment.status = PaymentStatus.APPROVED
+            approved.append(payment)
+        else:
+            fail(str(payment.id), f"Payment {payment.id} is already approved")
+
+    # Fees and properties of the approved payments, one query each
+    fees = {
+        str(fee.id): fee
+        for fee in await Fee.find(
+            {"_id": {"$in": list({PydanticObjectId(payment.fee_id) for payment in approved})}}
+        ).to_list()
+    }
+    property_ids = {fee.property.ref.id for fee in fees.values() if fee.property}
+    properties = {
+        prop.id: prop
+        for prop in await Property.find({"_id": {"$in": list(property_ids)}}).to_list()
+    }
+
+    # One block of receipt numbers per year, handed out in request order
+    payments_by_year: Dict[int, List[Payment]] = OrderedDict()
+    for payment in approved:
+        payments_by_year.setdefault(payment.payment_date.year, []).append(payment)
+
+    receipts = []
+    for year, year_payments in payments_by_year.items():
+        numbers = await reserve_correlative_numbers(year, "CUOT", len(year_payments))
+        for payment, correlative_number in zip(year_payments, numbers):
+            fee = fees.get(payment.fee_id)
+            prop = properties.get(fee.property.ref.id) if fee and fee.property else None
+            property_details, owner_details = receipt_details(prop)
+
+            receipts.append(Receipt(
+                correlative_number=correlative_number,
+                payment=payment,
+                issue_date=payment.payment_date,
+                total_amount=payment.amount,
+                property_details=property_details,
+                owner_details=owner_details,
+                fee_period=f"Cuota {fee.reference or 'N/A'}" if fee else "N/A",
+                notes="Recibo generado automáticamente al aprobar el pago (aprobación masiva)"
+            ))
+            results[str(payment.id)].update({
+                "status": "approved",
+                "receipt_correlative_number": correlative_number
+            })
+
+    if receipts:
+        await Receipt.insert_many(receipts)
+
+    # One update per fee, however many of its payments were approved
+    fee_deltas: Dict[str, float] = {}
+    for payment in approved:
+        fee_deltas[payment.fee_id] = fee_deltas.get(payment.fee_id, 0.0) + payment.amount
+    await apply_payments_to_fees(fee_deltas)
+
+    await post_to_ledger([
+        ledger_movement(
+            fees[payment.fee_id].property.ref.id, LedgerEntryType.PAYMENT, -payment.amount, payment.id,
+            description="Pago aprobado"
+        )
+        for payment in approved
+        if payment.fee_id in fees and fees[payment.fee_id].property
+    ])
+
+    return _summary(results)
+
+def _summary(results: Dict[str, dict]) -> dict:
+    items = list(results.values())
+    approved_count = sum(1 for item in items if item.get("status") == "approved")
+    return {
+        "message": f"Successfully approved {approved_count} payments",
+        "approved_count": approved_count,
+        "errors": [item["error"] for item in items if item.get("status") == "error"],
+        "results": items
+    }
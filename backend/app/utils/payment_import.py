@@ -0,0 +1,310 @@
+import asyncio
+from datetime import datetime
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from beanie import PydanticObjectId
+from pymongo.errors import BulkWriteError
+from openpyxl import load_workbook
+from ..models.payment import Payment, PaymentStatus
+from ..models.fee import Fee, UNPAID_FEE_STATUSES
+from ..models.property import Property
+from ..models.receipt import Receipt
+from ..models.user import User
+from ..models.ledger import LedgerEntryType
+from ..config.database import database
+from .fee_balance import apply_payments_to_fees, reconcile_fee_balances
+from .ledger import ledger_movement, mark_ledgers_dirty, post_to_ledger
+from .payment_approval import receipt_details
+from .sequence import reserve_correlative_numbers
+
+# Expected columns: Villa, Fila, Número, Año, Mes, Monto, Fecha de Pago, Notas
+EXPECTED_HEADERS = ['Villa', 'Fila', 'Número', 'Año', 'Mes', 'Monto', 'Fecha de Pago', 'Notas']
+IMPORT_CHUNK_SIZE = 500
+PREVIEW_ROWS = 50
+
+class InvalidImportFormat(ValueError):
+    """The workbook does not have the expected header row"""
+
+def parse_payment_workbook(file: BinaryIO) -> Tuple[List[dict], List[dict]]:
+    """
+    Stream the sheet in read-only mode and validate every row in memory.
+    Returns (rows, errors); rows still need to be matched against the database.
+    """
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        rows_iter = ws.iter_rows(min_row=1, max_col=8, values_only=True)
+
+        header = next(rows_iter, ())
+        actual_headers = [str(value).strip() if value else "" for value in header]
+        if actual_headers[:7] != EXPECTED_HEADERS[:7]:  # Notas is optional
+            raise InvalidImportFormat(
+                f"Invalid Excel format. Expected headers: {', '.join(EXPECTED_HEADERS[:7])}"
+            )
+
+        rows = []
+        errors = []
+        now = datetime.utcnow()
+        for row_idx, values in enumerate(rows_iter, start=2):
+            values = tuple(values) + (None,) * (8 - len(values))
+            if all(value is None for value in values):
+                continue  # Formatted but empty rows at the end of the sheet
+
+            villa_cell, fila_cell, numero, year, month, amount, payment_date_cell, notes_cell = values
+            villa = str(villa_cell or "").strip()
+            fila = str(fila_cell or "").strip()
+            notes = str(notes_cell or "").strip()
+
+            # Validate required fields
+            if not all([villa, fila, numero is not None, year is not None, month is not None, amount is not None, payment_date_cell is not None]):
+                errors.append({"row": row_idx, "error": "Missing required fields"})
+                continue
+
+            # Convert types
+            try:
+                numero = int(numero)
+                year = int(year)
+                month = int(month)
+                amount = float(amount)
+                if isinstance(payment_date_cell, datetime):
+                    payment_date = payment_date_cell
+                else:
+                    payment_date = datetime.strptime(str(payment_date_cell), '%Y-%m-%d')
+            except (ValueError, TypeError) as e:
+                errors.append({"row": row_idx, "error": f"Invalid data types: {str(e)}"})
+                continue
+
+            # Validate data ranges
+            if month < 1 or month > 12:
+                errors.append({"row": row_idx, "error": "Month must be between 1 and 12"})
+                continue
+            if amount <= 0:
+                errors.append({"row": row_idx, "error": "Amount must be greater than 0"})
+                continue
+            if payment_date > now:
+                errors.append({"row": row_idx, "error": "Payment date cannot be in the future"})
+                continue
+
+            rows.append({
+                "row": row_idx,
+                "villa": villa,
+                "fila": fila,
+                "numero": numero,
+                "year": year,
+                "month": month,
+                "amount": amount,
+                "payment_date": payment_date,
+                "notes": notes or None
+            })
+
+        return rows, errors
+    finally:
+        wb.close()
+
+async def _match_rows(rows: List[dict], errors: List[dict]) -> List[dict]:
+    """
+    Resolve every row to its property and pending fee with a few $in queries.
+    Rows that cannot be imported are moved to `errors`.
+    """
+    properties = await Property.find(
+        {"villa": {"$in": list({row["villa"] for row in rows})}}
+    ).to_list()
+    properties_by_key = {(prop.villa, prop.row_letter, prop.number): prop for prop in properties}
+
+    pending_fees = {}
+    if properties:
+        for fee in await Fee.find({
+            "property.$id": {"$in": [prop.id for prop in properties]},
+            "year": {"$in": list({row["year"] for row in rows})},
+            "status": {"$in": [fee_status.value for fee_status in UNPAID_FEE_STATUSES]}
+        }).to_list():
+            pending_fees.setdefault((fee.property.ref.id, fee.year, fee.month), fee)
+
+    paid_fee_ids = set()
+    if pending_fees:
+        async for payment in database.payments.find(
+            {"fee_id": {"$in": [str(fee.id) for fee in pending_fees.values()]}},
+            {"fee_id": 1}
+        ):
+            paid_fee_ids.add(payment["fee_id"])
+
+    matched = []
+    for row in rows:
+        prop = properties_by_key.get((row["villa"], row["fila"], row["numero"]))
+        if not prop:
+            errors.append({
+                "row": row["row"],
+                "error": f"Property not found: Villa {row['villa']}, {row['fila']}{row['numero']}"
+            })
+            continue
+
+        fee = pending_fees.get((prop.id, row["year"], row["month"]))
+        if not fee:
+            errors.append({
+                "row": row["row"],
+                "error": f"No pending fee found for property {row['villa']}-{row['fila']}{row['numero']} in {row['month']}/{row['year']}"
+            })
+            continue
+
+        fee_id = str(fee.id)
+        if fee_id in paid_fee_ids:
+            errors.append({"row": row["row"], "error": "Payment already exists for this fee"})
+            continue
+        paid_fee_ids.add(fee_id)  # A second row for the same fee is a duplicate too
+
+        matched.append({**row, "property": prop, "fee": fee})
+
+    errors.sort(key=lambda error: error["row"])
+    return matched
+
+async def _insert_payments(chunk: List[dict], current_user: User) -> Tuple[List[Payment], Optional[str]]:
+    """
+    Insert one chunk of approved payments. Returns the payments stored and, when
+    the insert stopped early, the error (the insert is ordered, so the stored
+    ones are the rows before it).
+    """
+    payments = []
+    for row in chunk:
+        prop = row["property"]
+        fee = row["fee"]
+        payments.append(Payment(
+            id=PydanticObjectId(),  # Known up front so receipts can link to it
+            fee=fee,
+            fee_id=str(fee.id),
+            user=current_user,  # Admin user creating the bulk import
+            amount=row["amount"],
+            payment_date=row["payment_date"],
+            payment_year=row["payment_date"].year,
+            payment_month=row["payment_date"].month,
+            status=PaymentStatus.APPROVED,
+            notes=row["notes"],
+            property_id=prop.id,
+            fee_year=fee.year,
+            fee_month=fee.month,
+            property_row_letter=prop.row_letter,
+            property_number=prop.number
+        ))
+    try:
+        await Payment.insert_many(payments)
+    except BulkWriteError as e:
+        write_errors = e.details.get("writeErrors") or [{}]
+        return payments[:e.details.get("nInserted", 0)], write_errors[0].get("errmsg", str(e))
+    return payments, None
+
+async def _settle_payments(chunk: List[dict], payments: List[Payment]):
+    """Receipts, fee balances and ledger entries of stored payments (the first rows of the chunk)"""
+    # One block of receipt numbers per payment year in the chunk
+    by_year: Dict[int, List[int]] = {}
+    for index, payment in enumerate(payments):
+        by_year.setdefault(payment.payment_date.year, []).append(index)
+
+    try:
+        receipts = []
+        for year, indexes in by_year.items():
+            numbers = await reserve_correlative_numbers(year, "CUOT", len(indexes))
+            for index, correlative_number in zip(indexes, numbers):
+                payment = payments[index]
+                property_details, owner_details = receipt_details(chunk[index]["property"])
+                receipts.append(Receipt(
+                    correlative_number=correlative_number,
+                    payment=payment,
+                    issue_date=payment.payment_date,
+                    total_amount=payment.amount,
+                    property_details=property_details,
+                    owner_details=owner_details,
+                    fee_period=f"Cuota {chunk[index]['fee'].reference or 'N/A'}",
+                    notes="Recibo generado automáticamente al aprobar el pago (subida masiva)"
+                ))
+        await Receipt.insert_many(receipts)
+    except Exception as e:
+        # Log the error but don't fail the bulk import
+        print(f"Error creating receipts for bulk import chunk starting at row {chunk[0]['row']}: {e}")
+        import traceback
+        traceback.print_exc()
+
+    fee_deltas: Dict[str, float] = {}
+    for payment in payments:
+        fee_deltas[payment.fee_id] = fee_deltas.get(payment.fee_id, 0.0) + payment.amount
+    await apply_payments_to_fees(fee_deltas)
+
+    await post_to_ledger([
+        ledger_movement(payment.property_id, LedgerEntryType.PAYMENT, -payment.amount, payment.id, description="Pago aprobado")
+        for payment in payments
+    ])
+
+async def _repair_settlement(payments: List[Payment]) -> List[str]:
+    """
+    After settling stored payments failed: recompute their fees from the approved
+    payments and mark their properties' ledgers for rebuild. Returns the fee ids
+    still to reconcile if that failed too.
+    """
+    fee_ids = list({payment.fee_id for payment in payments})
+    try:
+        await reconcile_fee_balances(fee_ids)
+        await mark_ledgers_dirty(payment.property_id for payment in payments)
+        return []
+    except Exception as e:
+        print(f"Error repairing fee balances of {len(fee_ids)} imported fees, reconcile them: {e}")
+        return fee_ids
+
+async def import_payments(file: BinaryIO, current_user: User, dry_run: bool = False) -> dict:
+    """
+    Import approved payments from the bank reconciliation sheet.
+    With `dry_run` nothing is written and a preview of the matched rows is returned.
+    """
+    loop = asyncio.get_running_loop()
+    rows, errors = await loop.run_in_executor(None, parse_payment_workbook, file)
+    matched = await _match_rows(rows, errors) if rows else []
+
+    results = {
+        "dry_run": dry_run,
+        "successful_imports": 0,
+        "failed_imports": len(errors),
+        "errors": errors
+    }
+
+    if dry_run:
+        results["valid_rows"] = len(matched)
+        results["preview"] = [
+            {
+                "row": row["row"],
+                "property": f"{row['villa']}-{row['fila']}{row['numero']}",
+                "period": f"{row['month']}/{row['year']}",
+                "amount": row["amount"],
+                "payment_date": row["payment_date"],
+                "fee_id": str(row["fee"].id)
+            }
+            for row in matched[:PREVIEW_ROWS]
+        ]
+        return results
+
+    fees_to_reconcile = []
+    for start in range(0, len(matched), IMPORT_CHUNK_SIZE):
+        chunk = matched[start:start + IMPORT_CHUNK_SIZE]
+        try:
+            payments, insert_error = await _insert_payments(chunk, current_user)
+        except Exception as e:
+            payments, insert_error = [], str(e)
+
+        if insert_error:
+            # Later chunks are still attempted; report every row that was not stored
+            print(f"Error importing payments chunk starting at row {chunk[0]['row']}: {insert_error}")
+            for row in chunk[len(payments):]:
+                errors.append({"row": row["row"], "error": f"Unexpected error: {insert_error}"})
+            results["failed_imports"] += len(chunk) - len(payments)
+        if not payments:
+            continue
+
+        # Stored payments are imported whatever happens next; a failed settlement is repaired
+        results["successful_imports"] += len(payments)
+        try:
+            await _settle_payments(chunk, payments)
+        except Exception as e:
+            print(f"Error settling payments chunk starting at row {chunk[0]['row']}: {e}")
+            import traceback
+            traceback.print_exc()
+            fees_to_reconcile += await _repair_settlement(payments)
+
+    errors.sort(key=lambda error: error["row"])
+    if fees_to_reconcile:
+        results["fees_to_reconcile"] = fees_to_reconcile
+    return results
@@ -1,48 +1,330 @@
 import io
 from datetime import datetime
+from functools import lru_cache
+from reportlab import rl_config
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Flowable
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 
+# Binary content streams instead of ASCII85: smaller files, and ReportLab (without
+# its C accelerators) no longer encodes every stream in pure Python
+rl_config.useA85 = 0
+
+# Paragraph and table styles are built once per process (the render pool workers
+# keep them between documents) instead of on every call
+STYLES = getSampleStyleSheet()
+NORMAL_STYLE = STYLES['Normal']
+
+TITLE_STYLE = ParagraphStyle(
+    'Title',
+    parent=STYLES['Heading1'],
+    fontSize=20,
+    alignment=TA_CENTER,
+    spaceAfter=30
+)
+
+SUBTITLE_STYLE = ParagraphStyle(
+    'Subtitle',
+    parent=STYLES['Heading2'],
+    fontSize=14,
+    alignment=TA_CENTER,
+    spaceAfter=20
+)
+
+AGREEMENT_TITLE_STYLE = ParagraphStyle(
+    'AgreementTitle',
+    parent=STYLES['Heading1'],
+    fontSize=24,
+    alignment=TA_CENTER,
+    spaceAfter=30
+)
+
+AGREEMENT_SUBTITLE_STYLE = ParagraphStyle(
+    'AgreementSubtitle',
+    parent=STYLES['Heading2'],
+    fontSize=16,
+    alignment=TA_CENTER,
+    spaceAfter=20
+)
+
+SECTION_STYLE = ParagraphStyle(
+    'Section',
+    parent=STYLES['Heading3'],
+    fontSize=14,
+    spaceAfter=15
+)
+
+AGING_CELL_STYLE = ParagraphStyle('AgingCell', parent=NORMAL_STYLE, fontSize=8)
+
+@lru_cache(maxsize=None)
+def _label_table_style(label_background, summary=False):
+    """Two-column label/value table; `summary` is the bold, larger variant for totals"""
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), label_background),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold' if summary else 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 12 if summary else 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8 if summary else 6),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+@lru_cache(maxsize=None)
+def _data_table_style(body_background, header_font_size):
+    """Table with a grey header row"""
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), header_font_size),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), body_background),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+PAGE_WIDTH, PAGE_HEIGHT = letter
+PAGE_FRAME_FORM = "page_frame"
+
+def _draw_page_frame(canvas, doc=None):
+    """
+    Header and footer of every page. The static part is drawn once per document as
+    a form XObject that each page references; only the page number is drawn per page.
+    """
+    if not canvas.hasForm(PAGE_FRAME_FORM):
+        canvas.beginForm(PAGE_FRAME_FORM)
+        canvas.setStrokeColor(colors.lightgrey)
+        canvas.setLineWidth(0.5)
+        canvas.line(inch, PAGE_HEIGHT - 0.6*inch, PAGE_WIDTH - inch, PAGE_HEIGHT - 0.6*inch)
+        canvas.line(inch, 0.6*inch, PAGE_WIDTH - inch, 0.6*inch)
+        canvas.setFillColor(colors.grey)
+        canvas.setFont('Helvetica-Bold', 8)
+        canvas.drawString(inch, PAGE_HEIGHT - 0.5*inch, "PAGO VECINAL")
+        canvas.setFont('Helvetica', 8)
+        canvas.drawRightString(PAGE_WIDTH - inch, PAGE_HEIGHT - 0.5*inch, "Sistema de Gestión de Cuotas de Condominio")
+        canvas.drawString(inch, 0.45*inch, "Documento generado por Pago Vecinal")
+        canvas.endForm()
+
+    canvas.saveState()
+    canvas.doForm(PAGE_FRAME_FORM)
+    canvas.setFillColor(colors.grey)
+    canvas.setFont('Helvetica', 8)
+    canvas.drawRightString(PAGE_WIDTH - inch, 0.45*inch, f"Página {canvas.getPageNumber()}")
+    canvas.restoreState()
+
+@lru_cache(maxsize=None)
+def _paged_table_style(body_background, header_font_size):
+    """_data_table_style with the page subtotal row at the bottom"""
+    return TableStyle([
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey)
+    ], parent=_data_table_style(body_background, header_font_size))
+
+class _PagedTable(Flowable):
+    """
+    Long table read from an iterator of (cells, amount) rows one page at a time.
+    While the remaining rows do not fit in the frame, split() takes as many as fit,
+    under the repeated header and above a subtotal row for that page, and returns
+    itself for the rest. Only one page of rows is held, and no table larger than a
+    page is laid out, so rendering stays linear in the number of rows.
+    """
+
+    def __init__(self, headers, rows, col_widths, style, subtotal_row):
+        Flowable.__init__(self)
+        self.headers = headers
+        self.rows = iter(rows)
+        self.col_widths = col_widths
+        self.style = style
+        self.subtotal_row = subtotal_row  # Page subtotal -> cells of the subtotal row
+        self.hAlign = "CENTER"  # Like the Table pages it splits into
+        self.pending = []  # Rows read and not drawn yet
+        self.exhausted = False
+        self.table = None
+        self.fixed_height = None  # Header and subtotal rows
+        self.row_height = None
+
+    def _read(self, count):
+        while len(self.pending) < count and not self.exhausted:
+            try:
+                self.pending.append(next(self.rows))
+            except StopIteration:
+                self.exhausted = True
+
+    def _table(self, rows):
+        table = Table(
+            [self.headers] + [cells for cells, _ in rows] + [self.subtotal_row(sum(amount for _, amount in rows))],
+            colWidths=self.col_widths
+        )
+        table.setStyle(self.style)
+        return table
+
+    def _capacity(self, available_width, available_height):
+        """Rows that fit in the given height"""
+        if self.row_height is None:
+            # Cells are single-line, so every body row has the height of the first
+            self._read(1)
+            _, self.fixed_height = self._table([]).wrap(available_width, available_height)
+            _, one_row_height = self._table(self.pending[:1]).wrap(available_width, available_height)
+            self.row_height = max(one_row_height - self.fixed_height, 1)
+        return int((available_height - self.fixed_height) // self.row_height)
+
+    def wrap(self, available_width, available_height):
+        capacity = self._capacity(available_width, available_height)
+        self._read(capacity + 1)
+        self.width = sum(self.col_widths)
+        if not self.exhausted or len(self.pending) > capacity:
+            self.table = None
+            self.height = available_height + 1  # Does not fit: the frame calls split()
+        elif self.pending:
+            self.table = self._table(self.pending)
+            _, self.height = self.table.wrap(available_width, available_height)
+        else:
+            self.table = None  # The last page ended exactly with the rows
+            self.height = 0
+        return self.width, self.height
+
+    def split(self, available_width, available_height):
+        capacity = self._capacity(available_width, available_height)
+        if capacity < 1:
+            return []  # Continue on the next page
+        self.__dict__.pop('_postponed', None)
+        self._read(capacity)
+        page, self.pending = self.pending[:capacity], self.pending[capacity:]
+        return [self._table(page), self]
+
+    def draw(self):
+        if self.table is not None:
+            self.table.drawOn(self.canv, 0, 0)
+            self.pending = []
+
+# Fixed receipt layout: the positions SimpleDocTemplate gives the receipt's
+# flowables on a letter page, so both renderers produce the same document
+RECEIPT_TABLE_X = (PAGE_WIDTH - 6*inch) / 2
+RECEIPT_LABEL_WIDTH = 2*inch
+RECEIPT_TABLE_WIDTH = 6*inch
+RECEIPT_ROW_HEIGHT = 21  # 10pt text: 12pt leading + 3pt top and 6pt bottom padding
+RECEIPT_TEXT_WIDTH = PAGE_WIDTH - 2*inch - 12  # Frame width less its padding
+RECEIPT_TEXT_X = inch + 6
+RECEIPT_BOTTOM = inch + 6
+RECEIPT_NOTES_TOP = 218  # Top of the notes heading
+RECEIPT_FOOTER_HEIGHT = 62  # Closing subtitle and line with their spacing
+
+def _draw_label_table(canvas, top, rows, label_background):
+    """Draw a _label_table_style table of (label, value) rows whose top edge is at `top`"""
+    height = RECEIPT_ROW_HEIGHT * len(rows)
+    x = RECEIPT_TABLE_X
+    canvas.setFillColor(label_background)
+    canvas.rect(x, top - height, RECEIPT_LABEL_WIDTH, height, stroke=0, fill=1)
+
+    canvas.setFillColor(colors.black)
+    canvas.setFont('Helvetica', 10, 12)
+    for index, (label, value) in enumerate(rows):
+        baseline = top - RECEIPT_ROW_HEIGHT * (index + 1) + 8
+        canvas.drawString(x + 6, baseline, label)
+        canvas.drawString(x + RECEIPT_LABEL_WIDTH + 6, baseline, "" if value is None else str(value))
+
+    canvas.setStrokeColor(colors.black)
+    canvas.setLineWidth(1)
+    canvas.rect(x, top - height, RECEIPT_TABLE_WIDTH, height, stroke=1, fill=0)
+    for index in range(1, len(rows)):
+        y = top - RECEIPT_ROW_HEIGHT * index
+        canvas.line(x, y, x + RECEIPT_TABLE_WIDTH, y)
+    canvas.line(x + RECEIPT_LABEL_WIDTH, top, x + RECEIPT_LABEL_WIDTH, top - height)
+
+def _draw_centered_heading(canvas, baseline, text, style):
+    canvas.setFillColor(colors.black)
+    canvas.setFont(style.fontName, style.fontSize)
+    canvas.drawCentredString(RECEIPT_TEXT_X + RECEIPT_TEXT_WIDTH / 2, baseline, text)
+
+def _draw_heading(canvas, baseline, text, style):
+    canvas.setFillColor(colors.black)
+    canvas.setFont(style.fontName, style.fontSize)
+    canvas.drawString(RECEIPT_TEXT_X, baseline, text)
+
 def generate_receipt_pdf(receipt_data):
     """
-    Generate a PDF receipt for a payment
+    Generate a PDF receipt for a payment. The receipt is drawn straight on the
+    canvas at fixed positions; only notes too long for the page go through the
+    flowable layout.
+    """
+    notes = None
+    footer_top = 198
+    if receipt_data.get('notes'):
+        notes = Paragraph(receipt_data['notes'], NORMAL_STYLE)
+        _, notes_height = notes.wrap(RECEIPT_TEXT_WIDTH, PAGE_HEIGHT)
+        footer_top = RECEIPT_NOTES_TOP - 16 - notes_height - 40
+        if footer_top - RECEIPT_FOOTER_HEIGHT < RECEIPT_BOTTOM:
+            return _generate_receipt_pdf_flowables(receipt_data)
+
+    buffer = io.BytesIO()
+    canvas = Canvas(buffer, pagesize=letter)
+    _draw_page_frame(canvas)
+
+    # Header
+    _draw_centered_heading(canvas, 694, "PAGO VECINAL", TITLE_STYLE)
+    _draw_centered_heading(canvas, 648, "Sistema de Gestión de Cuotas de Condominio", SUBTITLE_STYLE)
+
+    # Receipt info
+    _draw_label_table(canvas, 604, [
+        ("Número de Recibo:", receipt_data['correlative_number']),
+        ("Fecha de Emisión:", receipt_data['issue_date'].strftime("%d/%m/%Y %H:%M")),
+        ("Período:", receipt_data.get('fee_period', 'N/A'))
+    ], colors.lightgrey)
+
+    # Property information
+    property_details = receipt_data['property_details']
+    _draw_heading(canvas, 497, "Información de la Propiedad", STYLES['Heading3'])
+    _draw_label_table(canvas, 489, [
+        ("Villa:", property_details['villa']),
+        ("Fila:", property_details['row_letter']),
+        ("Número:", property_details['number']),
+        ("Propietario:", property_details['owner_name']),
+        ("Teléfono:", property_details.get('owner_phone', 'N/A'))
+    ], colors.whitesmoke)
+
+    # Payment details
+    _draw_heading(canvas, 340, "Detalles del Pago", STYLES['Heading3'])
+    _draw_label_table(canvas, 332, [
+        ("Fecha del Pago:", receipt_data['payment_date'].strftime("%d/%m/%Y")),
+        ("Monto Pagado:", f"S/ {receipt_data['total_amount']:.2f}"),
+        ("Estado:", "COMPLETADO"),
+        ("Referencia:", receipt_data.get('reference', 'N/A'))
+    ], colors.lightgreen)
+
+    # Notes
+    if notes:
+        _draw_heading(canvas, RECEIPT_NOTES_TOP - 10, "Notas:", STYLES['Heading4'])
+        notes.drawOn(canvas, RECEIPT_TEXT_X, RECEIPT_NOTES_TOP - 16 - notes_height)
+
+    # Footer
+    _draw_centered_heading(canvas, footer_top - 12 - 14, "¡Gracias por su pago!", SUBTITLE_STYLE)
+    _draw_heading(canvas, footer_top - 12 - 18 - 20 - 10, "Este recibo es válido como comprobante de pago.", NORMAL_STYLE)
+
+    canvas.showPage()
+    canvas.save()
+
+    buffer.seek(0)
+    return buffer
+
+def _generate_receipt_pdf_flowables(receipt_data):
+    """
+    Receipt laid out by SimpleDocTemplate, for notes that do not fit the fixed layout
     """
     buffer = io.BytesIO()
 
     # Create the PDF document
     doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-
-    # Custom styles
-    title_style = ParagraphStyle(
-        'Title',
-        parent=styles['Heading1'],
-        fontSize=20,
-        alignment=TA_CENTER,
-        spaceAfter=30
-    )
-
-    subtitle_style = ParagraphStyle(
-        'Subtitle',
-        parent=styles['Heading2'],
-        fontSize=14,
-        alignment=TA_CENTER,
-        spaceAfter=20
-    )
-
-    normal_style = styles['Normal']
-    normal_style.fontSize = 10
 
     # Build the PDF content
     content = []
 
     # Header
-    content.append(Paragraph("PAGO VECINAL", title_style))
-    content.append(Paragraph("Sistema de Gestión de Cuotas de Condominio", subtitle_style))
+    content.append(Paragraph("PAGO VECINAL", TITLE_STYLE))
+    content.append(Paragraph("Sistema de Gestión de Cuotas de Condominio", SUBTITLE_STYLE))
     content.append(Spacer(1, 20))
 
     # Receipt info
@@ -53,20 +335,12 @@ def generate_receipt_pdf(receipt_data):
     ]
 
     receipt_table = Table(receipt_info, colWidths=[2*inch, 4*inch])
-    receipt_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    receipt_table.setStyle(_label_table_style(colors.lightgrey))
     content.append(receipt_table)
     content.append(Spacer(1, 20))
 
     # Property information
-    content.append(Paragraph("Información de la Propiedad", styles['Heading3']))
+    content.append(Paragraph("Información de la Propiedad", STYLES['Heading3']))
     property_info = [
         ["Villa:", receipt_data['property_details']['villa']],
         ["Fila:", receipt_data['property_details']['row_letter']],
@@ -76,20 +350,12 @@ def generate_receipt_pdf(receipt_data):
     ]
 
     property_table = Table(property_info, colWidths=[2*inch, 4*inch])
-    property_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.whitesmoke),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    property_table.setStyle(_label_table_style(colors.whitesmoke))
     content.append(property_table)
     content.append(Spacer(1, 20))
 
     # Payment details
-    content.append(Paragraph("Detalles del Pago", styles['Heading3']))
+    content.append(Paragraph("Detalles del Pago", STYLES['Heading3']))
     payment_info = [
         ["Fecha del Pago:", receipt_data['payment_date'].strftime("%d/%m/%Y")],
         ["Monto Pagado:", f"S/ {receipt_data['total_amount']:.2f}"],
@@ -98,31 +364,23 @@ def generate_receipt_pdf(receipt_data):
     ]
 
     payment_table = Table(payment_info, colWidths=[2*inch, 4*inch])
-    payment_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.lightgreen),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    payment_table.setStyle(_label_table_style(colors.lightgreen))
     content.append(payment_table)
     content.append(Spacer(1, 20))
 
     # Notes
     if receipt_data.get('notes'):
-        content.append(Paragraph("Notas:", styles['Heading4']))
-        content.append(Paragraph(receipt_data['notes'], normal_style))
+        content.append(Paragraph("Notas:", STYLES['Heading4']))
+        content.append(Paragraph(receipt_data['notes'], NORMAL_STYLE))
         content.append(Spacer(1, 10))
 
     # Footer
     content.append(Spacer(1, 30))
-    content.append(Paragraph("¡Gracias por su pago!", subtitle_style))
-    content.append(Paragraph("Este recibo es válido como comprobante de pago.", normal_style))
+    content.append(Paragraph("¡Gracias por su pago!", SUBTITLE_STYLE))
+    content.append(Paragraph("Este recibo es válido como comprobante de pago.", NORMAL_STYLE))
 
     # Build the PDF
-    doc.build(content)
+    doc.build(content, onFirstPage=_draw_page_frame, onLaterPages=_draw_page_frame)
 
     buffer.seek(0)
     return buffer
@@ -136,38 +394,17 @@ def generate_property_payment_history_pdf(property_data, payments_data, fees_dat
 
     # Create the PDF document
     doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-
-    # Custom styles
-    title_style = ParagraphStyle(
-        'Title',
-        parent=styles['Heading1'],
-        fontSize=20,
-        alignment=TA_CENTER,
-        spaceAfter=30
-    )
-
-    subtitle_style = ParagraphStyle(
-        'Subtitle',
-        parent=styles['Heading2'],
-        fontSize=14,
-        alignment=TA_CENTER,
-        spaceAfter=20
-    )
-
-    normal_style = styles['Normal']
-    normal_style.fontSize = 10
 
     # Build the PDF content
     content = []
 
     # Header
-    content.append(Paragraph("PAGO VECINAL", title_style))
-    content.append(Paragraph("Historial de Pagos por Propiedad", subtitle_style))
+    content.append(Paragraph("PAGO VECINAL", TITLE_STYLE))
+    content.append(Paragraph("Historial de Pagos por Propiedad", SUBTITLE_STYLE))
     content.append(Spacer(1, 20))
 
     # Property information
-    content.append(Paragraph("Información de la Propiedad", styles['Heading3']))
+    content.append(Paragraph("Información de la Propiedad", STYLES['Heading3']))
     property_info = [
         ["Villa:", property_data['villa']],
         ["Fila:", property_data['row_letter']],
@@ -177,89 +414,67 @@ def generate_property_payment_history_pdf(property_data, payments_data, fees_dat
     ]
 
     property_table = Table(property_info, colWidths=[2*inch, 4*inch])
-    property_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.whitesmoke),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    property_table.setStyle(_label_table_style(colors.whitesmoke))
     content.append(property_table)
     content.append(Spacer(1, 20))
 
     # Payments table
     if payments_data:
-        content.append(Paragraph("Pagos Realizados", styles['Heading3']))
+        content.append(Paragraph("Pagos Realizados", STYLES['Heading3']))
         payment_headers = ["Fecha", "Monto", "Estado", "Referencia"]
-        payment_rows = [payment_headers]
-
-        for payment in payments_data:
-            payment_rows.append([
+        payment_rows = (
+            ([
                 payment['payment_date'].strftime("%d/%m/%Y"),
                 f"S/ {payment['amount']:.2f}",
                 payment['status'],
                 payment.get('reference', 'N/A')
-            ])
-
-        payments_table = Table(payment_rows, colWidths=[1.5*inch, 1.5*inch, 1.5*inch, 2*inch])
-        payments_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        content.append(payments_table)
+            ], payment['amount'])
+            for payment in payments_data
+        )
+
+        content.append(_PagedTable(
+            payment_headers, payment_rows, [1.5*inch, 1.5*inch, 1.5*inch, 2*inch],
+            _paged_table_style(colors.beige, 10),
+            lambda subtotal: ["Subtotal página", f"S/ {subtotal:.2f}", "", ""]
+        ))
         content.append(Spacer(1, 10))
 
         # Total payments
         total_payments = sum(p['amount'] for p in payments_data)
-        content.append(Paragraph(f"Total Pagado: S/ {total_payments:.2f}", styles['Heading4']))
+        content.append(Paragraph(f"Total Pagado: S/ {total_payments:.2f}", STYLES['Heading4']))
         content.append(Spacer(1, 20))
 
     # Outstanding fees
     if fees_data:
-        content.append(Paragraph("Cuotas Pendientes", styles['Heading3']))
+        content.append(Paragraph("Cuotas Pendientes", STYLES['Heading3']))
         fee_headers = ["Período", "Monto", "Fecha Vencimiento", "Estado"]
-        fee_rows = [fee_headers]
-
-        for fee in fees_data:
-            fee_rows.append([
+        fee_rows = (
+            ([
                 f"{fee['month']}/{fee['year']}",
                 f"S/ {fee['amount']:.2f}",
                 fee['due_date'].strftime("%d/%m/%Y"),
                 fee['status']
-            ])
-
-        fees_table = Table(fee_rows, colWidths=[1.5*inch, 1.5*inch, 2*inch, 1.5*inch])
-        fees_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightcoral),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        content.append(fees_table)
+            ], fee['amount'])
+            for fee in fees_data
+        )
+
+        content.append(_PagedTable(
+            fee_headers, fee_rows, [1.5*inch, 1.5*inch, 2*inch, 1.5*inch],
+            _paged_table_style(colors.lightcoral, 10),
+            lambda subtotal: ["Subtotal página", f"S/ {subtotal:.2f}", "", ""]
+        ))
         content.append(Spacer(1, 10))
 
         # Total outstanding
         total_outstanding = sum(f['amount'] for f in fees_data)
-        content.append(Paragraph(f"Total Pendiente: S/ {total_outstanding:.2f}", styles['Heading4']))
+        content.append(Paragraph(f"Total Pendiente: S/ {total_outstanding:.2f}", STYLES['Heading4']))
 
     # Footer
     content.append(Spacer(1, 30))
-    content.append(Paragraph(f"Reporte generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}", normal_style))
+    content.append(Paragraph(f"Reporte generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}", NORMAL_STYLE))
 
     # Build the PDF
-    doc.build(content)
+    doc.build(content, onFirstPage=_draw_page_frame, onLaterPages=_draw_page_frame)
 
     buffer.seek(0)
     return buffer
@@ -273,168 +488,98 @@ def generate_agreement_pdf(agreement, property_data, fees_data, installments_dat
 
     # Create the PDF document
     doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-
-    # Custom styles
-    title_style = ParagraphStyle(
-        'Title',
-        parent=styles['Heading1'],
-        fontSize=24,
-        alignment=TA_CENTER,
-        spaceAfter=30
-    )
-
-    subtitle_style = ParagraphStyle(
-        'Subtitle',
-        parent=styles['Heading2'],
-        fontSize=16,
-        alignment=TA_CENTER,
-        spaceAfter=20
-    )
-
-    section_style = ParagraphStyle(
-        'Section',
-        parent=styles['Heading3'],
-        fontSize=14,
-        spaceAfter=15
-    )
-
-    normal_style = styles['Normal']
-    normal_style.fontSize = 10
 
     # Build the PDF content
     content = []
 
     # Header
-    content.append(Paragraph("CONVENIO DE PAGO", title_style))
-    content.append(Paragraph("Sistema de Gestión de Cuotas de Condominio", subtitle_style))
+    content.append(Paragraph("CONVENIO DE PAGO", AGREEMENT_TITLE_STYLE))
+    content.append(Paragraph("Sistema de Gestión de Cuotas de Condominio", AGREEMENT_SUBTITLE_STYLE))
     content.append(Spacer(1, 20))
 
     # Agreement info
-    content.append(Paragraph("Información del Convenio", section_style))
+    content.append(Paragraph("Información del Convenio", SECTION_STYLE))
     agreement_info = [
-        ["Número de Convenio:", agreement.agreement_number],
-        ["Fecha de Creación:", agreement.created_at.strftime("%d/%m/%Y %H:%M")],
-        ["Estado:", agreement.status.value.upper()],
-        ["Fecha de Inicio:", agreement.start_date.strftime("%d/%m/%Y")],
-        ["Fecha de Fin:", agreement.end_date.strftime("%d/%m/%Y")]
+        ["Número de Convenio:", agreement['agreement_number']],
+        ["Fecha de Creación:", agreement['created_at'].strftime("%d/%m/%Y %H:%M")],
+        ["Estado:", agreement['status'].upper()],
+        ["Fecha de Inicio:", agreement['start_date'].strftime("%d/%m/%Y")],
+        ["Fecha de Fin:", agreement['end_date'].strftime("%d/%m/%Y")]
     ]
 
     agreement_table = Table(agreement_info, colWidths=[3*inch, 3*inch])
-    agreement_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    agreement_table.setStyle(_label_table_style(colors.lightgrey))
     content.append(agreement_table)
     content.append(Spacer(1, 20))
 
     # Property information
-    content.append(Paragraph("Información de la Propiedad", section_style))
+    content.append(Paragraph("Información de la Propiedad", SECTION_STYLE))
     property_info = [
-        ["Villa:", property_data.villa],
-        ["Fila:", property_data.row_letter],
-        ["Número:", str(property_data.number)],
-        ["Propietario:", property_data.owner_name],
-        ["Teléfono:", property_data.owner_phone or "N/A"]
+        ["Villa:", property_data['villa']],
+        ["Fila:", property_data['row_letter']],
+        ["Número:", str(property_data['number'])],
+        ["Propietario:", property_data['owner_name']],
+        ["Teléfono:", property_data['owner_phone'] or "N/A"]
     ]
 
     property_table = Table(property_info, colWidths=[2*inch, 4*inch])
-    property_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.whitesmoke),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    property_table.setStyle(_label_table_style(colors.whitesmoke))
     content.append(property_table)
     content.append(Spacer(1, 20))
 
     # Debt summary
-    content.append(Paragraph("Resumen de la Deuda", section_style))
+    content.append(Paragraph("Resumen de la Deuda", SECTION_STYLE))
     debt_info = [
-        ["Deuda Total:", f"S/ {agreement.total_debt:.2f}"],
-        ["Monto Mensual:", f"S/ {agreement.monthly_amount:.2f}"],
-        ["Número de Cuotas:", str(agreement.installments_count)],
-        ["Período del Convenio:", f"{agreement.start_date.strftime('%d/%m/%Y')} - {agreement.end_date.strftime('%d/%m/%Y')}"]
+        ["Deuda Total:", f"S/ {agreement['total_debt']:.2f}"],
+        ["Monto Mensual:", f"S/ {agreement['monthly_amount']:.2f}"],
+        ["Número de Cuotas:", str(agreement['installments_count'])],
+        ["Período del Convenio:", f"{agreement['start_date'].strftime('%d/%m/%Y')} - {agreement['end_date'].strftime('%d/%m/%Y')}"]
     ]
 
     debt_table = Table(debt_info, colWidths=[3*inch, 3*inch])
-    debt_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.lightblue),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    debt_table.setStyle(_label_table_style(colors.lightblue, summary=True))
     content.append(debt_table)
     content.append(Spacer(1, 20))
 
     # Fees covered by agreement
     if fees_data:
-        content.append(Paragraph("Cuotas Incluidas en el Convenio", section_style))
+        content.append(Paragraph("Cuotas Incluidas en el Convenio", SECTION_STYLE))
         fee_headers = ["Período", "Monto", "Fecha Vencimiento"]
         fee_rows = [fee_headers]
 
         for fee in fees_data:
             fee_rows.append([
-                f"{fee.month}/{fee.year}",
-                f"S/ {fee.amount:.2f}",
-                fee.due_date.strftime("%d/%m/%Y")
+                f"{fee['month']}/{fee['year']}",
+                f"S/ {fee['amount']:.2f}",
+                fee['due_date'].strftime("%d/%m/%Y")
             ])
 
         fees_table = Table(fee_rows, colWidths=[1.5*inch, 1.5*inch, 2*inch])
-        fees_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        fees_table.setStyle(_data_table_style(colors.beige, 10))
         content.append(fees_table)
         content.append(Spacer(1, 10))
 
     # Installment schedule
     if installments_data:
-        content.append(Paragraph("Cronograma de Pagos", section_style))
+        content.append(Paragraph("Cronograma de Pagos", SECTION_STYLE))
         installment_headers = ["Cuota", "Monto", "Fecha Vencimiento", "Estado"]
         installment_rows = [installment_headers]
 
         for installment in installments_data:
             installment_rows.append([
-                str(installment.installment_number),
-                f"S/ {installment.amount:.2f}",
-                installment.due_date.strftime("%d/%m/%Y"),
-                installment.status.value.upper()
+                str(installment['installment_number']),
+                f"S/ {installment['amount']:.2f}",
+                installment['due_date'].strftime("%d/%m/%Y"),
+                installment['status'].upper()
             ])
 
         installments_table = Table(installment_rows, colWidths=[1*inch, 1.5*inch, 2*inch, 1.5*inch])
-        installments_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        installments_table.setStyle(_data_table_style(colors.lightgreen, 9))
         content.append(installments_table)
         content.append(Spacer(1, 20))
 
     # Terms and conditions
-    content.append(Paragraph("Términos y Condiciones", section_style))
+    content.append(Paragraph("Términos y Condiciones", SECTION_STYLE))
     terms = [
         "1. El propietario se compromete a pagar las cuotas mensuales según el cronograma establecido.",
         "2. Los pagos deben realizarse antes de la fecha de vencimiento de cada cuota.",
@@ -445,24 +590,24 @@ def generate_agreement_pdf(agreement, property_data, fees_data, installments_dat
     ]
 
     for term in terms:
-        content.append(Paragraph(term, normal_style))
+        content.append(Paragraph(term, NORMAL_STYLE))
         content.append(Spacer(1, 5))
 
     content.append(Spacer(1, 30))
 
     # Notes
-    if agreement.notes:
-        content.append(Paragraph("Notas Adicionales:", styles['Heading4']))
-        content.append(Paragraph(agreement.notes, normal_style))
+    if agreement['notes']:
+        content.append(Paragraph("Notas Adicionales:", STYLES['Heading4']))
+        content.append(Paragraph(agreement['notes'], NORMAL_STYLE))
         content.append(Spacer(1, 20))
 
     # Footer
     content.append(Spacer(1, 30))
-    content.append(Paragraph("Este convenio ha sido generado automáticamente por el sistema.", normal_style))
-    content.append(Paragraph(f"Fecha de generación: {datetime.now().strftime('%d/%m/%Y %H:%M')}", normal_style))
+    content.append(Paragraph("Este convenio ha sido generado automáticamente por el sistema.", NORMAL_STYLE))
+    content.append(Paragraph(f"Fecha de generación: {datetime.now().strftime('%d/%m/%Y %H:%M')}", NORMAL_STYLE))
 
     # Build the PDF
-    doc.build(content)
+    doc.build(content, onFirstPage=_draw_page_frame, onLaterPages=_draw_page_frame)
 
     buffer.seek(0)
     return buffer
@@ -470,77 +615,58 @@ def generate_agreement_pdf(agreement, property_data, fees_data, installments_dat
 
 def generate_outstanding_fees_pdf(fees_data):
     """
-    Generate a PDF report of all outstanding fees
+    Generate a PDF report of all outstanding fees. `fees_data` is iterated twice
+    (totals, then rows), so it can be a RowSpool instead of a list.
     """
     buffer = io.BytesIO()
 
     doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-
-    title_style = ParagraphStyle(
-        'Title',
-        parent=styles['Heading1'],
-        fontSize=20,
-        alignment=TA_CENTER,
-        spaceAfter=30
-    )
-
-    subtitle_style = ParagraphStyle(
-        'Subtitle',
-        parent=styles['Heading2'],
-        fontSize=14,
-        alignment=TA_CENTER,
-        spaceAfter=20
-    )
 
     content = []
 
     # Header
-    content.append(Paragraph("PAGO VECINAL", title_style))
-    content.append(Paragraph("Cuotas Pendientes - Reporte General", subtitle_style))
+    content.append(Paragraph("PAGO VECINAL", TITLE_STYLE))
+    content.append(Paragraph("Cuotas Pendientes - Reporte General", SUBTITLE_STYLE))
     content.append(Spacer(1, 20))
 
-    if fees_data:
-        # Outstanding fees table
-        headers = ["Propiedad", "Propietario", "Período", "Monto", "Fecha Vencimiento"]
-        rows = [headers]
+    total_fees = 0
+    total_amount = 0
+    for fee in fees_data:
+        total_fees += 1
+        total_amount += fee['amount']
 
-        for fee in fees_data:
-            property_str = f"{fee['property_villa']} - {fee['property_row_letter']}{fee['property_number']}"
-            rows.append([
-                property_str,
+    if total_fees:
+        # Outstanding fees table, one page of rows at a time with page subtotals
+        headers = ["Propiedad", "Propietario", "Período", "Monto", "Fecha Vencimiento"]
+        rows = (
+            ([
+                f"{fee['property_villa']} - {fee['property_row_letter']}{fee['property_number']}",
                 fee['property_owner_name'],
                 f"{fee['month']}/{fee['year']}",
                 f"S/ {fee['amount']:.2f}",
                 fee['due_date'].strftime("%d/%m/%Y")
-            ])
-
-        table = Table(rows, colWidths=[2*inch, 2*inch, 1*inch, 1.5*inch, 1.5*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightcoral),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        content.append(table)
+            ], fee['amount'])
+            for fee in fees_data
+        )
+
+        content.append(_PagedTable(
+            headers, rows, [2*inch, 2*inch, 1*inch, 1.5*inch, 1.5*inch],
+            _paged_table_style(colors.lightcoral, 9),
+            lambda subtotal: ["Subtotal página", "", "", f"S/ {subtotal:.2f}", ""]
+        ))
         content.append(Spacer(1, 10))
 
         # Summary
-        total_amount = sum(f['amount'] for f in fees_data)
-        content.append(Paragraph(f"Total Cuotas Pendientes: {len(fees_data)}", styles['Heading4']))
-        content.append(Paragraph(f"Monto Total Pendiente: S/ {total_amount:.2f}", styles['Heading4']))
+        content.append(Paragraph(f"Total Cuotas Pendientes: {total_fees}", STYLES['Heading4']))
+        content.append(Paragraph(f"Monto Total Pendiente: S/ {total_amount:.2f}", STYLES['Heading4']))
     else:
-        content.append(Paragraph("No hay cuotas pendientes.", styles['Normal']))
+        content.append(Paragraph("No hay cuotas pendientes.", NORMAL_STYLE))
 
     # Footer
     content.append(Spacer(1, 30))
-    content.append(Paragraph(f"Reporte generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
+    content.append(Paragraph(f"Reporte generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}", NORMAL_STYLE))
 
-    doc.build(content)
+    doc.build(content, onFirstPage=_draw_page_frame, onLaterPages=_draw_page_frame)
 
     buffer.seek(0)
     return buffer
@@ -548,78 +674,58 @@ def generate_outstanding_fees_pdf(fees_data):
 
 def generate_monthly_payment_summary_pdf(year, month, payments_data):
     """
-    Generate a PDF summary of payments for a specific month
+    Generate a PDF summary of payments for a specific month. `payments_data` is
+    iterated twice (totals, then rows), so it can be a RowSpool instead of a list.
     """
     buffer = io.BytesIO()
 
     doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-
-    title_style = ParagraphStyle(
-        'Title',
-        parent=styles['Heading1'],
-        fontSize=20,
-        alignment=TA_CENTER,
-        spaceAfter=30
-    )
-
-    subtitle_style = ParagraphStyle(
-        'Subtitle',
-        parent=styles['Heading2'],
-        fontSize=14,
-        alignment=TA_CENTER,
-        spaceAfter=20
-    )
 
     content = []
 
     # Header
-    content.append(Paragraph("PAGO VECINAL", title_style))
-    content.append(Paragraph(f"Resumen de Pagos - {month:02d}/{year}", subtitle_style))
+    content.append(Paragraph("PAGO VECINAL", TITLE_STYLE))
+    content.append(Paragraph(f"Resumen de Pagos - {month:02d}/{year}", SUBTITLE_STYLE))
     content.append(Spacer(1, 20))
 
-    if payments_data:
-        # Payments table
-        headers = ["Propiedad", "Propietario", "Fecha Pago", "Monto", "Estado"]
-        rows = [headers]
+    total_payments = 0
+    total_amount = 0
+    for payment in payments_data:
+        total_payments += 1
+        total_amount += payment['amount']
 
-        for payment in payments_data:
-            property_str = f"{payment['property_villa']} - {payment['property_row_letter']}{payment['property_number']}"
-            rows.append([
-                property_str,
+    if total_payments:
+        # Payments table, one page of rows at a time with page subtotals
+        headers = ["Propiedad", "Propietario", "Fecha Pago", "Monto", "Estado"]
+        rows = (
+            ([
+                f"{payment['property_villa']} - {payment['property_row_letter']}{payment['property_number']}",
                 payment['property_owner_name'],
                 payment['payment_date'].strftime("%d/%m/%Y"),
                 f"S/ {payment['amount']:.2f}",
                 payment['status']
-            ])
-
-        table = Table(rows, colWidths=[2*inch, 2*inch, 1.5*inch, 1.5*inch, 1*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        content.append(table)
+            ], payment['amount'])
+            for payment in payments_data
+        )
+
+        content.append(_PagedTable(
+            headers, rows, [2*inch, 2*inch, 1.5*inch, 1.5*inch, 1*inch],
+            _paged_table_style(colors.lightgreen, 9),
+            lambda subtotal: ["Subtotal página", "", "", f"S/ {subtotal:.2f}", ""]
+        ))
         content.append(Spacer(1, 10))
 
         # Summary
-        total_payments = len(payments_data)
-        total_amount = sum(p['amount'] for p in payments_data)
-        content.append(Paragraph(f"Total Pagos: {total_payments}", styles['Heading4']))
-        content.append(Paragraph(f"Monto Total Recaudado: S/ {total_amount:.2f}", styles['Heading4']))
+        content.append(Paragraph(f"Total Pagos: {total_payments}", STYLES['Heading4']))
+        content.append(Paragraph(f"Monto Total Recaudado: S/ {total_amount:.2f}", STYLES['Heading4']))
     else:
-        content.append(Paragraph("No hay pagos registrados para este período.", styles['Normal']))
+        content.append(Paragraph("No hay pagos registrados para este período.", NORMAL_STYLE))
 
     # Footer
     content.append(Spacer(1, 30))
-    content.append(Paragraph(f"Reporte generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
+    content.append(Paragraph(f"Reporte generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}", NORMAL_STYLE))
 
-    doc.build(content)
+    doc.build(content, onFirstPage=_draw_page_frame, onLaterPages=_draw_page_frame)
 
     buffer.seek(0)
     return buffer
@@ -632,33 +738,16 @@ def generate_annual_property_statement_pdf(property_data, year, fees_data, payme
     buffer = io.BytesIO()
 
     doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-
-    title_style = ParagraphStyle(
-        'Title',
-        parent=styles['Heading1'],
-        fontSize=20,
-        alignment=TA_CENTER,
-        spaceAfter=30
-    )
-
-    subtitle_style = ParagraphStyle(
-        'Subtitle',
-        parent=styles['Heading2'],
-        fontSize=14,
-        alignment=TA_CENTER,
-        spaceAfter=20
-    )
 
     content = []
 
     # Header
-    content.append(Paragraph("PAGO VECINAL", title_style))
-    content.append(Paragraph(f"Estado Anual {year} - Propiedad", subtitle_style))
+    content.append(Paragraph("PAGO VECINAL", TITLE_STYLE))
+    content.append(Paragraph(f"Estado Anual {year} - Propiedad", SUBTITLE_STYLE))
     content.append(Spacer(1, 20))
 
     # Property information
-    content.append(Paragraph("Información de la Propiedad", styles['Heading3']))
+    content.append(Paragraph("Información de la Propiedad", STYLES['Heading3']))
     property_info = [
         ["Villa:", property_data['villa']],
         ["Fila:", property_data['row_letter']],
@@ -668,15 +757,7 @@ def generate_annual_property_statement_pdf(property_data, year, fees_data, payme
     ]
 
     property_table = Table(property_info, colWidths=[2*inch, 4*inch])
-    property_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.whitesmoke),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    property_table.setStyle(_label_table_style(colors.whitesmoke))
     content.append(property_table)
     content.append(Spacer(1, 20))
 
@@ -692,20 +773,12 @@ def generate_annual_property_statement_pdf(property_data, year, fees_data, payme
     ]
 
     summary_table = Table(summary_data, colWidths=[3*inch, 3*inch])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.lightblue),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    summary_table.setStyle(_label_table_style(colors.lightblue, summary=True))
     content.append(summary_table)
     content.append(Spacer(1, 20))
 
     # Detailed breakdown by month
-    content.append(Paragraph("Detalle por Mes", styles['Heading3']))
+    content.append(Paragraph("Detalle por Mes", STYLES['Heading3']))
 
     # Create monthly breakdown
     monthly_data = {}
@@ -740,23 +813,85 @@ def generate_annual_property_statement_pdf(property_data, year, fees_data, payme
         ])
 
     monthly_table = Table(monthly_rows, colWidths=[1.5*inch, 1.5*inch, 1.5*inch, 1.5*inch])
-    monthly_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 9),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    monthly_table.setStyle(_data_table_style(colors.beige, 9))
     content.append(monthly_table)
 
     # Footer
     content.append(Spacer(1, 30))
-    content.append(Paragraph(f"Estado generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
+    content.append(Paragraph(f"Estado generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}", NORMAL_STYLE))
+
+    doc.build(content, onFirstPage=_draw_page_frame, onLaterPages=_draw_page_frame)
+
+    buffer.seek(0)
+    return buffer
+
+def generate_fee_aging_pdf(report):
+    """
+    Generate a PDF aging report of the outstanding balance, with the top debtors
+    """
+    buffer = io.BytesIO()
+
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+
+    content = []
+
+    # Header
+    content.append(Paragraph("PAGO VECINAL", TITLE_STYLE))
+    content.append(Paragraph(f"Antigüedad de Deuda al {report['as_of'].strftime('%d/%m/%Y')}", SUBTITLE_STYLE))
+    content.append(Spacer(1, 20))
+
+    bucket_keys = [bucket['key'] for bucket in report['buckets']]
+    bucket_labels = [bucket['label'] for bucket in report['buckets']]
+    col_widths = [1.9*inch, 0.5*inch] + [0.82*inch] * (len(bucket_keys) + 1)
+
+    def aging_table(first_header, items, totals=None):
+        rows = [[first_header, "Cuotas"] + bucket_labels + ["Total"]]
+        for item in items:
+            label = item['label']
+            if item.get('owner_name'):
+                label = f"{label}<br/>{item['owner_name']}"
+            rows.append(
+                [Paragraph(label, AGING_CELL_STYLE), item['fee_count']] +
+                [f"S/ {item[key]:.2f}" for key in bucket_keys + ['total']]
+            )
+        if totals:
+            rows.append(["Total", totals['fee_count']] + [f"S/ {totals[key]:.2f}" for key in bucket_keys + ['total']])
+
+        table = Table(rows, colWidths=col_widths, repeatRows=1)
+        table_style = [
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]
+        if totals:
+            table_style.append(('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'))
+            table_style.append(('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey))
+        table.setStyle(TableStyle(table_style))
+        return table
+
+    group_titles = {"property": "Propiedad", "row": "Fila", "villa": "Villa"}
+
+    if report['groups']:
+        content.append(Paragraph(f"Principales Deudores (Top {len(report['top_debtors'])})", STYLES['Heading3']))
+        content.append(aging_table("Propiedad", report['top_debtors']))
+        content.append(Spacer(1, 20))
+
+        content.append(Paragraph("Detalle", STYLES['Heading3']))
+        content.append(aging_table(group_titles.get(report['group_by'], "Grupo"), report['groups'], report['totals']))
+    else:
+        content.append(Paragraph("No hay cuotas vencidas pendientes de pago.", NORMAL_STYLE))
+
+    # Footer
+    content.append(Spacer(1, 30))
+    content.append(Paragraph(f"Reporte generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}", NORMAL_STYLE))
 
-    doc.build(content)
+    doc.build(content, onFirstPage=_draw_page_frame, onLaterPages=_draw_page_frame)
 
     buffer.seek(0)
-    return buffer
\ No newline at end of file
+    return buffer
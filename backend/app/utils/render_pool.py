@@ -0,0 +1,174 @@
+import asyncio
+import importlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+from fastapi import HTTPException, status
+
+# ReportLab and openpyxl rendering is CPU bound and holds the GIL, so documents are
+# rendered in worker processes; routes send plain data and await the bytes
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(min(2, os.cpu_count() or 1))))
+RENDER_QUEUE_LIMIT = int(os.getenv("RENDER_QUEUE_LIMIT", "8"))  # Jobs waiting for a worker
+RENDER_TIMEOUT_SECONDS = float(os.getenv("RENDER_TIMEOUT_SECONDS", "120"))
+
+# Renderer name -> generator returning a BytesIO; only these can be run in the pool
+RENDERERS = {
+    "receipt_pdf": "app.utils.pdf_generator:generate_receipt_pdf",
+    "agreement_pdf": "app.utils.pdf_generator:generate_agreement_pdf",
+    "property_payment_history_pdf": "app.utils.pdf_generator:generate_property_payment_history_pdf",
+    "outstanding_fees_pdf": "app.utils.pdf_generator:generate_outstanding_fees_pdf",
+    "monthly_payment_summary_pdf": "app.utils.pdf_generator:generate_monthly_payment_summary_pdf",
+    "annual_property_statement_pdf": "app.utils.pdf_generator:generate_annual_property_statement_pdf",
+    "fee_aging_pdf": "app.utils.pdf_generator:generate_fee_aging_pdf",
+    "property_payment_history_excel": "app.utils.excel_generator:generate_property_payment_history_excel",
+    "annual_property_statement_excel": "app.utils.excel_generator:generate_annual_property_statement_excel",
+    "fee_aging_excel": "app.utils.excel_generator:generate_fee_aging_excel",
+}
+
+class RenderQueueFull(Exception):
+    """Every worker is busy and RENDER_QUEUE_LIMIT jobs are already waiting"""
+
+class RenderTimeout(Exception):
+    """A document took longer than its timeout to render"""
+
+def _render_in_worker(renderer: str, args: tuple):
+    """Runs in a worker process: the document's bytes and the seconds spent rendering it"""
+    started = time.perf_counter()
+    module_name, function_name = RENDERERS[renderer].split(":")
+    generator = getattr(importlib.import_module(module_name), function_name)
+    data = generator(*args).getvalue()
+    return data, time.perf_counter() - started
+
+class RenderPool:
+    """
+    Process pool for document rendering with a bounded number of pending jobs,
+    per-job timeouts and counters (wait time is the time to result minus the
+    render time measured in the worker). The workers are started on first use; each
+    uvicorn worker has its own pool.
+    """
+
+    def __init__(self, workers: int, queue_limit: int, timeout_seconds: float):
+        self.workers = max(1, workers)
+        self.queue_limit = max(0, queue_limit)
+        self.timeout_seconds = timeout_seconds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0  # Submitted and not finished, running or waiting
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.rejected = 0
+        self._renderers: Dict[str, dict] = {}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs an event loop and Motor's threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _record(self, renderer: str, outcome: str, total_seconds: float, render_seconds: float = 0.0):
+        stats = self._renderers.setdefault(renderer, {
+            "completed": 0, "failed": 0, "timed_out": 0,
+            "total_render_seconds": 0.0, "max_render_seconds": 0.0, "max_wait_seconds": 0.0
+        })
+        stats[outcome] += 1
+        stats["total_render_seconds"] += render_seconds
+        stats["max_render_seconds"] = max(stats["max_render_seconds"], render_seconds)
+        stats["max_wait_seconds"] = max(stats["max_wait_seconds"], total_seconds - render_seconds)
+
+    async def render(self, renderer: str, *args, timeout: Optional[float] = None) -> bytes:
+        """
+        Render a document in a worker process from plain data (dicts, lists, datetimes)
+        and return its bytes. Raises RenderQueueFull when the pool is saturated and
+        RenderTimeout when the job does not finish within `timeout` seconds.
+        """
+        if renderer not in RENDERERS:
+            raise ValueError(f"Unknown renderer: {renderer}")
+        if self._in_flight >= self.workers + self.queue_limit:
+            self.rejected += 1
+            raise RenderQueueFull(f"{self._in_flight} documents rendering or waiting")
+
+        loop = asyncio.get_running_loop()
+
+        def finished():
+            # A timed out job keeps its slot until its worker is actually free
+            self._in_flight -= 1
+
+        self.submitted += 1
+        self._in_flight += 1
+        queued_at = time.perf_counter()
+        try:
+            future = self._get_executor().submit(_render_in_worker, renderer, args)
+        except BrokenProcessPool:
+            self.shutdown()
+            future = self._get_executor().submit(_render_in_worker, renderer, args)
+        future.add_done_callback(lambda _: loop.is_closed() or loop.call_soon_threadsafe(finished))
+
+        timeout = timeout or self.timeout_seconds
+        try:
+            data, render_seconds = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            future.cancel()  # Only effective while the job is still waiting
+            self.timed_out += 1
+            self._record(renderer, "timed_out", time.perf_counter() - queued_at)
+            raise RenderTimeout(f"{renderer} did not finish in {timeout:g}s")
+        except Exception as e:
+            self.failed += 1
+            self._record(renderer, "failed", time.perf_counter() - queued_at)
+            if isinstance(e, BrokenProcessPool):
+                # A worker died (e.g. out of memory): start a fresh pool for the next job
+                self.shutdown()
+            raise
+
+        self.completed += 1
+        self._record(renderer, "completed", time.perf_counter() - queued_at, render_seconds)
+        return data
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "timeout_seconds": self.timeout_seconds,
+            "running": min(self._in_flight, self.workers),
+            "waiting": max(0, self._in_flight - self.workers),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "rejected": self.rejected,
+            "renderers": {
+                renderer: {
+                    **stats,
+                    "avg_render_seconds": round(stats["total_render_seconds"] / max(1, stats["completed"]), 3)
+                }
+                for renderer, stats in self._renderers.items()
+            }
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+render_pool = RenderPool(RENDER_WORKERS, RENDER_QUEUE_LIMIT, RENDER_TIMEOUT_SECONDS)
+
+async def render(renderer: str, *args) -> bytes:
+    """render_pool.render for routes: a saturated pool is a 503 and a timeout a 504"""
+    try:
+        return await render_pool.render(renderer, *args)
+    except RenderQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many documents being generated, please try again in a moment"
+        )
+    except RenderTimeout:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Document generation took too long"
+        )
@@ -0,0 +1,282 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Callable, Dict, NamedTuple, Optional, Set, Tuple, Type
+from beanie import PydanticObjectId
+from beanie.operators import In
+from ..models.report_job import (
+    ReportJob, ReportJobStatus, ReportType, ReportParams,
+    FilteredFeesParams, MonthlyFeesParams, OutstandingFeesParams
+)
+from .data_version import get_data_version
+from .excel_generator import (
+    stream_all_payments_excel,
+    stream_expenses_excel,
+    stream_filtered_fees_excel,
+    stream_monthly_fees_excel,
+    stream_outstanding_fees_excel
+)
+from .render_pool import render_pool
+from .row_spool import spool_rows
+from .report_queries import (
+    all_payment_rows,
+    expense_rows,
+    filtered_fee_rows,
+    monthly_fee_rows,
+    outstanding_fee_rows,
+    fee_report_filters,
+    period_range_error
+)
+
+REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", "2"))  # Jobs run at once per API worker
+REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "pago_vecinal_reports"))
+REPORT_CACHE_TTL_SECONDS = int(os.getenv("REPORT_CACHE_TTL_SECONDS", "900"))
+# Queued and running jobs refresh heartbeat_at this often; one whose heartbeat is
+# older than REPORT_JOB_STALE_SECONDS was lost with its worker (restart, crash)
+REPORT_JOB_HEARTBEAT_SECONDS = int(os.getenv("REPORT_JOB_HEARTBEAT_SECONDS", "15"))
+REPORT_JOB_STALE_SECONDS = int(os.getenv("REPORT_JOB_STALE_SECONDS", "120"))
+# Files with no completed job (job document gone, crashed job's .part) are removed this long after the TTL
+REPORT_ORPHAN_FILE_SECONDS = 1800
+
+EXCEL_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+class ReportOutput(NamedTuple):
+    chunks: AsyncIterator[bytes]
+    media_type: str
+    filename: str
+
+async def _single_chunk(content: bytes) -> AsyncIterator[bytes]:
+    yield content
+
+def _timestamp() -> str:
+    return datetime.now().strftime('%Y%m%d_%H%M%S')
+
+async def _all_payments(params: ReportParams) -> ReportOutput:
+    return ReportOutput(
+        stream_all_payments_excel(all_payment_rows()), EXCEL_MEDIA_TYPE,
+        f"reporte_pagos_completo_{_timestamp()}.xlsx"
+    )
+
+async def _expenses(params: ReportParams) -> ReportOutput:
+    return ReportOutput(
+        stream_expenses_excel(expense_rows()), EXCEL_MEDIA_TYPE,
+        f"reporte_gastos_administrativos_{_timestamp()}.xlsx"
+    )
+
+async def _filtered_fees(params: FilteredFeesParams) -> ReportOutput:
+    query_filters = fee_report_filters(params.year, params.month, params.status, params.property_id)
+    return ReportOutput(
+        stream_filtered_fees_excel(filtered_fee_rows(query_filters)), EXCEL_MEDIA_TYPE,
+        f"cuotas_filtradas_{_timestamp()}.xlsx"
+    )
+
+async def _monthly_fees(params: MonthlyFeesParams) -> ReportOutput:
+    period = (params.start_year, params.start_month, params.end_year, params.end_month)
+    error = period_range_error(*period)
+    if error:
+        raise ValueError(error)
+    return ReportOutput(
+        stream_monthly_fees_excel(monthly_fee_rows(*period), *period), EXCEL_MEDIA_TYPE,
+        f"cuotas_mensuales_{params.start_year}_{params.start_month:02d}_a_{params.end_year}_{params.end_month:02d}.xlsx"
+    )
+
+async def _outstanding_fees(params: OutstandingFeesParams) -> ReportOutput:
+    date = datetime.now().strftime('%Y%m%d')
+    if params.format.lower() == "excel":
+        return ReportOutput(
+            stream_outstanding_fees_excel(outstanding_fee_rows()), EXCEL_MEDIA_TYPE,
+            f"cuotas_pendientes_{date}.xlsx"
+        )
+    fees_data = await spool_rows(outstanding_fee_rows())
+    try:
+        pdf = await render_pool.render("outstanding_fees_pdf", fees_data)
+    finally:
+        fees_data.close()
+    return ReportOutput(_single_chunk(pdf), "application/pdf", f"cuotas_pendientes_{date}.pdf")
+
+# Report type -> (params model, builder)
+REPORT_BUILDERS: Dict[ReportType, Tuple[Type[ReportParams], Callable[..., Awaitable[ReportOutput]]]] = {
+    ReportType.ALL_PAYMENTS: (ReportParams, _all_payments),
+    ReportType.EXPENSES: (ReportParams, _expenses),
+    ReportType.FILTERED_FEES: (FilteredFeesParams, _filtered_fees),
+    ReportType.MONTHLY_FEES: (MonthlyFeesParams, _monthly_fees),
+    ReportType.OUTSTANDING_FEES: (OutstandingFeesParams, _outstanding_fees),
+}
+
+def normalize_params(report: ReportType, params: dict) -> dict:
+    """Validated params with defaults filled in; raises pydantic's ValidationError"""
+    params_model, _ = REPORT_BUILDERS[report]
+    return params_model(**params).model_dump()
+
+async def build_report(report: ReportType, params: dict) -> ReportOutput:
+    """The report's content (produced while it is read), media type and filename"""
+    params_model, builder = REPORT_BUILDERS[report]
+    return await builder(params_model(**params))
+
+def spec_hash(report: ReportType, params: dict) -> str:
+    spec = json.dumps({"report": report.value, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(spec.encode()).hexdigest()
+
+# Background job tasks of this process, kept referenced until they finish
+_job_tasks: Set[asyncio.Task] = set()
+_job_ids: Set[PydanticObjectId] = set()  # Jobs of this process not finished yet
+_job_slots: Optional[asyncio.Semaphore] = None
+_heartbeat_task: Optional[asyncio.Task] = None
+
+def _is_stale(job: ReportJob) -> bool:
+    return (
+        job.status in (ReportJobStatus.QUEUED, ReportJobStatus.RUNNING)
+        and (job.heartbeat_at or job.created_at) < datetime.utcnow() - timedelta(seconds=REPORT_JOB_STALE_SECONDS)
+    )
+
+async def _heartbeat():
+    """Refresh heartbeat_at of this process's jobs, one update for all, while any is unfinished"""
+    while _job_ids:
+        try:
+            await ReportJob.find(In(ReportJob.id, list(_job_ids))).update(
+                {"$set": {"heartbeat_at": datetime.utcnow()}}
+            )
+        except Exception as e:
+            print(f"⚠️  Could not refresh report job heartbeats: {e}")
+        await asyncio.sleep(REPORT_JOB_HEARTBEAT_SECONDS)
+
+async def mark_if_stale(job: ReportJob) -> ReportJob:
+    """Fail a job whose worker went away, so it is resubmitted instead of awaited forever"""
+    if _is_stale(job):
+        job.status = ReportJobStatus.FAILED
+        job.error = "The job was interrupted"
+        job.finished_at = datetime.utcnow()
+        job.expires_at = job.finished_at + timedelta(seconds=REPORT_CACHE_TTL_SECONDS)
+        await job.save()
+    return job
+
+def result_available(job: ReportJob) -> bool:
+    return (
+        job.status == ReportJobStatus.COMPLETED
+        and job.expires_at is not None and job.expires_at > datetime.utcnow()
+        and job.file_path is not None and os.path.exists(job.file_path)
+    )
+
+async def evict_expired_reports():
+    """Delete result files past their TTL (and any left behind) and mark their jobs expired"""
+    now = datetime.utcnow()
+    expired = await ReportJob.find(
+        ReportJob.status == ReportJobStatus.COMPLETED, ReportJob.expires_at < now
+    ).to_list()
+    for job in expired:
+        if job.file_path:
+            try:
+                os.remove(job.file_path)
+            except FileNotFoundError:
+                pass  # Already evicted by another worker or request
+    if expired:
+        await ReportJob.find(In(ReportJob.id, [job.id for job in expired])).update(
+            {"$set": {"status": ReportJobStatus.EXPIRED.value, "file_path": None}}
+        )
+
+    # Files whose job document is gone or that a crashed job never finished
+    if os.path.isdir(REPORT_CACHE_DIR):
+        cutoff = time.time() - REPORT_CACHE_TTL_SECONDS - REPORT_ORPHAN_FILE_SECONDS
+        for name in os.listdir(REPORT_CACHE_DIR):
+            path = os.path.join(REPORT_CACHE_DIR, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass  # Removed by a concurrent eviction or renamed by its job
+
+async def _run_report_job(job_id: PydanticObjectId):
+    async with _job_slots:
+        job = await ReportJob.get(job_id)
+        if not job:
+            return
+        job.status = ReportJobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        await job.save()
+
+        part_path = None
+        try:
+            output = await build_report(job.report, job.params)
+            os.makedirs(REPORT_CACHE_DIR, exist_ok=True)
+            extension = os.path.splitext(output.filename)[1]
+            file_path = os.path.join(REPORT_CACHE_DIR, f"{job.id}{extension}")
+            part_path = f"{file_path}.part"
+            size = 0
+            with open(part_path, "wb") as f:
+                async for chunk in output.chunks:
+                    f.write(chunk)
+                    size += len(chunk)
+            os.replace(part_path, file_path)
+
+            job.status = ReportJobStatus.COMPLETED
+            job.file_path = file_path
+            job.filename = output.filename
+            job.media_type = output.media_type
+            job.size = size
+        except Exception as e:
+            print(f"❌ Report job {job.id} ({job.report.value}) failed: {e}")
+            job.status = ReportJobStatus.FAILED
+            job.error = str(e)
+            if part_path and os.path.exists(part_path):
+                os.remove(part_path)
+
+        job.finished_at = datetime.utcnow()
+        job.expires_at = job.finished_at + timedelta(seconds=REPORT_CACHE_TTL_SECONDS)
+        await job.save()
+
+def _start_job(job: ReportJob):
+    global _job_slots, _heartbeat_task
+    if _job_slots is None:
+        _job_slots = asyncio.Semaphore(REPORT_JOB_WORKERS)
+    task = asyncio.create_task(_run_report_job(job.id))
+    _job_tasks.add(task)
+    task.add_done_callback(_job_tasks.discard)
+
+    _job_ids.add(job.id)
+    task.add_done_callback(lambda _: _job_ids.discard(job.id))
+    if _heartbeat_task is None or _heartbeat_task.done():
+        _heartbeat_task = asyncio.create_task(_heartbeat())
+
+async def submit_report_job(report: ReportType, params: dict, user_id=None) -> Tuple[ReportJob, bool]:
+    """
+    Queue a report, or return the job of an identical spec at the current data
+    version when it is still pending or its result is cached. Returns (job, cached).
+    Raises ValueError for invalid params.
+    """
+    params = normalize_params(report, params)
+    if report == ReportType.MONTHLY_FEES:
+        error = period_range_error(params["start_year"], params["start_month"], params["end_year"], params["end_month"])
+        if error:
+            raise ValueError(error)
+
+    await evict_expired_reports()
+
+    key = spec_hash(report, params)
+    data_version = await get_data_version()
+    existing = await ReportJob.find(
+        ReportJob.spec_hash == key,
+        ReportJob.data_version == data_version,
+        In(ReportJob.status, [ReportJobStatus.QUEUED, ReportJobStatus.RUNNING, ReportJobStatus.COMPLETED])
+    ).sort(-ReportJob.created_at).first_or_none()
+    if existing:
+        existing = await mark_if_stale(existing)
+        if existing.status in (ReportJobStatus.QUEUED, ReportJobStatus.RUNNING) or result_available(existing):
+            return existing, True
+
+    now = datetime.utcnow()
+    job = ReportJob(
+        report=report,
+        params=params,
+        spec_hash=key,
+        data_version=data_version,
+        user_id=user_id,
+        created_at=now,
+        heartbeat_at=now
+    )
+    await job.insert()
+    _start_job(job)
+    return job, False
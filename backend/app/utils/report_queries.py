@@ -0,0 +1,280 @@
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+from bson import ObjectId
+from ..models.fee import FeeStatus, UNPAID_FEE_STATUSES
+from ..models.payment import PaymentStatus
+from ..config.database import database
+
+# Report rows come from one aggregation per report: match and sort on indexed
+# fields, join what the generators print, project exactly their fields, and
+# stream the cursor instead of loading every document and fetching links per row.
+
+def _join_property(local_field: str, required: bool = True) -> List[dict]:
+    """
+    Stages adding property_villa/row_letter/number/owner_name from `properties`.
+    With `required`, rows whose property no longer exists are dropped.
+    """
+    return [
+        {"$lookup": {
+            "from": "properties",
+            "localField": local_field,
+            "foreignField": "_id",
+            "as": "property_data"
+        }},
+        *([{"$match": {"property_data.0": {"$exists": True}}}] if required else []),
+        {"$set": {
+            "property_villa": {"$ifNull": [{"$arrayElemAt": ["$property_data.villa", 0]}, "N/A"]},
+            "property_row_letter": {"$ifNull": [{"$arrayElemAt": ["$property_data.row_letter", 0]}, "N/A"]},
+            "property_number": {"$ifNull": [{"$arrayElemAt": ["$property_data.number", 0]}, 0]},
+            "property_owner_name": {"$ifNull": [
+                {"$arrayElemAt": ["$property_data.owner_name", 0]}, "Propietario no registrado"
+            ]}
+        }}
+    ]
+
+def _project(*fields: str) -> dict:
+    return {"$project": {"_id": 0, **{field: 1 for field in fields}}}
+
+PROPERTY_FIELDS = ("property_villa", "property_row_letter", "property_number", "property_owner_name")
+
+async def _stream(collection, pipeline: List[dict]) -> AsyncIterator[dict]:
+    async for row in collection.aggregate(pipeline, allowDiskUse=True):
+        yield row
+
+def period_range_filter(start_year: int, start_month: int, end_year: int, end_month: int) -> dict:
+    """Fees whose (year, month) lies in the inclusive range, on the indexed period fields"""
+    if start_year == end_year:
+        return {"year": start_year, "month": {"$gte": start_month, "$lte": end_month}}
+    return {"$or": [
+        {"year": start_year, "month": {"$gte": start_month}},
+        {"year": {"$gt": start_year, "$lt": end_year}},
+        {"year": end_year, "month": {"$lte": end_month}}
+    ]}
+
+def period_range_error(start_year: int, start_month: int, end_year: int, end_month: int) -> Optional[str]:
+    """Why a report period range is invalid, or None"""
+    if start_month < 1 or start_month > 12 or end_month < 1 or end_month > 12:
+        return "Months must be between 1 and 12"
+    if start_year * 12 + start_month > end_year * 12 + end_month:
+        return "Start period must be before or equal to end period"
+    return None
+
+def fee_report_filters(
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    status: Optional[str] = None,
+    property_id: Optional[str] = None
+) -> dict:
+    """Fee query of the fee list filters (same as in fees.py) for filtered_fee_rows"""
+    query_filters = {}
+
+    if year is not None:
+        query_filters["year"] = year
+
+    if month is not None:
+        query_filters["month"] = month
+
+    if status is not None and status.strip():
+        # Support multiple statuses separated by comma
+        status_list = [s.strip() for s in status.split(',')]
+        if len(status_list) == 1:
+            query_filters["status"] = status_list[0]
+        else:
+            query_filters["status"] = {"$in": status_list}
+
+    if property_id is not None and property_id.strip():
+        query_filters["property.$id"] = ObjectId(property_id)
+
+    return query_filters
+
+def outstanding_fee_rows() -> AsyncIterator[dict]:
+    """Unpaid fees, by property then period"""
+    return _stream(database.fees, [
+        {"$match": {"status": {"$in": [fee_status.value for fee_status in UNPAID_FEE_STATUSES]}}},
+        {"$sort": {"property_row_letter": 1, "property_number": 1, "year": 1, "month": 1, "_id": 1}},
+        *_join_property("property.$id"),
+        _project(*PROPERTY_FIELDS, "month", "year", "amount", "due_date")
+    ])
+
+def monthly_payment_rows(year: int, month: int) -> AsyncIterator[dict]:
+    """Payments made in one calendar month, oldest first"""
+    return _stream(database.payments, [
+        {"$match": {"payment_year": year, "payment_month": month}},
+        {"$sort": {"payment_date": 1, "_id": 1}},
+        *_join_property("property_id"),
+        _project(*PROPERTY_FIELDS, "payment_date", "amount", "status")
+    ])
+
+def monthly_fee_rows(start_year: int, start_month: int, end_year: int, end_month: int) -> AsyncIterator[dict]:
+    """Fees of a period range, by property then period"""
+    return _stream(database.fees, [
+        {"$match": period_range_filter(start_year, start_month, end_year, end_month)},
+        *_join_property("property.$id"),
+        {"$sort": {"property_villa": 1, "property_row_letter": 1, "property_number": 1, "year": 1, "month": 1, "_id": 1}},
+        _project(*PROPERTY_FIELDS, "month", "year", "amount", "due_date", "status")
+    ])
+
+def all_payment_rows() -> AsyncIterator[dict]:
+    """Every payment whose fee still exists, newest first, with the fee reference"""
+    return _stream(database.payments, [
+        {"$sort": {"payment_date": -1, "_id": 1}},
+        {"$lookup": {
+            "from": "fees",
+            "localField": "fee.$id",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"reference": 1}}],
+            "as": "fee_data"
+        }},
+        {"$match": {"fee_data.0": {"$exists": True}}},
+        {"$set": {"fee_reference": {"$ifNull": [{"$arrayElemAt": ["$fee_data.reference", 0]}, "N/A"]}}},
+        *_join_property("property_id", required=False),
+        _project(*PROPERTY_FIELDS, "payment_date", "amount", "status", "fee_reference", "notes")
+    ])
+
+def expense_rows() -> AsyncIterator[dict]:
+    """Every administrative expense, newest first, with the name of who recorded it"""
+    return _stream(database.expenses, [
+        {"$sort": {"expense_date": -1, "_id": 1}},
+        {"$lookup": {
+            "from": "users",
+            "localField": "user.$id",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"full_name": 1}}],
+            "as": "user_data"
+        }},
+        {"$set": {"created_by": {"$ifNull": [{"$arrayElemAt": ["$user_data.full_name", 0]}, "N/A"]}}},
+        _project(
+            "expense_date", "expense_type", "beneficiary", "beneficiary_details", "amount",
+            "status", "description", "notes", "created_by"
+        )
+    ])
+
+def filtered_fee_rows(query_filters: dict) -> AsyncIterator[dict]:
+    """Fees matching the fee list filters, in the fee list order"""
+    return _stream(database.fees, [
+        {"$match": query_filters},
+        *_join_property("property.$id"),
+        {"$sort": {"year": -1, "month": -1, "property_villa": 1, "property_row_letter": 1, "property_number": 1, "_id": 1}},
+        {"$set": {"remaining_amount": {"$subtract": ["$amount", {"$ifNull": ["$paid_amount", 0]}]}}},
+        _project(
+            *PROPERTY_FIELDS, "amount", "paid_amount", "remaining_amount",
+            "year", "month", "due_date", "status", "notes"
+        )
+    ])
+
+# Fee and payment fields of the payment history and annual statement documents
+FEE_ACTIVITY_FIELDS = {"_id": 0, "month": 1, "year": 1, "amount": 1, "paid_amount": 1, "due_date": 1, "status": 1}
+PAYMENT_ACTIVITY_FIELDS = {
+    "_id": 0, "payment_date": 1, "amount": 1, "status": 1,
+    "reference": "$fee_id"  # The reports show the fee id as reference
+}
+
+async def property_activity(
+    property_id,
+    year: Optional[int] = None,
+    fee_statuses: Optional[List[FeeStatus]] = None
+) -> dict:
+    """
+    Fees and payments of one property (optionally one year) with their totals, in a
+    single aggregation: fees are matched on fees_property_period and payments are
+    added with $unionWith on payments_property_date, then split with $facet.
+    Fees are filtered by their period year, payments by payment_date.
+    """
+    property_id = ObjectId(property_id)
+
+    fee_match = {"property.$id": property_id}
+    if year is not None:
+        fee_match["year"] = year
+    if fee_statuses:
+        fee_match["status"] = {"$in": [fee_status.value for fee_status in fee_statuses]}
+
+    payment_match = {"property_id": property_id}
+    if year is not None:
+        payment_match["payment_date"] = {"$gte": datetime(year, 1, 1), "$lt": datetime(year + 1, 1, 1)}
+
+    pipeline = [
+        {"$match": fee_match},
+        {"$project": {**FEE_ACTIVITY_FIELDS, "kind": "fee"}},
+        {"$unionWith": {
+            "coll": "payments",
+            "pipeline": [
+                {"$match": payment_match},
+                {"$project": {**PAYMENT_ACTIVITY_FIELDS, "kind": "payment"}}
+            ]
+        }},
+        {"$facet": {
+            "fees": [
+                {"$match": {"kind": "fee"}},
+                {"$sort": {"year": 1, "month": 1}},
+                {"$unset": "kind"}
+            ],
+            "payments": [
+                {"$match": {"kind": "payment"}},
+                {"$sort": {"payment_date": 1}},
+                {"$unset": "kind"}
+            ],
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "fees_amount": {"$sum": {"$cond": [{"$eq": ["$kind", "fee"]}, "$amount", 0]}},
+                    "fees_count": {"$sum": {"$cond": [{"$eq": ["$kind", "fee"]}, 1, 0]}},
+                    "payments_amount": {"$sum": {"$cond": [{"$eq": ["$kind", "payment"]}, "$amount", 0]}},
+                    "approved_payments_amount": {"$sum": {"$cond": [
+                        {"$and": [{"$eq": ["$kind", "payment"]}, {"$eq": ["$status", PaymentStatus.APPROVED.value]}]},
+                        "$amount", 0
+                    ]}},
+                    "payments_count": {"$sum": {"$cond": [{"$eq": ["$kind", "payment"]}, 1, 0]}}
+                }},
+                {"$unset": "_id"}
+            ]
+        }}
+    ]
+
+    result = await database.fees.aggregate(pipeline).to_list(length=1)
+    facets = result[0] if result else {"fees": [], "payments": [], "totals": []}
+    totals = facets["totals"][0] if facets["totals"] else {
+        "fees_amount": 0.0, "fees_count": 0, "payments_amount": 0.0,
+        "approved_payments_amount": 0.0, "payments_count": 0
+    }
+    return {"fees": facets["fees"], "payments": facets["payments"], "totals": totals}
+
+def annual_activity_rows(year: int) -> AsyncIterator[dict]:
+    """
+    Every property with its fees (by period year) and payments (by payment_date) of
+    one year, in villa/row/number order. The per-property lookups run inside the
+    same aggregation on fees_property_period and payments_property_date.
+    """
+    return _stream(database.properties, [
+        {"$sort": {"villa": 1, "row_letter": 1, "number": 1}},
+        {"$lookup": {
+            "from": "fees",
+            "localField": "_id",
+            "foreignField": "property.$id",
+            "pipeline": [
+                {"$match": {"year": year}},
+                {"$sort": {"month": 1}},
+                {"$project": FEE_ACTIVITY_FIELDS}
+            ],
+            "as": "fees"
+        }},
+        {"$lookup": {
+            "from": "payments",
+            "localField": "_id",
+            "foreignField": "property_id",
+            "pipeline": [
+                {"$match": {"payment_date": {"$gte": datetime(year, 1, 1), "$lt": datetime(year + 1, 1, 1)}}},
+                {"$sort": {"payment_date": 1}},
+                {"$project": PAYMENT_ACTIVITY_FIELDS}
+            ],
+            "as": "payments"
+        }},
+        {"$project": {
+            "_id": 0,
+            "property": {
+                "villa": "$villa", "row_letter": "$row_letter", "number": "$number",
+                "owner_name": "$owner_name", "owner_phone": {"$ifNull": ["$owner_phone", None]}
+            },
+            "fees": 1,
+            "payments": 1
+        }}
+    ])
@@ -0,0 +1,48 @@
+import os
+import pickle
+import tempfile
+from typing import AsyncIterator, Iterator
+
+ROW_SPOOL_BATCH_SIZE = 1000  # Rows pickled together
+
+class RowSpool:
+    """
+    Report rows in a temporary file, pickled in batches, so that a large report
+    can be handed to a render worker without a list of every row in either
+    process. Only the path is pickled; each iteration reads the file back one
+    batch at a time. close() removes the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __iter__(self) -> Iterator[dict]:
+        with open(self.path, "rb") as f:
+            while True:
+                try:
+                    batch = pickle.load(f)
+                except EOFError:
+                    return
+                yield from batch
+
+    def close(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+async def spool_rows(rows: AsyncIterator[dict]) -> RowSpool:
+    """Write the rows of a report query to a RowSpool as they are read"""
+    fd, path = tempfile.mkstemp(prefix="report_rows_", suffix=".pickle")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            batch = []
+            async for row in rows:
+                batch.append(row)
+                if len(batch) >= ROW_SPOOL_BATCH_SIZE:
+                    pickle.dump(batch, f, pickle.HIGHEST_PROTOCOL)
+                    batch = []
+            if batch:
+                pickle.dump(batch, f, pickle.HIGHEST_PROTOCOL)
+    except BaseException:
+        os.remove(path)
+        raise
+    return RowSpool(path)
@@ -0,0 +1,152 @@
+import asyncio
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from uuid import uuid4
+from pymongo.errors import DuplicateKeyError
+from ..models.job_run import JobRun, JobRunStatus
+from ..config.database import database
+from .fee_generation import generate_due_fees
+from .overdue_sweeper import sweep_overdue
+from .data_version import bump_data_version
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+SCHEDULER_RUN_HOUR = int(os.getenv("SCHEDULER_RUN_HOUR", "3"))  # UTC hour after which a day's jobs run
+SCHEDULER_CATCHUP_DAYS = int(os.getenv("SCHEDULER_CATCHUP_DAYS", "31"))
+SCHEDULER_POLL_SECONDS = int(os.getenv("SCHEDULER_POLL_SECONDS", "60"))
+SCHEDULER_LOCK_TTL_SECONDS = int(os.getenv("SCHEDULER_LOCK_TTL_SECONDS", "300"))
+SCHEDULER_RETRY_MINUTES = int(os.getenv("SCHEDULER_RETRY_MINUTES", "30"))
+
+LOCK_ID = "scheduler"
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+# Daily jobs: name -> coroutine taking the day to run for and returning counts
+JOBS: Dict[str, Callable[[datetime], Awaitable[dict]]] = {
+    "fee_generation": generate_due_fees,
+    "overdue_sweep": sweep_overdue,
+}
+
+_scheduler_task: Optional[asyncio.Task] = None
+
+async def acquire_leader_lock() -> bool:
+    """
+    Take or renew the scheduler lease. Only the uvicorn worker holding it runs
+    jobs; if that worker dies, another one takes over once the lease expires.
+    """
+    now = datetime.utcnow()
+    try:
+        await database.scheduler_locks.find_one_and_update(
+            {"_id": LOCK_ID, "$or": [{"owner": INSTANCE_ID}, {"expires_at": {"$lt": now}}]},
+            {"$set": {"owner": INSTANCE_ID, "expires_at": now + timedelta(seconds=SCHEDULER_LOCK_TTL_SECONDS)}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        # Lease held by another worker: the upsert collided with its document
+        return False
+
+async def release_leader_lock():
+    await database.scheduler_locks.delete_one({"_id": LOCK_ID, "owner": INSTANCE_ID})
+
+def latest_due_day(now: datetime) -> datetime:
+    """Today once the run hour has passed, yesterday before that"""
+    day = datetime(now.year, now.month, now.day)
+    return day if now.hour >= SCHEDULER_RUN_HOUR else day - timedelta(days=1)
+
+async def days_to_run(job: str, latest_day: datetime) -> List[datetime]:
+    """Days after the job's last successful run, up to `latest_day` (catch-up)"""
+    last_run = await JobRun.find(
+        JobRun.job == job,
+        JobRun.status == JobRunStatus.SUCCESS
+    ).sort(-JobRun.run_date).first_or_none()
+
+    if not last_run:
+        return [latest_day]
+
+    first_day = max(
+        last_run.run_date + timedelta(days=1),
+        latest_day - timedelta(days=SCHEDULER_CATCHUP_DAYS - 1)
+    )
+    days = []
+    day = first_day
+    while day <= latest_day:
+        days.append(day)
+        day += timedelta(days=1)
+    return days
+
+async def run_job(job: str, run_date: datetime) -> JobRun:
+    """Run one job for one day and record it in the run history"""
+    job_run = JobRun(job=job, run_date=run_date, instance=INSTANCE_ID, started_at=datetime.utcnow())
+    await job_run.insert()
+
+    started = time.perf_counter()
+    try:
+        job_run.result = await JOBS[job](run_date)
+        job_run.status = JobRunStatus.SUCCESS
+        await bump_data_version()
+        print(f"⏰ {job} for {run_date:%Y-%m-%d}: {job_run.result}")
+    except Exception as e:
+        job_run.status = JobRunStatus.FAILED
+        job_run.error = str(e)
+        print(f"❌ {job} for {run_date:%Y-%m-%d} failed: {e}")
+
+    job_run.finished_at = datetime.utcnow()
+    job_run.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    await job_run.save()
+    return job_run
+
+async def run_due_jobs(now: Optional[datetime] = None):
+    """Run every job for each day it has not completed yet, oldest day first"""
+    now = now or datetime.utcnow()
+    latest_day = latest_due_day(now)
+    for job in JOBS:
+        # After a failure, wait before trying the same day again
+        recent_failure = await JobRun.find_one(
+            JobRun.job == job,
+            JobRun.status == JobRunStatus.FAILED,
+            JobRun.started_at >= now - timedelta(minutes=SCHEDULER_RETRY_MINUTES)
+        )
+        if recent_failure:
+            continue
+
+        for run_date in await days_to_run(job, latest_day):
+            # Renew the lease between runs so a long catch-up keeps it
+            if not await acquire_leader_lock():
+                return
+            job_run = await run_job(job, run_date)
+            if job_run.status == JobRunStatus.FAILED:
+                break  # Retry from this day after SCHEDULER_RETRY_MINUTES
+
+async def scheduler_loop():
+    print(f"⏰ Scheduler started on {INSTANCE_ID} (daily at {SCHEDULER_RUN_HOUR:02d}:00 UTC)")
+    while True:
+        try:
+            if await acquire_leader_lock():
+                await run_due_jobs()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Scheduler tick failed: {e}")
+        await asyncio.sleep(SCHEDULER_POLL_SECONDS)
+
+def start_scheduler():
+    global _scheduler_task
+    if not SCHEDULER_ENABLED:
+        print("⏰ Scheduler disabled (SCHEDULER_ENABLED=false)")
+        return
+    if _scheduler_task is None:
+        _scheduler_task = asyncio.create_task(scheduler_loop())
+
+async def stop_scheduler():
+    global _scheduler_task
+    if _scheduler_task is None:
+        return
+    _scheduler_task.cancel()
+    try:
+        await _scheduler_task
+    except asyncio.CancelledError:
+        pass
+    _scheduler_task = None
+    await release_leader_lock()
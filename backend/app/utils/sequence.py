@@ -0,0 +1,87 @@
+import re
+from typing import List
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from ..models.counter import Counter
+from ..config.database import database
+
+# Where the numbers of each prefix were stored before the counters collection
+# existed. Used once per (prefix, year) to seed the counter from the highest
+# number already issued.
+SEQUENCE_SOURCES = {
+    "AGR": ("agreements", "agreement_number"),
+}
+DEFAULT_SEQUENCE_SOURCE = ("receipts", "correlative_number")
+
+_seeded_keys = set()
+
+def format_correlative_number(prefix: str, year: int, number: int) -> str:
+    """Format: PREFIX-YYYY-XXXXX (padded to 5 digits)"""
+    return f"{prefix}-{year}-{number:05d}"
+
+async def _last_issued_number(prefix: str, year: int) -> int:
+    """Find the highest number already stored for this prefix and year"""
+    collection_name, field = SEQUENCE_SOURCES.get(prefix, DEFAULT_SEQUENCE_SOURCE)
+
+    # Anchored prefix regex so the lookup can use the index on the field
+    last_document = await database[collection_name].find_one(
+        {field: {"$regex": f"^{re.escape(prefix)}-{year}-"}},
+        sort=[(field, -1)],
+        projection={field: 1}
+    )
+    if not last_document:
+        return 0
+
+    parts = last_document[field].split("-")
+    if len(parts) == 3 and parts[2].isdigit():
+        return int(parts[2])
+    return 0
+
+async def _ensure_seeded(prefix: str, year: int):
+    """Make sure the counter never hands out a number that was already issued"""
+    key = (prefix, year)
+    if key in _seeded_keys:
+        return
+
+    last_number = await _last_issued_number(prefix, year)
+    try:
+        # $max is idempotent, so concurrent seeding from several workers is safe
+        await Counter.get_motor_collection().update_one(
+            {"prefix": prefix, "year": year},
+            {"$max": {"value": last_number}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # Another worker created the counter at the same time; retry as a plain update
+        await Counter.get_motor_collection().update_one(
+            {"prefix": prefix, "year": year},
+            {"$max": {"value": last_number}}
+        )
+    _seeded_keys.add(key)
+
+async def reserve_sequence(prefix: str, year: int, count: int = 1) -> range:
+    """
+    Atomically reserve `count` consecutive numbers for a prefix and year.
+    Returns the reserved numbers as a range; one database round trip
+    regardless of the block size.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+
+    await _ensure_seeded(prefix, year)
+
+    counter = await Counter.get_motor_collection().find_one_and_update(
+        {"prefix": prefix, "year": year},
+        {"$inc": {"value": count}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    last_number = counter["value"]
+    return range(last_number - count + 1, last_number + 1)
+
+async def reserve_correlative_numbers(year: int, prefix: str, count: int) -> List[str]:
+    """Reserve a block of formatted correlative numbers for bulk operations"""
+    return [
+        format_correlative_number(prefix, year, number)
+        for number in await reserve_sequence(prefix, year, count)
+    ]
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Fee generation benchmark: 5,000 properties x 24 months.
+Seeds throwaway properties and an inactive schedule, then compares:
+  - the previous per-row approach (find_one + insert per fee), timed on a
+    sample and extrapolated to the full run
+  - the set-based generator (one key query + unordered insert_many batches)
+and re-runs the generator to check it is idempotent. Cleans up afterwards.
+Needs MongoDB.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BENCH_PROPERTIES = int(os.getenv("BENCH_PROPERTIES", "5000"))
+BENCH_YEAR = 2090  # 24 months: BENCH_YEAR and BENCH_YEAR + 1
+BENCH_VILLA = "BENCH-FEES"
+LEGACY_SAMPLE = 500  # Fees created the old way before extrapolating
+
+async def legacy_generate(fee_schedule, properties, year, month):
+    """Previous generate_fees inner loop: one existence check and one insert per fee"""
+    from app.models.fee import Fee
+
+    for prop in properties:
+        existing_fee = await Fee.find_one(
+            Fee.property.id == prop.id,
+            Fee.fee_schedule.id == fee_schedule.id,
+            Fee.generated_date >= datetime(year, month, 1),
+            Fee.generated_date < datetime(year if month < 12 else year + 1, month % 12 + 1, 1)
+        )
+        if not existing_fee:
+            await Fee(
+                property=prop, fee_schedule=fee_schedule, amount=fee_schedule.amount,
+                generated_date=datetime(year, month, 1), year=year, month=month,
+                due_date=datetime(year, month, 10), reference=f"Legacy-{year}-{month:02d}"
+            ).insert()
+
+async def benchmark_fee_generation():
+    from beanie import init_beanie
+    from app.config.database import database, DOCUMENT_MODELS, ensure_unique_indexes
+    from app.models.fee import FeeSchedule
+    from app.models.property import Property
+    from app.utils.fee_generation import generate_fee_documents
+
+    await init_beanie(database=database, document_models=DOCUMENT_MODELS)
+    await ensure_unique_indexes()
+
+    print(f"🌱 Seeding {BENCH_PROPERTIES} properties...")
+    await database.properties.insert_many([
+        {"row_letter": f"R{i // 1000}", "number": i % 1000, "villa": BENCH_VILLA, "owner_name": f"Bench {i}", "owner_phone": None, "owner": None}
+        for i in range(BENCH_PROPERTIES)
+    ])
+    schedule = FeeSchedule(amount=50.0, description="Benchmark", effective_date=datetime(BENCH_YEAR, 1, 1), is_active=False, due_day=31)
+    await schedule.insert()
+
+    try:
+        # Previous approach on a sample
+        sample = await Property.find(Property.villa == BENCH_VILLA).limit(LEGACY_SAMPLE).to_list()
+        started = time.perf_counter()
+        await legacy_generate(schedule, sample, BENCH_YEAR - 1, 1)
+        legacy_per_fee = (time.perf_counter() - started) / len(sample)
+        total_fees = BENCH_PROPERTIES * 24
+        print(f"\n📊 per-row (before), {len(sample)} fees sampled")
+        print(f"   {legacy_per_fee * 1000:.2f} ms per fee -> ~{legacy_per_fee * total_fees:.0f}s for {total_fees} fees")
+
+        # Set-based generator on the full 5k x 24 months
+        started = time.perf_counter()
+        generated = 0
+        for year in (BENCH_YEAR, BENCH_YEAR + 1):
+            result = await generate_fee_documents(
+                [schedule], year, range(1, 13), "Bench",
+                generated_date=lambda month, year=year: datetime(year, month, 1),
+                property_filter={"villa": BENCH_VILLA}
+            )
+            generated += result["generated"]
+        elapsed = time.perf_counter() - started
+        print(f"\n📊 set-based (after)")
+        print(f"   {generated} fees in {elapsed:.2f}s ({generated / elapsed:.0f} fees/s)")
+
+        # Running it again must not create anything
+        started = time.perf_counter()
+        again = await generate_fee_documents(
+            [schedule], BENCH_YEAR, range(1, 13), "Bench",
+            generated_date=lambda month: datetime(BENCH_YEAR, month, 1),
+            property_filter={"villa": BENCH_VILLA}
+        )
+        print(f"   re-run: {again['generated']} generated, {again['skipped']} skipped in {time.perf_counter() - started:.2f}s")
+
+        if generated == total_fees and again["generated"] == 0:
+            print("✅ SUCCESS: All fees generated once")
+        else:
+            print(f"❌ ERROR: Expected {total_fees} fees and an idempotent re-run")
+    finally:
+        await database.fees.delete_many({"fee_schedule.$id": schedule.id})
+        await database.properties.delete_many({"villa": BENCH_VILLA})
+        await schedule.delete()
+
+if __name__ == "__main__":
+    print("🚀 Running fee generation benchmark...")
+    asyncio.run(benchmark_fee_generation())
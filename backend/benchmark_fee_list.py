@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Fee list benchmark on 100,000 fees (2,000 properties x 50 months).
+Compares the previous get_fees plan (properties, fee_schedules and users joined
+and unwound for every matched fee, then sorted and paged) with the current
+fee_list_pipeline (sorted and paged on the fees_list_sort index, only the page's
+properties joined), for a first page, a deep page and a status filter.
+Seeds throwaway data in far-future years and cleans up afterwards. Needs MongoDB.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BENCH_PROPERTIES = int(os.getenv("BENCH_PROPERTIES", "2000"))
+BENCH_MONTHS = 50
+BENCH_YEAR = 2080  # Fees span BENCH_YEAR .. BENCH_YEAR + 4
+BENCH_VILLA = "BENCH-LIST"
+PAGE_SIZE = 20
+REPEAT = 5
+
+LEGACY_SORT_KEY = [
+    ("year", -1),
+    ("month", -1),
+    ("property_data.row_letter", 1),
+    ("property_data.number", 1),
+    ("_id", 1)
+]
+
+def legacy_pipeline(query_filters, skip, limit):
+    """Previous get_fees pipeline (page mode)"""
+    from app.utils.pagination import sort_stage
+
+    return [
+        {"$match": query_filters},
+        {"$lookup": {"from": "properties", "localField": "property.$id", "foreignField": "_id", "as": "property_data"}},
+        {"$unwind": "$property_data"},
+        {"$lookup": {"from": "fee_schedules", "localField": "fee_schedule.$id", "foreignField": "_id", "as": "fee_schedule_data"}},
+        {"$unwind": "$fee_schedule_data"},
+        {"$lookup": {"from": "users", "localField": "user.$id", "foreignField": "_id", "as": "user_data"}},
+        {"$unwind": {"path": "$user_data", "preserveNullAndEmptyArrays": True}},
+        sort_stage(LEGACY_SORT_KEY),
+        {"$skip": skip},
+        {"$limit": limit}
+    ]
+
+async def time_pipeline(collection, pipeline):
+    """Best of REPEAT runs, in milliseconds, and the last result"""
+    best = None
+    results = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        results = await collection.aggregate(pipeline, allowDiskUse=True).to_list(length=None)
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+async def winning_plan(database, pipeline):
+    """Stages of the query plan chosen for the first $match/$sort, e.g. LIMIT > FETCH > IXSCAN"""
+    explain = await database.command("aggregate", "fees", pipeline=pipeline, explain=True, cursor={})
+    stages = explain.get("stages")
+    query_planner = stages[0]["$cursor"]["queryPlanner"] if stages else explain["queryPlanner"]
+    plan = query_planner["winningPlan"]
+    plan = plan.get("queryPlan", plan)
+
+    names = []
+    while plan:
+        name = plan.get("stage", "?")
+        if plan.get("indexName"):
+            name += f"({plan['indexName']})"
+        names.append(name)
+        plan = plan.get("inputStage")
+    return " > ".join(names)
+
+async def benchmark_fee_list():
+    from bson import DBRef
+    from beanie import init_beanie
+    from app.config.database import database, DOCUMENT_MODELS
+    from app.models.fee import FeeSchedule
+    from app.routes.fees import fee_list_pipeline, FEE_SORT_KEY
+    from app.utils.pagination import decode_cursor, next_cursor
+
+    await init_beanie(database=database, document_models=DOCUMENT_MODELS)
+
+    print(f"🌱 Seeding {BENCH_PROPERTIES} properties x {BENCH_MONTHS} months...")
+    properties = [
+        {"row_letter": chr(ord("A") + i // 100 % 26), "number": i % 100, "villa": BENCH_VILLA, "owner_name": f"Bench {i}", "owner_phone": None, "owner": None}
+        for i in range(BENCH_PROPERTIES)
+    ]
+    await database.properties.insert_many(properties)
+    schedule = FeeSchedule(amount=50.0, description="Benchmark", effective_date=datetime(BENCH_YEAR, 1, 1), is_active=False)
+    await schedule.insert()
+
+    try:
+        fees = []
+        for period in range(BENCH_MONTHS):
+            year, month = BENCH_YEAR + period // 12, period % 12 + 1
+            for prop in properties:
+                fees.append({
+                    "property": DBRef("properties", prop["_id"]),
+                    "fee_schedule": DBRef("fee_schedules", schedule.id),
+                    "user": None,
+                    "amount": 50.0,
+                    "paid_amount": 0.0,
+                    "generated_date": datetime(year, month, 1),
+                    "year": year,
+                    "month": month,
+                    "due_date": datetime(year, month, 10),
+                    "status": "pending" if period % 3 else "completed",
+                    "reference": f"Bench-{year}-{month:02d}",
+                    "notes": None,
+                    "property_row_letter": prop["row_letter"],
+                    "property_number": prop["number"]
+                })
+                if len(fees) >= 10000:
+                    await database.fees.insert_many(fees)
+                    fees = []
+        if fees:
+            await database.fees.insert_many(fees)
+
+        bench_filter = {"year": {"$gte": BENCH_YEAR}}
+        scenarios = [
+            ("first page", bench_filter, 0),
+            ("page 250", bench_filter, 249 * PAGE_SIZE),
+            ("status=pending, page 1", {**bench_filter, "status": "pending"}, 0),
+        ]
+
+        all_match = True
+        for name, query_filters, skip in scenarios:
+            legacy_pipe = legacy_pipeline(query_filters, skip, PAGE_SIZE)
+            new_pipe = fee_list_pipeline(query_filters, None, skip, PAGE_SIZE)
+            legacy_ms, legacy_rows = await time_pipeline(database.fees, legacy_pipe)
+            new_ms, new_rows = await time_pipeline(database.fees, new_pipe)
+
+            same_page = [row["_id"] for row in legacy_rows] == [row["_id"] for row in new_rows]
+            all_match = all_match and same_page
+            print(f"\n📊 {name}")
+            print(f"   before: {legacy_ms:8.1f} ms  plan: {await winning_plan(database, legacy_pipe)}")
+            print(f"   after:  {new_ms:8.1f} ms  plan: {await winning_plan(database, new_pipe)}")
+            print(f"   speedup x{legacy_ms / new_ms:.1f}, same rows: {'yes' if same_page else 'NO'}")
+
+        # Keyset continuation from the first page
+        _, first_page = await time_pipeline(database.fees, fee_list_pipeline(bench_filter, None, 0, PAGE_SIZE))
+        cursor_values = decode_cursor(next_cursor(first_page, FEE_SORT_KEY, PAGE_SIZE), FEE_SORT_KEY)
+        keyset_ms, second_page = await time_pipeline(database.fees, fee_list_pipeline(bench_filter, cursor_values, 0, PAGE_SIZE))
+        _, legacy_second = await time_pipeline(database.fees, legacy_pipeline(bench_filter, PAGE_SIZE, PAGE_SIZE))
+        keyset_match = [row["_id"] for row in second_page] == [row["_id"] for row in legacy_second]
+        print(f"\n📊 keyset page 2: {keyset_ms:.1f} ms, same rows: {'yes' if keyset_match else 'NO'}")
+
+        if all_match and keyset_match:
+            print("✅ SUCCESS: Both plans return the same pages")
+        else:
+            print("❌ ERROR: The plans returned different pages")
+    finally:
+        await database.fees.delete_many({"fee_schedule.$id": schedule.id})
+        await database.properties.delete_many({"villa": BENCH_VILLA})
+        await schedule.delete()
+
+if __name__ == "__main__":
+    print("🚀 Running fee list benchmark...")
+    asyncio.run(benchmark_fee_list())
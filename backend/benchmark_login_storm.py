@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Login-storm benchmark for password hashing.
+Simulates a burst of concurrent logins (start of the month) while a steady
+stream of cheap "unrelated" requests runs on the same event loop, and reports
+the latency percentiles those requests see with bcrypt running inline versus
+in the password hashing pool.
+Does not need MongoDB.
+"""
+
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+
+from app.auth.utils import pwd_context, verify_password
+
+CONCURRENT_LOGINS = int(os.getenv("BENCH_CONCURRENT_LOGINS", "40"))
+REQUEST_INTERVAL = 0.005  # One unrelated request every 5 ms
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def unrelated_requests(stop: asyncio.Event, latencies: list):
+    """Cheap handler: its latency is dominated by how long the loop is blocked"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(REQUEST_INTERVAL)
+        latencies.append((time.perf_counter() - started - REQUEST_INTERVAL) * 1000)
+
+async def inline_login(password, hashed):
+    # Previous behaviour: bcrypt runs directly inside the async handler
+    return pwd_context.verify(password, hashed)
+
+async def pooled_login(password, hashed):
+    return await verify_password(password, hashed)
+
+async def run_storm(login, password, hashed):
+    latencies = []
+    stop = asyncio.Event()
+    background = asyncio.create_task(unrelated_requests(stop, latencies))
+    await asyncio.sleep(0.1)  # Baseline before the burst
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*[login(password, hashed) for _ in range(CONCURRENT_LOGINS)])
+    storm_seconds = time.perf_counter() - started
+
+    await asyncio.sleep(0.1)
+    stop.set()
+    await background
+
+    assert all(results), "Password verification failed"
+    return storm_seconds, latencies
+
+async def benchmark_login_storm():
+    password = "SuperSecret123!"
+    hashed = pwd_context.hash(password)
+    print(f"🔐 bcrypt rounds: {pwd_context.to_dict()['bcrypt__rounds']}, concurrent logins: {CONCURRENT_LOGINS}")
+
+    for name, login in [("inline (before)", inline_login), ("thread pool (after)", pooled_login)]:
+        storm_seconds, latencies = await run_storm(login, password, hashed)
+        print(f"\n📊 {name}")
+        print(f"   Logins completed in: {storm_seconds:.2f}s")
+        print(f"   Unrelated requests served: {len(latencies)}")
+        print(f"   Extra latency p50: {statistics.median(latencies):.2f} ms")
+        print(f"   Extra latency p99: {percentile(latencies, 99):.2f} ms")
+        print(f"   Extra latency max: {max(latencies):.2f} ms")
+
+if __name__ == "__main__":
+    print("🚀 Running login-storm benchmark...")
+    asyncio.run(benchmark_login_storm())
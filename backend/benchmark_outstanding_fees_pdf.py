@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Outstanding fees PDF benchmark on 10,000 rows.
+Compares the previous generate_outstanding_fees_pdf (every row in one Table that
+ReportLab splits page by page) with the current one (rows read a page at a time
+with page subtotals), given a list and given a RowSpool written from an async row
+iterator as the report route does. Reports time and peak Python memory while
+rendering (tracemalloc, on a second run). Does not need MongoDB.
+"""
+
+import asyncio
+import io
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BENCH_ROWS = int(os.getenv("BENCH_ROWS", "10000"))
+
+def fee_row(number):
+    return {
+        "property_villa": "Villa Bench", "property_row_letter": "ABCDEFGH"[number % 8],
+        "property_number": number, "property_owner_name": f"Propietario {number}",
+        "month": number % 12 + 1, "year": 2024, "amount": 50.0 + number % 7,
+        "due_date": datetime(2024, 1, 10) + timedelta(days=number % 365)
+    }
+
+async def fee_rows():
+    for number in range(BENCH_ROWS):
+        yield fee_row(number)
+
+def legacy_outstanding_fees_pdf(fees_data):
+    """Previous generate_outstanding_fees_pdf: every row in one Table that ReportLab splits across pages"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+
+    buffer = io.BytesIO()
+
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+
+    title_style = ParagraphStyle(
+        'Title',
+        parent=styles['Heading1'],
+        fontSize=20,
+        alignment=TA_CENTER,
+        spaceAfter=30
+    )
+
+    subtitle_style = ParagraphStyle(
+        'Subtitle',
+        parent=styles['Heading2'],
+        fontSize=14,
+        alignment=TA_CENTER,
+        spaceAfter=20
+    )
+
+    content = []
+
+    # Header
+    content.append(Paragraph("PAGO VECINAL", title_style))
+    content.append(Paragraph("Cuotas Pendientes - Reporte General", subtitle_style))
+    content.append(Spacer(1, 20))
+
+    if fees_data:
+        # Outstanding fees table
+        headers = ["Propiedad", "Propietario", "Período", "Monto", "Fecha Vencimiento"]
+        rows = [headers]
+
+        for fee in fees_data:
+            property_str = f"{fee['property_villa']} - {fee['property_row_letter']}{fee['property_number']}"
+            rows.append([
+                property_str,
+                fee['property_owner_name'],
+                f"{fee['month']}/{fee['year']}",
+                f"S/ {fee['amount']:.2f}",
+                fee['due_date'].strftime("%d/%m/%Y")
+            ])
+
+        table = Table(rows, colWidths=[2*inch, 2*inch, 1*inch, 1.5*inch, 1.5*inch])
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lightcoral),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        content.append(table)
+        content.append(Spacer(1, 10))
+
+        # Summary
+        total_amount = sum(f['amount'] for f in fees_data)
+        content.append(Paragraph(f"Total Cuotas Pendientes: {len(fees_data)}", styles['Heading4']))
+        content.append(Paragraph(f"Monto Total Pendiente: S/ {total_amount:.2f}", styles['Heading4']))
+    else:
+        content.append(Paragraph("No hay cuotas pendientes.", styles['Normal']))
+
+    # Footer
+    content.append(Spacer(1, 30))
+    content.append(Paragraph(f"Reporte generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
+
+    doc.build(content)
+
+    buffer.seek(0)
+    return buffer
+
+def measure(label, render):
+    """Time one run, then trace another for its peak (tracemalloc slows rendering down)"""
+    started = time.perf_counter()
+    pdf = render()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    render()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"📊 {label}: {elapsed:.2f}s, peak {peak / 1024 / 1024:.1f} MiB ({len(pdf.getvalue())} bytes)")
+    return elapsed, peak
+
+async def benchmark_outstanding_fees_pdf():
+    """Render the same outstanding fees report with each implementation"""
+    from app.utils.pdf_generator import generate_outstanding_fees_pdf
+    from app.utils.row_spool import spool_rows
+
+    print(f"🔍 Rendering {BENCH_ROWS} outstanding fees")
+    rows = [fee_row(number) for number in range(BENCH_ROWS)]
+    legacy_s, legacy_peak = measure("before: one table", lambda: legacy_outstanding_fees_pdf(rows))
+    paged_s, paged_peak = measure("after: paged table from a list", lambda: generate_outstanding_fees_pdf(rows))
+    del rows
+
+    spool = await spool_rows(fee_rows())
+    try:
+        spooled_s, spooled_peak = measure("after: paged table from a RowSpool", lambda: generate_outstanding_fees_pdf(spool))
+    finally:
+        spool.close()
+
+    print(f"\n   speedup x{legacy_s / paged_s:.1f}; memory x{legacy_peak / paged_peak:.1f} lower from a list, "
+          f"x{legacy_peak / spooled_peak:.1f} lower from a RowSpool")
+
+if __name__ == "__main__":
+    print("🚀 Running outstanding fees PDF benchmark...")
+    asyncio.run(benchmark_outstanding_fees_pdf())
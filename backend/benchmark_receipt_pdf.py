@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Receipt PDF benchmark: receipts rendered per second in one process by the previous
+generate_receipt_pdf (sample stylesheet, paragraph and table styles rebuilt and a
+SimpleDocTemplate laid out on every call, ASCII85 streams), by the flowable layout
+with the cached styles (still used for receipts with long notes) and by the canvas
+fast path now used by generate_receipt_pdf. Does not need MongoDB.
+"""
+
+import io
+import os
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BENCH_RECEIPTS = int(os.getenv("BENCH_RECEIPTS", "500"))
+
+RECEIPT_DATA = {
+    "correlative_number": "REC-000123",
+    "issue_date": datetime(2024, 5, 3, 10, 30),
+    "payment_date": datetime(2024, 5, 2),
+    "total_amount": 150.0,
+    "property_details": {
+        "villa": "Villa Bench", "row_letter": "B", "number": 12,
+        "owner_name": "Propietario de Prueba", "owner_phone": "999888777"
+    },
+    "reference": "664f1c2a9b1e8a0012345678",
+    "fee_period": "05/2024",
+    "notes": "Pago realizado por transferencia bancaria."
+}
+
+def legacy_receipt_pdf(receipt_data):
+    """Previous generate_receipt_pdf: sample stylesheet, styles and SimpleDocTemplate per call"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+
+    buffer = io.BytesIO()
+
+    # Create the PDF document
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+
+    # Custom styles
+    title_style = ParagraphStyle(
+        'Title',
+        parent=styles['Heading1'],
+        fontSize=20,
+        alignment=TA_CENTER,
+        spaceAfter=30
+    )
+
+    subtitle_style = ParagraphStyle(
+        'Subtitle',
+        parent=styles['Heading2'],
+        fontSize=14,
+        alignment=TA_CENTER,
+        spaceAfter=20
+    )
+
+    normal_style = styles['Normal']
+    normal_style.fontSize = 10
+
+    # Build the PDF content
+    content = []
+
+    # Header
+    content.append(Paragraph("PAGO VECINAL", title_style))
+    content.append(Paragraph("Sistema de Gestión de Cuotas de Condominio", subtitle_style))
+    content.append(Spacer(1, 20))
+
+    # Receipt info
+    receipt_info = [
+        ["Número de Recibo:", receipt_data['correlative_number']],
+        ["Fecha de Emisión:", receipt_data['issue_date'].strftime("%d/%m/%Y %H:%M")],
+        ["Período:", receipt_data.get('fee_period', 'N/A')]
+    ]
+
+    receipt_table = Table(receipt_info, colWidths=[2*inch, 4*inch])
+    receipt_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+        ('TEXTCOLOR', (0, 0), (0, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    content.append(receipt_table)
+    content.append(Spacer(1, 20))
+
+    # Property information
+    content.append(Paragraph("Información de la Propiedad", styles['Heading3']))
+    property_info = [
+        ["Villa:", receipt_data['property_details']['villa']],
+        ["Fila:", receipt_data['property_details']['row_letter']],
+        ["Número:", str(receipt_data['property_details']['number'])],
+        ["Propietario:", receipt_data['property_details']['owner_name']],
+        ["Teléfono:", receipt_data['property_details'].get('owner_phone', 'N/A')]
+    ]
+
+    property_table = Table(property_info, colWidths=[2*inch, 4*inch])
+    property_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.whitesmoke),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    content.append(property_table)
+    content.append(Spacer(1, 20))
+
+    # Payment details
+    content.append(Paragraph("Detalles del Pago", styles['Heading3']))
+    payment_info = [
+        ["Fecha del Pago:", receipt_data['payment_date'].strftime("%d/%m/%Y")],
+        ["Monto Pagado:", f"S/ {receipt_data['total_amount']:.2f}"],
+        ["Estado:", "COMPLETADO"],
+        ["Referencia:", receipt_data.get('reference', 'N/A')]
+    ]
+
+    payment_table = Table(payment_info, colWidths=[2*inch, 4*inch])
+    payment_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.lightgreen),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    content.append(payment_table)
+    content.append(Spacer(1, 20))
+
+    # Notes
+    if receipt_data.get('notes'):
+        content.append(Paragraph("Notas:", styles['Heading4']))
+        content.append(Paragraph(receipt_data['notes'], normal_style))
+        content.append(Spacer(1, 10))
+
+    # Footer
+    content.append(Spacer(1, 30))
+    content.append(Paragraph("¡Gracias por su pago!", subtitle_style))
+    content.append(Paragraph("Este recibo es válido como comprobante de pago.", normal_style))
+
+    # Build the PDF
+    doc.build(content)
+
+    buffer.seek(0)
+    return buffer
+
+def measure(label, generator):
+    generator(RECEIPT_DATA)  # Warm up imports and font metrics
+    started = time.perf_counter()
+    for _ in range(BENCH_RECEIPTS):
+        pdf = generator(RECEIPT_DATA).getvalue()
+    elapsed = time.perf_counter() - started
+    rate = BENCH_RECEIPTS / elapsed
+    print(f"📊 {label}: {rate:.0f} receipts/s ({elapsed * 1000 / BENCH_RECEIPTS:.2f} ms each, {len(pdf)} bytes)")
+    return rate
+
+def benchmark_receipt_pdf():
+    """Render the same receipt with each implementation"""
+    from reportlab import rl_config
+    from app.utils.pdf_generator import generate_receipt_pdf, _generate_receipt_pdf_flowables
+
+    print(f"🔍 Rendering {BENCH_RECEIPTS} receipts per implementation")
+    rl_config.useA85 = 1  # ReportLab's default, which pdf_generator turns off
+    legacy_rate = measure("before: styles and layout per call", legacy_receipt_pdf)
+    rl_config.useA85 = 0
+    cached_rate = measure("flowables with cached styles and page frame", _generate_receipt_pdf_flowables)
+    fast_rate = measure("after: canvas fast path", generate_receipt_pdf)
+    print(f"\n   cached styles x{cached_rate / legacy_rate:.1f}, fast path x{fast_rate / legacy_rate:.1f}")
+
+    if generate_receipt_pdf(RECEIPT_DATA).getvalue().startswith(b"%PDF"):
+        print("✅ SUCCESS: The fast path produces a PDF")
+    else:
+        print("❌ ERROR: The fast path did not produce a PDF")
+
+if __name__ == "__main__":
+    print("🚀 Running receipt PDF benchmark...")
+    benchmark_receipt_pdf()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+All-payments Excel export benchmark on 200,000 payments (2,000 properties x 100 payments).
+Compares the previous export (row list, in-memory workbook with a Font/PatternFill per
+cell, saved to a BytesIO before the response starts) with the streamed write-only
+export of stream_all_payments_excel, reporting time, time to first byte and peak
+Python memory (tracemalloc, so both timings include its overhead).
+Seeds throwaway data and cleans up afterwards. Needs MongoDB.
+"""
+
+import asyncio
+import io
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BENCH_PROPERTIES = int(os.getenv("BENCH_PROPERTIES", "2000"))
+BENCH_PAYMENTS_PER_PROPERTY = 100
+BENCH_YEAR = 2090
+BENCH_VILLA = "BENCH-EXPORT"
+
+def legacy_all_payments_excel(payments_data):
+    """Previous generate_all_payments_excel, without the summary section"""
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Todos los Pagos"
+    ws['A1'] = "PAGO VECINAL - Reporte General de Pagos"
+    ws['A1'].font = Font(size=16, bold=True)
+    ws.merge_cells('A1:H1')
+
+    headers = ["Fecha Pago", "Propiedad", "Propietario", "Monto", "Estado", "Referencia", "Notas"]
+    for col, header in enumerate(headers, 1):
+        cell = ws.cell(row=3, column=col)
+        cell.value = header
+        cell.font = Font(bold=True)
+        cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+
+    for row, payment in enumerate(payments_data, 4):
+        property_str = f"{payment['property_villa']} - {payment['property_row_letter']}{payment['property_number']}"
+        ws.cell(row=row, column=1).value = payment['payment_date'].strftime("%d/%m/%Y %H:%M")
+        ws.cell(row=row, column=2).value = property_str
+        ws.cell(row=row, column=3).value = payment['property_owner_name']
+        ws.cell(row=row, column=4).value = float(payment['amount'])
+        ws.cell(row=row, column=4).number_format = '"S/ "#,##0.00'
+        ws.cell(row=row, column=5).value = payment['status']
+        ws.cell(row=row, column=6).value = payment.get('fee_reference', 'N/A')
+        ws.cell(row=row, column=7).value = payment.get('notes', '')
+
+    for col in range(1, 9):
+        ws.column_dimensions[get_column_letter(col)].width = 18
+
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+async def legacy_export():
+    """Bytes of the previous export, seconds until the first byte could be sent"""
+    from app.utils.report_queries import all_payment_rows
+
+    started = time.perf_counter()
+    payments_data = [row async for row in all_payment_rows()]
+    buffer = legacy_all_payments_excel(payments_data)
+    first_byte = time.perf_counter() - started
+    return buffer.getvalue(), first_byte
+
+async def streamed_export():
+    """Bytes of the streamed export, seconds until its first chunk"""
+    from app.utils.report_queries import all_payment_rows
+    from app.utils.excel_generator import stream_all_payments_excel
+
+    started = time.perf_counter()
+    first_byte = None
+    chunks = []
+    async for chunk in stream_all_payments_excel(all_payment_rows()):
+        if first_byte is None:
+            first_byte = time.perf_counter() - started
+        chunks.append(len(chunk))
+    # Only sizes are kept, as a client would not keep the file in our memory
+    return chunks, first_byte
+
+async def measure(name, export):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result, first_byte = await export()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"\n📊 {name}")
+    print(f"   total: {elapsed:6.1f} s  first byte: {first_byte:6.1f} s  peak memory: {peak / 1024 / 1024:7.1f} MB")
+    return result, elapsed, peak
+
+def data_rows(content):
+    """Payment rows of an exported workbook (header row to the first blank row)"""
+    from openpyxl import load_workbook
+
+    rows = load_workbook(io.BytesIO(content), read_only=True).active.iter_rows(min_row=3, values_only=True)
+    next(rows)
+    data = []
+    for row in rows:
+        if not row or row[0] is None:
+            break
+        row = (tuple(row) + (None,) * 7)[:7]
+        data.append(tuple(value if value is not None else '' for value in row))
+    return data
+
+async def benchmark_report_export():
+    from bson import DBRef
+    from beanie import init_beanie
+    from app.config.database import database, DOCUMENT_MODELS
+    from app.utils.report_queries import all_payment_rows
+    from app.utils.excel_generator import stream_all_payments_excel
+
+    await init_beanie(database=database, document_models=DOCUMENT_MODELS)
+
+    total = BENCH_PROPERTIES * BENCH_PAYMENTS_PER_PROPERTY
+    print(f"🌱 Seeding {BENCH_PROPERTIES} properties x {BENCH_PAYMENTS_PER_PROPERTY} payments ({total})...")
+    properties = [
+        {"row_letter": chr(ord("A") + i // 100 % 26), "number": i % 100, "villa": BENCH_VILLA, "owner_name": f"Bench {i}", "owner_phone": None, "owner": None}
+        for i in range(BENCH_PROPERTIES)
+    ]
+    await database.properties.insert_many(properties)
+    fees = [
+        {
+            "property": DBRef("properties", prop["_id"]),
+            "amount": 50.0 * BENCH_PAYMENTS_PER_PROPERTY,
+            "paid_amount": 0.0,
+            "year": BENCH_YEAR,
+            "month": 1,
+            "due_date": datetime(BENCH_YEAR, 1, 10),
+            "status": "pending",
+            "reference": f"Bench-{i}",
+            "notes": None
+        }
+        for i, prop in enumerate(properties)
+    ]
+    await database.fees.insert_many(fees)
+    fee_ids = [fee["_id"] for fee in fees]
+
+    try:
+        payments = []
+        for prop, fee in zip(properties, fees):
+            for i in range(BENCH_PAYMENTS_PER_PROPERTY):
+                payment_date = datetime(BENCH_YEAR, 1, 1) + timedelta(hours=i)
+                payments.append({
+                    "fee": DBRef("fees", fee["_id"]),
+                    "fee_id": str(fee["_id"]),
+                    "user": None,
+                    "amount": 50.0,
+                    "payment_date": payment_date,
+                    "payment_year": payment_date.year,
+                    "payment_month": payment_date.month,
+                    "status": "approved" if i % 4 else "pending",
+                    "notes": "Benchmark" if i % 2 else None,
+                    "property_id": prop["_id"],
+                    "fee_year": BENCH_YEAR,
+                    "fee_month": 1,
+                    "property_row_letter": prop["row_letter"],
+                    "property_number": prop["number"]
+                })
+            if len(payments) >= 10000:
+                await database.payments.insert_many(payments)
+                payments = []
+        if payments:
+            await database.payments.insert_many(payments)
+
+        exported = await database.payments.count_documents({})
+        print(f"🔍 Exporting all {exported} payments")
+
+        legacy_content, legacy_s, legacy_peak = await measure("before: in-memory workbook", legacy_export)
+        _, streamed_s, streamed_peak = await measure("after: streamed write-only workbook", streamed_export)
+        print(f"\n   speedup x{legacy_s / streamed_s:.1f}, memory x{legacy_peak / streamed_peak:.1f} lower")
+
+        # Same data rows in both files
+        streamed_content = b"".join([chunk async for chunk in stream_all_payments_excel(all_payment_rows())])
+        if data_rows(legacy_content) == data_rows(streamed_content):
+            print("✅ SUCCESS: Both exports contain the same rows")
+        else:
+            print("❌ ERROR: The exports contain different rows")
+    finally:
+        await database.payments.delete_many({"fee.$id": {"$in": fee_ids}})
+        await database.fees.delete_many({"_id": {"$in": fee_ids}})
+        await database.properties.delete_many({"villa": BENCH_VILLA})
+
+if __name__ == "__main__":
+    print("🚀 Running all-payments export benchmark...")
+    asyncio.run(benchmark_report_export())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Migration script to copy each property's row_letter and number onto its fees
+(property_row_letter, property_number), the sort key of the fee list.
+One UpdateMany per property, sent in bulk_write batches of MIGRATION_BATCH_SIZE.
+Safe to run more than once.
+"""
+
+import asyncio
+import os
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateMany
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "1000"))
+
+async def migrate_fee_property_sort_fields():
+    """Set property_row_letter/property_number on every fee from its property"""
+    try:
+        # Connect to MongoDB
+        mongodb_url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+        database_name = os.getenv("DATABASE_NAME", "pago_vecinal")
+
+        client = AsyncIOMotorClient(mongodb_url)
+        db = client[database_name]
+
+        missing_filter = {"property_row_letter": {"$exists": False}}
+        total = await db.fees.count_documents(missing_filter)
+        print(f"🔄 Starting migration: {total} fees without the property sort fields...")
+
+        updated = 0
+        operations = []
+        async for prop in db.properties.find({}, {"row_letter": 1, "number": 1}):
+            operations.append(UpdateMany(
+                {"property.$id": prop["_id"]},
+                {"$set": {"property_row_letter": prop.get("row_letter"), "property_number": prop.get("number")}}
+            ))
+            if len(operations) >= BATCH_SIZE:
+                result = await db.fees.bulk_write(operations, ordered=False)
+                updated += result.modified_count
+                operations = []
+                print(f"   ... {updated} fees updated")
+
+        if operations:
+            result = await db.fees.bulk_write(operations, ordered=False)
+            updated += result.modified_count
+
+        print(f"✅ Migration completed: {updated} fees updated")
+
+        # Verify the migration
+        remaining = await db.fees.count_documents(missing_filter)
+        print(f"📊 Verification:")
+        print(f"   - Fees without sort fields (property no longer exists): {remaining}")
+
+        if remaining == 0:
+            print("✅ Migration successful!")
+        else:
+            print("⚠️  Some fees point to deleted properties. Please check manually.")
+
+        client.close()
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    asyncio.run(migrate_fee_property_sort_fields())
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Migration script to prepare the fees collection for the unique index
+'fees_schedule_period_property_unique' (one fee per property, schedule, year and month).
+Lists the duplicated keys so they can be resolved by hand (fees may already have
+payments or agreements attached, so nothing is deleted), then creates the index.
+"""
+
+import asyncio
+import os
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, ASCENDING
+from dotenv import load_dotenv
+
+load_dotenv()
+
+async def migrate_fee_unique_key():
+    """Report duplicate fee keys and create the unique index when there are none"""
+    try:
+        # Connect to MongoDB
+        mongodb_url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+        database_name = os.getenv("DATABASE_NAME", "pago_vecinal")
+
+        client = AsyncIOMotorClient(mongodb_url)
+        db = client[database_name]
+
+        print("🔄 Looking for fees sharing property, schedule, year and month...")
+
+        duplicates = await db.fees.aggregate([
+            {"$group": {
+                "_id": {
+                    "property": "$property.$id",
+                    "fee_schedule": "$fee_schedule.$id",
+                    "year": "$year",
+                    "month": "$month"
+                },
+                "fee_ids": {"$push": "$_id"},
+                "count": {"$sum": 1}
+            }},
+            {"$match": {"count": {"$gt": 1}}}
+        ], allowDiskUse=True).to_list(length=None)
+
+        print(f"📊 Duplicated keys: {len(duplicates)}")
+        for duplicate in duplicates:
+            key = duplicate["_id"]
+            fee_ids = ", ".join(str(fee_id) for fee_id in duplicate["fee_ids"])
+            print(f"   - property {key['property']}, schedule {key['fee_schedule']}, {key['month']}/{key['year']}: {fee_ids}")
+
+        if duplicates:
+            print("⚠️  Resolve the duplicates above and run this script again.")
+        else:
+            await db.fees.create_indexes([IndexModel(
+                [("fee_schedule.$id", ASCENDING), ("year", ASCENDING), ("month", ASCENDING), ("property.$id", ASCENDING)],
+                name="fees_schedule_period_property_unique",
+                unique=True
+            )])
+            print("✅ Migration successful! Unique index created.")
+
+        client.close()
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    asyncio.run(migrate_fee_unique_key())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Migration script to backfill 'payment_year' and 'payment_month' on existing payments.
+The values are derived from payment_date on the server with a pipeline update,
+so no documents are transferred. Safe to run more than once. A missing or null
+field counts as not migrated: payments saved through the model before the
+backfill store the period fields as null.
+"""
+
+import asyncio
+import os
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+load_dotenv()
+
+async def migrate_payment_period_fields():
+    """Derive payment_year/payment_month from payment_date in the payments collection"""
+    try:
+        # Connect to MongoDB
+        mongodb_url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+        database_name = os.getenv("DATABASE_NAME", "pago_vecinal")
+
+        client = AsyncIOMotorClient(mongodb_url)
+        db = client[database_name]
+
+        print("🔄 Starting migration: backfilling 'payment_year' and 'payment_month' in payments...")
+
+        result = await db.payments.update_many(
+            {"payment_date": {"$type": "date"}, "payment_month": None},
+            [{"$set": {
+                "payment_year": {"$year": "$payment_date"},
+                "payment_month": {"$month": "$payment_date"}
+            }}]
+        )
+
+        print(f"✅ Migration completed: {result.modified_count} documents updated")
+
+        # Verify the migration
+        count_missing = await db.payments.count_documents({"payment_month": None})
+        count_with_fields = await db.payments.count_documents({"payment_month": {"$ne": None}})
+
+        print(f"📊 Verification:")
+        print(f"   - Payments without period fields: {count_missing}")
+        print(f"   - Payments with period fields: {count_with_fields}")
+
+        if count_missing == 0:
+            print("✅ Migration successful!")
+        else:
+            print("⚠️  Migration may not be complete. Please check manually.")
+
+        client.close()
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    asyncio.run(migrate_payment_period_fields())
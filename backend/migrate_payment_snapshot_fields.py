@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Migration script to backfill the fee/property snapshot on existing payments
+(property_id, fee_year, fee_month, property_row_letter, property_number).
+Works in batches of MIGRATION_BATCH_SIZE payments: each batch loads its fees and
+properties with one $in query each and is written back with a single bulk_write.
+Safe to run more than once; only payments without the snapshot are touched.
+A field that is missing or null counts as not migrated: payments saved through
+the model before the backfill store the snapshot fields as null.
+"""
+
+import asyncio
+import os
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "1000"))
+
+async def migrate_payment_snapshot_fields():
+    """Copy fee year/month and property keys onto payments that do not have them yet"""
+    try:
+        # Connect to MongoDB
+        mongodb_url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+        database_name = os.getenv("DATABASE_NAME", "pago_vecinal")
+
+        client = AsyncIOMotorClient(mongodb_url)
+        db = client[database_name]
+
+        # None matches both missing and null fields
+        missing_filter = {"$or": [{"fee_year": None}, {"property_id": None}]}
+        total = await db.payments.count_documents(missing_filter)
+        print(f"🔄 Starting migration: backfilling snapshot fields on {total} payments (batches of {BATCH_SIZE})...")
+
+        updated = 0
+        orphaned = 0
+        without_property = 0
+        last_id = None
+
+        while True:
+            batch_filter = dict(missing_filter)
+            if last_id is not None:
+                batch_filter["_id"] = {"$gt": last_id}
+
+            batch = await db.payments.find(batch_filter, {"fee": 1}).sort("_id", 1).to_list(length=BATCH_SIZE)
+            if not batch:
+                break
+            last_id = batch[-1]["_id"]
+
+            fee_ids = list({payment["fee"].id for payment in batch if payment.get("fee")})
+            fees = {
+                fee["_id"]: fee
+                async for fee in db.fees.find({"_id": {"$in": fee_ids}}, {"year": 1, "month": 1, "property": 1})
+            }
+
+            property_ids = list({fee["property"].id for fee in fees.values() if fee.get("property")})
+            properties = {
+                prop["_id"]: prop
+                async for prop in db.properties.find({"_id": {"$in": property_ids}}, {"row_letter": 1, "number": 1})
+            }
+
+            operations = []
+            for payment in batch:
+                fee = fees.get(payment["fee"].id) if payment.get("fee") else None
+                if not fee:
+                    orphaned += 1
+                    continue
+
+                prop = properties.get(fee["property"].id) if fee.get("property") else None
+                if not prop:
+                    without_property += 1
+                operations.append(UpdateOne(
+                    {"_id": payment["_id"]},
+                    {"$set": {
+                        "property_id": prop["_id"] if prop else None,
+                        "fee_year": fee.get("year"),
+                        "fee_month": fee.get("month"),
+                        "property_row_letter": prop.get("row_letter") if prop else None,
+                        "property_number": prop.get("number") if prop else None
+                    }}
+                ))
+
+            if operations:
+                result = await db.payments.bulk_write(operations, ordered=False)
+                updated += result.modified_count
+
+            print(f"   ... {updated} updated, {orphaned} without fee, {without_property} without property")
+
+        print(f"✅ Migration completed: {updated} payments updated")
+
+        # Verify the migration
+        remaining = await db.payments.count_documents(missing_filter)
+        print(f"📊 Verification:")
+        print(f"   - Payments without snapshot: {remaining}")
+        print(f"   - Payments whose fee no longer exists: {orphaned}")
+        print(f"   - Payments whose fee has no property: {without_property}")
+
+        if remaining == orphaned + without_property:
+            print("✅ Migration successful!")
+        else:
+            print("⚠️  Migration may not be complete. Please check manually.")
+
+        client.close()
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    asyncio.run(migrate_payment_snapshot_fields())
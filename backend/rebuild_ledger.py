@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Repair command for the per-property ledger (ledger_entries + property_balances).
+Recomputes every entry and running balance from fees, approved payments and
+agreements, in batches of properties. Run it once after deploying the ledger:
+until a full rebuild has run, the API computes balances and statements from
+source on every read. Properties a failed ledger write marked dirty are also
+read from source until they are rebuilt with --dirty.
+Run migrate_payment_snapshot_fields.py first so payments carry property_id.
+
+Usage:
+    python rebuild_ledger.py                  # every property (the backfill)
+    python rebuild_ledger.py --dirty          # only properties marked dirty
+    python rebuild_ledger.py <property_id>... # only these properties
+
+Run it while no payments are being recorded: a rebuilt property's ledger
+replaces whatever was written for it in the meantime.
+"""
+
+import asyncio
+import sys
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+async def rebuild():
+    """Rebuild the ledger and compare the new balances with the fee balances"""
+    try:
+        from beanie import init_beanie
+        from app.config.database import database, DOCUMENT_MODELS
+        from app.utils.ledger import PROPERTY_BALANCES, dirty_property_ids, rebuild_ledger
+
+        await init_beanie(database=database, document_models=DOCUMENT_MODELS)
+
+        property_ids = sys.argv[1:] or None
+        if property_ids == ["--dirty"]:
+            property_ids = await dirty_property_ids()
+            if not property_ids:
+                print("✅ No properties are marked dirty")
+                return
+        print(f"🔄 Rebuilding ledger for {len(property_ids) if property_ids else 'all'} properties...")
+
+        started = time.perf_counter()
+        result = await rebuild_ledger(property_ids)
+        print(f"✅ Rebuilt {result['properties']} properties, {result['entries']} entries in {time.perf_counter() - started:.1f}s")
+
+        # Verify the ledger balances add up
+        totals = await database[PROPERTY_BALANCES].aggregate([
+            {"$group": {"_id": None, "balance": {"$sum": "$balance"}, "charged": {"$sum": "$total_charged"}, "credited": {"$sum": "$total_credited"}}}
+        ]).to_list(length=1)
+        if totals:
+            print(f"📊 Verification:")
+            print(f"   - Total charged: {totals[0]['charged']:.2f}")
+            print(f"   - Total credited: {totals[0]['credited']:.2f}")
+            print(f"   - Outstanding balance: {totals[0]['balance']:.2f}")
+            if abs(totals[0]["charged"] - totals[0]["credited"] - totals[0]["balance"]) < 0.01:
+                print("✅ Rebuild successful!")
+            else:
+                print("⚠️  Balances do not add up. Please check manually.")
+
+    except Exception as e:
+        print(f"❌ Rebuild failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    asyncio.run(rebuild())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test script for the fee aging report.
+Creates one throwaway property with unpaid fees 10, 45, 75 and 200 days past due
+(one of them partially paid) plus a completed fee, then checks the property's
+buckets, its place among the top debtors and the villa breakdown.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TEST_VILLA = "TEST-AGING"
+
+async def test_aging_report():
+    """Check the bucket amounts computed by the aggregation"""
+    try:
+        from beanie import init_beanie
+        from app.config.database import database, DOCUMENT_MODELS
+        from app.models.fee import Fee, FeeSchedule, FeeStatus
+        from app.models.property import Property
+        from app.utils.aging_report import fee_aging_report
+
+        await init_beanie(database=database, document_models=DOCUMENT_MODELS)
+
+        prop = Property(row_letter="Z", number=999, villa=TEST_VILLA, owner_name="Aging Test")
+        await prop.insert()
+        schedule = FeeSchedule(amount=1000000.0, description="Aging test", effective_date=datetime(2099, 1, 1), is_active=False)
+        await schedule.insert()
+
+        as_of = datetime.utcnow()
+        fees = [
+            (10, 1000000.0, 0.0, FeeStatus.PENDING),
+            (45, 1000000.0, 400000.0, FeeStatus.PARTIALLY_PAID),
+            (75, 1000000.0, 0.0, FeeStatus.OVERDUE),
+            (200, 1000000.0, 0.0, FeeStatus.OVERDUE),
+            (300, 1000000.0, 1000000.0, FeeStatus.COMPLETED),
+        ]
+        for index, (days, amount, paid, fee_status) in enumerate(fees):
+            due_date = as_of - timedelta(days=days)
+            await Fee(
+                property=prop, fee_schedule=schedule, amount=amount, paid_amount=paid,
+                generated_date=due_date, year=2099, month=index + 1, due_date=due_date,
+                status=fee_status, property_row_letter=prop.row_letter, property_number=prop.number
+            ).insert()
+
+        try:
+            started = time.perf_counter()
+            report = await fee_aging_report(as_of=as_of, group_by="property", top=5)
+            print(f"📊 Aging report in {(time.perf_counter() - started) * 1000:.0f} ms, {len(report['groups'])} properties owing")
+
+            row = next((group for group in report["groups"] if group["property_id"] == str(prop.id)), None)
+            expected = {"days_0_30": 1000000.0, "days_31_60": 600000.0, "days_61_90": 1000000.0, "days_over_90": 1000000.0, "total": 3600000.0, "fee_count": 4}
+            if row and all(row[key] == value for key, value in expected.items()):
+                print("✅ SUCCESS: Buckets match the days past due")
+            else:
+                print(f"❌ ERROR: Unexpected buckets: {row}")
+
+            if report["top_debtors"] and report["top_debtors"][0]["property_id"] == str(prop.id):
+                print("✅ SUCCESS: Property is the top debtor")
+            else:
+                print("❌ ERROR: Property missing from the top debtors")
+
+            villa_report = await fee_aging_report(as_of=as_of, group_by="villa", top=1)
+            villa_row = next((group for group in villa_report["groups"] if group["villa"] == TEST_VILLA), None)
+            if villa_row and villa_row["total"] == expected["total"]:
+                print("✅ SUCCESS: Villa breakdown adds up")
+            else:
+                print(f"❌ ERROR: Unexpected villa row: {villa_row}")
+        finally:
+            await database.fees.delete_many({"fee_schedule.$id": schedule.id})
+            await prop.delete()
+            await schedule.delete()
+
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    print("🔍 Testing fee aging report...")
+    asyncio.run(test_aging_report())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for the bulk annual statements ZIP.
+Streams statements for a set of generated properties through the render pool,
+checks that the archive holds one valid PDF per property in order and compares
+the time with rendering the statements one after another. Does not need MongoDB.
+"""
+
+import asyncio
+import io
+import time
+import zipfile
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+YEAR = 2024
+PROPERTIES = 60
+
+def activity_row(number):
+    return {
+        "property": {
+            "villa": "Villa Test", "row_letter": "A", "number": number,
+            "owner_name": f"Owner {number}", "owner_phone": None
+        },
+        "fees": [
+            {"month": month, "year": YEAR, "amount": 50.0, "paid_amount": 50.0,
+             "due_date": datetime(YEAR, month, 10), "status": "paid"}
+            for month in range(1, 13)
+        ],
+        "payments": [
+            {"payment_date": datetime(YEAR, month, 5), "amount": 50.0, "status": "approved", "reference": f"fee-{month}"}
+            for month in range(1, 13)
+        ]
+    }
+
+async def activity_rows():
+    for number in range(1, PROPERTIES + 1):
+        yield activity_row(number)
+
+async def test_annual_statements():
+    """Build the statements ZIP and verify its entries"""
+    try:
+        from app.utils.annual_statements import stream_annual_statements_zip, statement_filename
+        from app.utils.render_pool import render_pool
+
+        try:
+            # Warm up the workers so both timings exclude process start-up
+            await asyncio.gather(*(
+                render_pool.render("annual_property_statement_pdf", row["property"], YEAR, row["fees"], row["payments"])
+                for row in [activity_row(0)] * render_pool.workers
+            ))
+
+            started = time.perf_counter()
+            for number in range(1, PROPERTIES + 1):
+                row = activity_row(number)
+                await render_pool.render("annual_property_statement_pdf", row["property"], YEAR, row["fees"], row["payments"])
+            sequential = time.perf_counter() - started
+
+            started = time.perf_counter()
+            archive = b"".join([chunk async for chunk in stream_annual_statements_zip(activity_rows(), YEAR)])
+            parallel = time.perf_counter() - started
+
+            print(f"📊 {PROPERTIES} statements: one by one {sequential:.2f}s, "
+                  f"ZIP with {render_pool.workers} workers {parallel:.2f}s ({len(archive)} bytes)")
+
+            with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+                names = zf.namelist()
+                expected = [statement_filename(activity_row(n)["property"], YEAR, "pdf") for n in range(1, PROPERTIES + 1)]
+                if names == expected:
+                    print("✅ SUCCESS: One statement per property, in property order")
+                else:
+                    print(f"❌ ERROR: Unexpected entries: {names[:5]}...")
+
+                if zf.testzip() is None and all(zf.read(name).startswith(b"%PDF") for name in names):
+                    print("✅ SUCCESS: Every entry is a valid PDF")
+                else:
+                    print("❌ ERROR: The archive has corrupt entries")
+        finally:
+            render_pool.shutdown()
+
+    except Exception as e:
+        print(f"❌ Error during test: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    print("🚀 Running annual statements test...")
+    asyncio.run(test_annual_statements())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for the batched bulk-approve engine.
+Seeds a throwaway property with pending fees and payments, approves them in one
+call (plus a bad id and a duplicate approval) and checks the per-item results,
+the receipt numbers, the fee balances and the time taken. Cleans up afterwards.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorClient
+from beanie import init_beanie, PydanticObjectId
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PAYMENT_COUNT = 500
+TEST_YEAR = 2060
+RECEIPT_YEAR = 2099  # Receipt numbers are drawn from a throwaway year
+
+async def test_bulk_approve():
+    """Approve PAYMENT_COUNT payments in one batch and verify the outcome"""
+    try:
+        mongodb_url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+        database_name = os.getenv("DATABASE_NAME", "pago_vecinal")
+
+        client = AsyncIOMotorClient(mongodb_url)
+        db = client[database_name]
+
+        from app.config.database import DOCUMENT_MODELS
+        from app.models.property import Property
+        from app.models.fee import Fee, FeeSchedule
+        from app.models.user import User
+        from app.models.payment import Payment
+        from app.utils.payment_approval import approve_payments_in_bulk
+
+        await init_beanie(database=db, document_models=DOCUMENT_MODELS)
+
+        admin = await User.find_one(User.role == "admin")
+        schedule = await FeeSchedule.find_one()
+        if not admin or not schedule:
+            print("❌ ERROR: Needs an admin user and a fee schedule in the database")
+            return
+
+        prop = Property(row_letter="ZZ", number=9999, villa="TEST", owner_name="Bulk Approve Test")
+        await prop.insert()
+
+        print(f"🌱 Seeding {PAYMENT_COUNT} pending payments...")
+        # One fee per month of consecutive years, all on the test property
+        await Fee.insert_many([
+            Fee(
+                property=prop, fee_schedule=schedule, amount=100.0, paid_amount=0.0,
+                generated_date=datetime.utcnow(), year=TEST_YEAR + i // 12, month=(i % 12) + 1,
+                due_date=datetime(TEST_YEAR + i // 12, (i % 12) + 1, 10), reference=f"TEST-{i}"
+            )
+            for i in range(PAYMENT_COUNT)
+        ])
+        fees = await Fee.find({"property.$id": prop.id}).to_list()
+        await Payment.insert_many([
+            Payment(fee=fee, fee_id=str(fee.id), user=admin, amount=100.0, payment_date=datetime(RECEIPT_YEAR, 1, 15))
+            for fee in fees
+        ])
+        fee_ids = [str(fee.id) for fee in fees]
+        payment_ids = [str(payment.id) for payment in await Payment.find({"fee_id": {"$in": fee_ids}}).to_list()]
+
+        started = time.perf_counter()
+        result = await approve_payments_in_bulk(payment_ids + ["not-an-id"])
+        elapsed = time.perf_counter() - started
+        print(f"📊 Approved {result['approved_count']} payments in {elapsed:.2f}s, {len(result['errors'])} errors")
+
+        numbers = sorted(int(item["receipt_correlative_number"].split("-")[2])
+                         for item in result["results"] if item.get("status") == "approved")
+        completed = await Fee.find({"property.$id": prop.id, "status": "completed"}).count()
+
+        if result["approved_count"] != len(payment_ids) or len(result["errors"]) != 1:
+            print("❌ ERROR: Unexpected per-item results")
+        elif numbers != list(range(numbers[0], numbers[0] + len(numbers))):
+            print("❌ ERROR: Receipt numbers are not one contiguous block")
+        elif completed != len(payment_ids):
+            print(f"❌ ERROR: Only {completed} fees were marked completed")
+        else:
+            print("✅ SUCCESS: All payments approved, receipts numbered and fees completed")
+
+        again = await approve_payments_in_bulk(payment_ids[:10])
+        if again["approved_count"] == 0 and len(again["errors"]) == 10:
+            print("✅ SUCCESS: Approving twice is reported per item and not counted again")
+        else:
+            print("❌ ERROR: Second approval was not rejected")
+
+        # Clean up
+        payment_object_ids = [PydanticObjectId(payment_id) for payment_id in payment_ids]
+        await db.receipts.delete_many({"payment.$id": {"$in": payment_object_ids}})
+        await db.payments.delete_many({"_id": {"$in": payment_object_ids}})
+        await db.fees.delete_many({"property.$id": prop.id})
+        await prop.delete()
+        await db.counters.delete_many({"prefix": "CUOT", "year": RECEIPT_YEAR})
+        client.close()
+
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    print("🔍 Testing batched bulk approval...")
+    asyncio.run(test_bulk_approve())
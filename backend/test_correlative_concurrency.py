@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test script to verify that correlative numbers stay unique and gapless under concurrency.
+Fires hundreds of parallel receipt approvals (single reservations) mixed with
+bulk block reservations against the counters collection.
+Uses a throwaway prefix so real sequences are not touched.
+"""
+
+import asyncio
+import os
+from motor.motor_asyncio import AsyncIOMotorClient
+from beanie import init_beanie
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TEST_PREFIX = "TEST"
+TEST_YEAR = 2099
+PARALLEL_APPROVALS = 500
+BULK_RESERVATIONS = 20
+BULK_BLOCK_SIZE = 25
+
+async def test_correlative_concurrency():
+    """Reserve numbers concurrently and check there are no duplicates or gaps"""
+    try:
+        mongodb_url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+        database_name = os.getenv("DATABASE_NAME", "pago_vecinal")
+
+        client = AsyncIOMotorClient(mongodb_url)
+        db = client[database_name]
+
+        from app.models.counter import Counter
+        from app.models.receipt import Receipt
+        from app.routes.receipts import generate_correlative_number
+        from app.utils.sequence import reserve_correlative_numbers
+
+        await init_beanie(database=db, document_models=[Counter, Receipt])
+
+        # Start from a clean counter
+        await db.counters.delete_many({"prefix": TEST_PREFIX, "year": TEST_YEAR})
+
+        print(f"🚀 Firing {PARALLEL_APPROVALS} parallel approvals and {BULK_RESERVATIONS} bulk reservations of {BULK_BLOCK_SIZE}...")
+
+        single_tasks = [
+            generate_correlative_number(TEST_YEAR, TEST_PREFIX)
+            for _ in range(PARALLEL_APPROVALS)
+        ]
+        bulk_tasks = [
+            reserve_correlative_numbers(TEST_YEAR, TEST_PREFIX, BULK_BLOCK_SIZE)
+            for _ in range(BULK_RESERVATIONS)
+        ]
+        results = await asyncio.gather(*single_tasks, *bulk_tasks)
+
+        numbers = []
+        for result in results:
+            if isinstance(result, list):
+                numbers.extend(result)
+            else:
+                numbers.append(result)
+
+        expected_total = PARALLEL_APPROVALS + BULK_RESERVATIONS * BULK_BLOCK_SIZE
+        sequence = sorted(int(number.split("-")[2]) for number in numbers)
+
+        print(f"📊 Numbers issued: {len(numbers)} (expected {expected_total})")
+        print(f"📊 Unique numbers: {len(set(numbers))}")
+
+        if len(set(numbers)) != len(numbers):
+            print("❌ ERROR: Duplicate correlative numbers were issued")
+        elif sequence != list(range(1, expected_total + 1)):
+            print("❌ ERROR: The issued numbers are not gapless")
+        else:
+            print(f"✅ SUCCESS: {TEST_PREFIX}-{TEST_YEAR}-00001 .. {numbers and max(numbers)} are unique and gapless")
+
+        # Block reservations must be contiguous
+        for result in results:
+            if isinstance(result, list):
+                block = [int(number.split("-")[2]) for number in result]
+                if block != list(range(block[0], block[0] + BULK_BLOCK_SIZE)):
+                    print(f"❌ ERROR: Block reservation is not contiguous: {result[0]} .. {result[-1]}")
+                    break
+
+        await db.counters.delete_many({"prefix": TEST_PREFIX, "year": TEST_YEAR})
+        client.close()
+
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    print("🔍 Testing correlative number concurrency...")
+    asyncio.run(test_correlative_concurrency())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script to verify that concurrent approvals on the same fee do not lose updates.
+Applies hundreds of parallel increments to a throwaway fee and checks the final
+paid_amount and the derived status, then checks that reconcile repairs a drifted fee
+and that approvals taken back leave no rounding residue.
+"""
+
+import asyncio
+import os
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PARALLEL_APPROVALS = 200
+FEE_AMOUNT = 100.0
+
+async def test_fee_balance_concurrency():
+    """Apply parallel increments to one fee and check nothing is lost"""
+    try:
+        mongodb_url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+        database_name = os.getenv("DATABASE_NAME", "pago_vecinal")
+
+        client = AsyncIOMotorClient(mongodb_url)
+        db = client[database_name]
+
+        from app.utils.fee_balance import apply_payment_to_fee, reconcile_fee_balances
+
+        fee_id = (await db.fees.insert_one({
+            "amount": FEE_AMOUNT,
+            "paid_amount": 0.0,
+            "status": "pending",
+            "year": 2099,
+            "month": 1,
+            "due_date": datetime(2099, 1, 10),
+            "generated_date": datetime.utcnow()
+        })).inserted_id
+
+        print(f"🚀 Applying {PARALLEL_APPROVALS} parallel approvals to one fee...")
+        share = FEE_AMOUNT / PARALLEL_APPROVALS
+        await asyncio.gather(*[
+            apply_payment_to_fee(str(fee_id), share)
+            for _ in range(PARALLEL_APPROVALS)
+        ])
+
+        fee = await db.fees.find_one({"_id": fee_id})
+        print(f"📊 paid_amount: {fee['paid_amount']:.2f} (expected {FEE_AMOUNT:.2f}), status: {fee['status']}")
+
+        if abs(fee["paid_amount"] - FEE_AMOUNT) > 1e-6:
+            print("❌ ERROR: Increments were lost")
+        elif fee["status"] != "completed":
+            print("❌ ERROR: Status was not derived from paid_amount")
+        else:
+            print("✅ SUCCESS: No increments lost and status derived in the same update")
+
+        # There are no approved payments for this fee, so reconcile must reset it
+        result = await reconcile_fee_balances([str(fee_id)])
+        fee = await db.fees.find_one({"_id": fee_id})
+        print(f"📊 Reconcile: {result}, paid_amount: {fee['paid_amount']}, status: {fee['status']}")
+
+        if fee["paid_amount"] == 0 and fee["status"] == "pending":
+            print("✅ SUCCESS: Reconcile repaired the drifted fee")
+        else:
+            print("❌ ERROR: Reconcile did not repair the fee")
+
+        # Amounts without an exact binary representation must add up to cents
+        await db.fees.update_one({"_id": fee_id}, {"$set": {"amount": 0.8}})
+        for delta in (0.1, 0.7):
+            await apply_payment_to_fee(str(fee_id), delta)
+        completed = await db.fees.find_one({"_id": fee_id})
+        for delta in (-0.1, -0.7):
+            await apply_payment_to_fee(str(fee_id), delta)
+        reverted = await db.fees.find_one({"_id": fee_id})
+        print(f"📊 0.1 + 0.7: {completed['paid_amount']!r} ({completed['status']}), "
+              f"taken back: {reverted['paid_amount']!r} ({reverted['status']})")
+
+        if completed["status"] == "completed" and reverted["paid_amount"] == 0 and reverted["status"] == "pending":
+            print("✅ SUCCESS: paid_amount stays rounded to cents")
+        else:
+            print("❌ ERROR: paid_amount kept floating point residue")
+
+        await db.fees.delete_one({"_id": fee_id})
+        client.close()
+
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    print("🔍 Testing fee balance concurrency...")
+    asyncio.run(test_fee_balance_concurrency())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for keyset cursor pagination over sort keys with null values.
+Fills a throwaway collection with rows whose sort fields are null, missing or
+set (like payments whose fee or property is gone), pages through it with
+keyset_filter/next_cursor so that page boundaries fall on null rows, and
+checks that the pages add up to the full sorted listing. Drops the collection.
+"""
+
+import asyncio
+import os
+import random
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ROWS = 200
+
+async def test_keyset_pagination():
+    """Page through rows with null sort values and compare with a single sorted read"""
+    try:
+        from app.utils.pagination import decode_cursor, keyset_filter, next_cursor, sort_stage
+
+        mongodb_url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+        database_name = os.getenv("DATABASE_NAME", "pago_vecinal")
+
+        client = AsyncIOMotorClient(mongodb_url)
+        collection = client[database_name]["test_keyset_pagination"]
+
+        # Same shape as PAYMENT_SORT_KEY
+        sort_key = [
+            ("fee_year", -1),
+            ("fee_month", -1),
+            ("property_row_letter", 1),
+            ("property_number", 1),
+            ("_id", 1)
+        ]
+
+        random.seed(7)
+        rows = []
+        for _ in range(ROWS):
+            row = {}
+            for field, choices in (
+                ("fee_year", [None, 2024, 2025]),
+                ("fee_month", [None, 1, 2]),
+                ("property_row_letter", [None, "A", "B"]),
+                ("property_number", [None, 1, 2])
+            ):
+                value = random.choice(choices + ["missing"])
+                if value != "missing":
+                    row[field] = value
+            rows.append(row)
+        await collection.drop()
+        await collection.insert_many(rows)
+
+        try:
+            expected = [row["_id"] async for row in collection.aggregate([sort_stage(sort_key)])]
+
+            for limit in (1, 3, 7, 20):
+                listed = []
+                null_boundaries = 0
+                cursor = None
+                while True:
+                    pipeline = [sort_stage(sort_key), {"$limit": limit}]
+                    if cursor:
+                        values = decode_cursor(cursor, sort_key)
+                        null_boundaries += None in values
+                        pipeline.insert(0, {"$match": keyset_filter(sort_key, values)})
+                    page = await collection.aggregate(pipeline).to_list(length=None)
+                    listed += [row["_id"] for row in page]
+                    cursor = next_cursor(page, sort_key, limit)
+                    if not cursor:
+                        break
+
+                print(f"📊 Page size {limit}: {len(listed)} of {len(expected)} rows, {null_boundaries} pages started after a null")
+                if listed == expected and null_boundaries:
+                    print(f"✅ SUCCESS: Pages of {limit} list every row in order across null boundaries")
+                elif listed == expected:
+                    print(f"⚠️  Pages of {limit} are complete but no page ended on a null row")
+                else:
+                    print(f"❌ ERROR: Pages of {limit} lost or reordered rows")
+        finally:
+            await collection.drop()
+            client.close()
+
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    print("🔍 Testing keyset pagination with null sort values...")
+    asyncio.run(test_keyset_pagination())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-property ledger.
+Records charges and payments for a throwaway property (including two writers
+appending at the same time), checks sequences and running balances, reads a
+statement range, checks that an entry that fails to insert gives its balance
+back, then rebuilds the property from its fees and payments and compares the
+balance. A property marked dirty is read from source without writing until
+rebuild_ledger repairs it. Cleans up afterwards.
+"""
+
+import asyncio
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TEST_VILLA = "TEST-LEDGER"
+
+async def test_ledger():
+    """Append, read and rebuild one property's ledger"""
+    try:
+        from beanie import init_beanie
+        from app.config.database import database, DOCUMENT_MODELS
+        from app.models.fee import Fee, FeeSchedule
+        from app.models.ledger import LedgerEntryType
+        from app.models.payment import Payment, PaymentStatus
+        from app.models.property import Property
+        from app.models.user import User
+        from pymongo.errors import BulkWriteError
+        from app.utils.ledger import (
+            PROPERTY_BALANCES, _write_entries, get_property_balances, get_property_ledger,
+            ledger_backfilled, ledger_movement, mark_ledgers_dirty, rebuild_ledger, record_ledger_entries
+        )
+
+        await init_beanie(database=database, document_models=DOCUMENT_MODELS)
+
+        prop = Property(row_letter="Z", number=998, villa=TEST_VILLA, owner_name="Ledger Test")
+        await prop.insert()
+        schedule = FeeSchedule(amount=100.0, description="Ledger test", effective_date=datetime(2099, 1, 1), is_active=False)
+        await schedule.insert()
+        user = await User.find_one()
+
+        try:
+            # Start from an empty ledger, as the backfill leaves a property without movements
+            await rebuild_ledger([prop.id])
+
+            fees = []
+            for month in (1, 2, 3):
+                fee = Fee(
+                    property=prop, fee_schedule=schedule, amount=100.0, generated_date=datetime(2099, month, 1),
+                    year=2099, month=month, due_date=datetime(2099, month, 10),
+                    property_row_letter=prop.row_letter, property_number=prop.number
+                )
+                await fee.insert()
+                fees.append(fee)
+
+            charges = [
+                ledger_movement(prop.id, LedgerEntryType.FEE_CHARGE, fee.amount, fee.id,
+                                key=f"fee_charge:{fee.id}", entry_date=fee.generated_date)
+                for fee in fees
+            ]
+            await record_ledger_entries(charges)
+            # Recording the same charges again is a no-op
+            await record_ledger_entries(charges)
+
+            payment = Payment(
+                fee=fees[0], fee_id=str(fees[0].id), user=user, amount=100.0,
+                payment_date=datetime(2099, 1, 15), payment_year=2099, payment_month=1,
+                status=PaymentStatus.APPROVED, property_id=prop.id, fee_year=2099, fee_month=1
+            )
+            await payment.insert()
+
+            # Two writers at once: the payment and a late charge
+            await asyncio.gather(
+                record_ledger_entries([ledger_movement(prop.id, LedgerEntryType.PAYMENT, -100.0, payment.id, entry_date=datetime(2099, 1, 15))]),
+                record_ledger_entries([ledger_movement(prop.id, LedgerEntryType.FEE_CHARGE, 50.0, "extra", entry_date=datetime(2099, 3, 20))])
+            )
+
+            entries = await database.ledger_entries.find({"property_id": prop.id}).sort("sequence", 1).to_list(length=None)
+            sequences = [entry["sequence"] for entry in entries]
+            running = 0.0
+            balances_ok = True
+            for entry in entries:
+                running = round(running + entry["amount"], 2)
+                balances_ok = balances_ok and entry["balance"] == running
+
+            balance = await database[PROPERTY_BALANCES].find_one({"_id": prop.id})
+            print(f"📊 Entries: {len(entries)}, sequences: {sequences}, balance: {balance['balance']}")
+            if sequences == [1, 2, 3, 4, 5] and balances_ok and balance["balance"] == 250.0:
+                print("✅ SUCCESS: Sequences and running balances are consistent")
+            else:
+                print("❌ ERROR: Unexpected ledger entries")
+
+            # Before the backfill statements come from fees and payments (without the extra charge
+            # and with the payment in date order), afterwards from the stored entries
+            statement = await get_property_ledger(prop.id, datetime(2099, 2, 1), datetime(2099, 3, 1))
+            expected = (100.0, 200.0) if await ledger_backfilled() else (0.0, 100.0)
+            if not await ledger_backfilled():
+                print("⚠️  Ledger not backfilled yet (run rebuild_ledger.py), checking the statement computed from source")
+            if len(statement["entries"]) == 1 and (statement["opening_balance"], statement["closing_balance"]) == expected:
+                print("✅ SUCCESS: Statement range has the right opening and closing balance")
+            else:
+                print(f"❌ ERROR: Unexpected statement: {statement['opening_balance']} -> {statement['closing_balance']}, {len(statement['entries'])} entries")
+
+            # A writer that passed the key check while another recorded the same key
+            duplicate = ledger_movement(prop.id, LedgerEntryType.FEE_CHARGE, fees[0].amount, fees[0].id,
+                                        key=f"fee_charge:{fees[0].id}", entry_date=fees[0].generated_date)
+            try:
+                await _write_entries({prop.id: [duplicate]})
+                print("❌ ERROR: A duplicate ledger key was inserted")
+            except BulkWriteError:
+                balance = await database[PROPERTY_BALANCES].find_one({"_id": prop.id})
+                if balance["balance"] == 250.0 and balance["total_charged"] == 350.0:
+                    print("✅ SUCCESS: A failed insert gives its balance back")
+                else:
+                    print(f"❌ ERROR: Balance counted a failed insert: {balance['balance']}")
+
+            # Rebuild from source: three fees charged, one payment (the extra charge has no source)
+            result = await rebuild_ledger([prop.id])
+            rebuilt = await database[PROPERTY_BALANCES].find_one({"_id": prop.id})
+            if result["entries"] == 4 and rebuilt["balance"] == 200.0 and rebuilt["sequence"] == 4:
+                print("✅ SUCCESS: Rebuild matches fees and payments")
+            else:
+                print(f"❌ ERROR: Unexpected rebuild: {result}, balance {rebuilt['balance']}")
+
+            # A property marked dirty by a failed post is read from source, and reads write nothing
+            await database[PROPERTY_BALANCES].update_one({"_id": prop.id}, {"$set": {"balance": 999.0}})
+            await mark_ledgers_dirty([prop.id])
+            read = (await get_property_balances([prop.id]))[prop.id]
+            stored = await database[PROPERTY_BALANCES].find_one({"_id": prop.id})
+            if read["balance"] == 200.0 and stored["balance"] == 999.0 and stored.get("dirty"):
+                print("✅ SUCCESS: A dirty ledger is read from source without being written")
+            else:
+                print(f"❌ ERROR: Dirty ledger read {read['balance']}, stored {stored['balance']}")
+
+            # rebuild_ledger.py --dirty repairs it
+            await rebuild_ledger([prop.id])
+            repaired = await database[PROPERTY_BALANCES].find_one({"_id": prop.id})
+            if repaired["balance"] == 200.0 and not repaired.get("dirty"):
+                print("✅ SUCCESS: Rebuild repairs a dirty ledger")
+            else:
+                print(f"❌ ERROR: Dirty ledger not repaired: {repaired['balance']}")
+        finally:
+            await database.ledger_entries.delete_many({"property_id": prop.id})
+            await database[PROPERTY_BALANCES].delete_one({"_id": prop.id})
+            await database.payments.delete_many({"property_id": prop.id})
+            await database.fees.delete_many({"fee_schedule.$id": schedule.id})
+            await prop.delete()
+            await schedule.delete()
+
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    print("🔍 Testing property ledger...")
+    asyncio.run(test_ledger())
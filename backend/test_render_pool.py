@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script for the document rendering process pool.
+Renders an outstanding fees PDF in the pool, checks that the event loop keeps
+running while several large documents render, that a saturated pool rejects
+new jobs and that a job over its timeout is reported. Does not need MongoDB.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+FEE_ROWS = [
+    {
+        "property_villa": "Villa Test", "property_row_letter": "A", "property_number": number,
+        "property_owner_name": "Render Test", "month": 1, "year": 2024,
+        "amount": 50.0, "due_date": datetime(2024, 1, 10)
+    }
+    for number in range(3000)
+]
+
+async def test_render_pool():
+    """Render in worker processes with queue limits and timeouts"""
+    try:
+        from app.utils.render_pool import RenderPool, RenderQueueFull, RenderTimeout
+
+        pool = RenderPool(workers=2, queue_limit=1, timeout_seconds=60)
+        try:
+            started = time.perf_counter()
+            pdf = await pool.render("outstanding_fees_pdf", FEE_ROWS)
+            print(f"📊 {len(FEE_ROWS)}-row PDF rendered in {time.perf_counter() - started:.2f}s ({len(pdf)} bytes)")
+            if pdf.startswith(b"%PDF"):
+                print("✅ SUCCESS: The pool returned a PDF")
+            else:
+                print("❌ ERROR: The pool did not return a PDF")
+
+            # Two workers + one waiting job fill the pool
+            jobs = [asyncio.create_task(pool.render("outstanding_fees_pdf", FEE_ROWS)) for _ in range(3)]
+            await asyncio.sleep(0)
+            try:
+                await pool.render("outstanding_fees_pdf", FEE_ROWS)
+                print("❌ ERROR: A fourth job was accepted by a full pool")
+            except RenderQueueFull:
+                print("✅ SUCCESS: A saturated pool rejects new jobs")
+
+            # The event loop should keep its 10 ms ticks while the documents render
+            ticks = 0
+            worst_tick = 0.0
+            while not all(job.done() for job in jobs):
+                tick_started = time.perf_counter()
+                await asyncio.sleep(0.01)
+                worst_tick = max(worst_tick, time.perf_counter() - tick_started)
+                ticks += 1
+            await asyncio.gather(*jobs)
+            print(f"🔍 {ticks} loop ticks while rendering, slowest {worst_tick * 1000:.0f} ms")
+            if worst_tick < 0.1:
+                print("✅ SUCCESS: The event loop stayed responsive")
+            else:
+                print("❌ ERROR: The event loop was blocked while rendering")
+
+            try:
+                await pool.render("outstanding_fees_pdf", FEE_ROWS * 5, timeout=0.1)
+                print("❌ ERROR: The job finished before its timeout")
+            except RenderTimeout:
+                print("✅ SUCCESS: A slow job times out")
+
+            stats = pool.stats()
+            print(f"📊 Stats: {stats['completed']} completed, {stats['rejected']} rejected, {stats['timed_out']} timed out")
+            if (stats["completed"], stats["rejected"], stats["timed_out"]) == (4, 1, 1):
+                print("✅ SUCCESS: Counters match the jobs run")
+            else:
+                print("❌ ERROR: Unexpected counters")
+        finally:
+            pool.shutdown()
+
+    except Exception as e:
+        print(f"❌ Error during test: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    print("🚀 Running render pool test...")
+    asyncio.run(test_render_pool())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test script for asynchronous report jobs.
+Submits an expenses report job, waits for it, then checks that an identical
+request is served from the cached result, that a data change (version bump)
+starts a new job, that a job left behind by a dead worker is not waited on and
+that expired results are evicted. Results are written to a
+temporary cache directory; only the test's job documents are removed.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+async def wait_for(job_id, timeout=120):
+    from app.models.report_job import ReportJob, ReportJobStatus
+
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        job = await ReportJob.get(job_id)
+        if job.status not in (ReportJobStatus.QUEUED, ReportJobStatus.RUNNING):
+            return job
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f"Report job {job_id} did not finish")
+
+async def test_report_jobs():
+    """Run a report job and verify caching, invalidation and eviction"""
+    try:
+        from beanie import init_beanie
+        from app.config.database import database, DOCUMENT_MODELS
+        from app.models.report_job import ReportJob, ReportJobStatus, ReportType
+        from app.utils import report_jobs
+        from app.utils.data_version import bump_data_version, get_data_version
+
+        await init_beanie(database=database, document_models=DOCUMENT_MODELS)
+        report_jobs.REPORT_CACHE_DIR = tempfile.mkdtemp(prefix="report_jobs_test_")
+        job_ids = []
+
+        try:
+            # Start from a data version no earlier job was generated at
+            await bump_data_version()
+            started = time.perf_counter()
+            job, cached = await report_jobs.submit_report_job(ReportType.EXPENSES, {})
+            job_ids.append(job.id)
+            job = await wait_for(job.id)
+            print(f"📊 First job {job.status.value} in {time.perf_counter() - started:.2f}s ({job.size} bytes)")
+            if job.status == ReportJobStatus.COMPLETED and not cached and os.path.exists(job.file_path):
+                print("✅ SUCCESS: The report was generated in the background")
+            else:
+                print(f"❌ ERROR: The job did not complete: {job.error}")
+
+            started = time.perf_counter()
+            again, cached = await report_jobs.submit_report_job(ReportType.EXPENSES, {})
+            print(f"🔍 Identical request answered in {(time.perf_counter() - started) * 1000:.0f} ms")
+            if cached and again.id == job.id:
+                print("✅ SUCCESS: An identical request reuses the cached result")
+            else:
+                print("❌ ERROR: An identical request started a new job")
+
+            await bump_data_version()
+            changed, cached = await report_jobs.submit_report_job(ReportType.EXPENSES, {})
+            job_ids.append(changed.id)
+            if not cached and changed.id != job.id:
+                print("✅ SUCCESS: A data change starts a new job")
+            else:
+                print("❌ ERROR: A stale result was served after a data change")
+            changed = await wait_for(changed.id)
+
+            try:
+                await report_jobs.submit_report_job(
+                    ReportType.MONTHLY_FEES,
+                    {"start_year": 2024, "start_month": 6, "end_year": 2024, "end_month": 1}
+                )
+                print("❌ ERROR: An invalid period was accepted")
+            except ValueError:
+                print("✅ SUCCESS: Invalid params are rejected")
+
+            # A running job whose worker died: its heartbeat stopped
+            await bump_data_version()
+            params = report_jobs.normalize_params(ReportType.EXPENSES, {})
+            quiet_since = datetime.utcnow() - timedelta(seconds=report_jobs.REPORT_JOB_STALE_SECONDS + 1)
+            orphan = ReportJob(
+                report=ReportType.EXPENSES, params=params,
+                spec_hash=report_jobs.spec_hash(ReportType.EXPENSES, params),
+                data_version=await get_data_version(), status=ReportJobStatus.RUNNING,
+                created_at=quiet_since, started_at=quiet_since, heartbeat_at=quiet_since
+            )
+            await orphan.insert()
+            job_ids.append(orphan.id)
+            replacement, cached = await report_jobs.submit_report_job(ReportType.EXPENSES, {})
+            job_ids.append(replacement.id)
+            orphan = await ReportJob.get(orphan.id)
+            if not cached and replacement.id != orphan.id and orphan.status == ReportJobStatus.FAILED:
+                print("✅ SUCCESS: A job without heartbeat is failed and replaced")
+            else:
+                print("❌ ERROR: An orphaned job was served as pending")
+            await wait_for(replacement.id)
+
+            changed.expires_at = datetime.utcnow() - timedelta(seconds=1)
+            await changed.save()
+            await report_jobs.evict_expired_reports()
+            changed = await ReportJob.get(changed.id)
+            if changed.status == ReportJobStatus.EXPIRED and not any(
+                name.startswith(str(changed.id)) for name in os.listdir(report_jobs.REPORT_CACHE_DIR)
+            ):
+                print("✅ SUCCESS: Expired results are evicted")
+            else:
+                print("❌ ERROR: The expired result was not evicted")
+        finally:
+            await ReportJob.find({"_id": {"$in": job_ids}}).delete()
+
+    except Exception as e:
+        print(f"❌ Error during test: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    print("🚀 Running report jobs test...")
+    asyncio.run(test_report_jobs())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for the background scheduler.
+Replaces the real jobs with a recording test job, then checks the leader lock
+(a lease held by another worker blocks this one), catch-up of missed days and
+the run history. Only touches the test job's history and the lock document.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TEST_JOB = "test_job"
+MISSED_DAYS = 4
+
+async def test_scheduler():
+    """Run the scheduler once after a gap and verify every missed day ran once"""
+    try:
+        from beanie import init_beanie
+        from app.config.database import database, DOCUMENT_MODELS
+        from app.models.job_run import JobRun, JobRunStatus
+        from app.utils import scheduler
+
+        await init_beanie(database=database, document_models=DOCUMENT_MODELS)
+
+        ran_days = []
+
+        async def test_job(run_date):
+            ran_days.append(run_date)
+            return {"ok": 1}
+
+        # Only the test job runs; real jobs are not touched
+        scheduler.JOBS.clear()
+        scheduler.JOBS[TEST_JOB] = test_job
+        await JobRun.find(JobRun.job == TEST_JOB).delete()
+
+        now = datetime.utcnow().replace(hour=max(scheduler.SCHEDULER_RUN_HOUR, 12))
+        latest_day = scheduler.latest_due_day(now)
+        await JobRun(
+            job=TEST_JOB, run_date=latest_day - timedelta(days=MISSED_DAYS + 1), instance="previous",
+            started_at=now - timedelta(days=MISSED_DAYS + 1), status=JobRunStatus.SUCCESS
+        ).insert()
+
+        # Another worker holds the lease: nothing may run
+        await database.scheduler_locks.replace_one(
+            {"_id": scheduler.LOCK_ID},
+            {"owner": "other-worker", "expires_at": datetime.utcnow() + timedelta(minutes=5)},
+            upsert=True
+        )
+        if await scheduler.acquire_leader_lock():
+            print("❌ ERROR: Took the lock while another worker held it")
+        else:
+            print("✅ SUCCESS: Lock held by another worker is respected")
+
+        # The lease expired: this worker takes over and catches up
+        await database.scheduler_locks.update_one(
+            {"_id": scheduler.LOCK_ID},
+            {"$set": {"expires_at": datetime.utcnow() - timedelta(seconds=1)}}
+        )
+        if await scheduler.acquire_leader_lock():
+            await scheduler.run_due_jobs(now)
+
+        expected = [latest_day - timedelta(days=offset) for offset in range(MISSED_DAYS, -1, -1)]
+        print(f"📊 Days run: {[day.strftime('%Y-%m-%d') for day in ran_days]}")
+        if ran_days == expected:
+            print(f"✅ SUCCESS: Caught up {len(expected)} days in order")
+        else:
+            print("❌ ERROR: Catch-up did not run the missed days exactly once")
+
+        # A second tick has nothing left to do
+        await scheduler.run_due_jobs(now)
+        history = await JobRun.find(JobRun.job == TEST_JOB, JobRun.instance == scheduler.INSTANCE_ID).to_list()
+        if len(ran_days) == len(expected) and all(run.duration_ms is not None for run in history):
+            print(f"✅ SUCCESS: {len(history)} runs recorded with timings, no duplicate runs")
+        else:
+            print("❌ ERROR: Unexpected run history")
+
+        await JobRun.find(JobRun.job == TEST_JOB).delete()
+        await scheduler.release_leader_lock()
+
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    print("🔍 Testing background scheduler...")
+    asyncio.run(test_scheduler())
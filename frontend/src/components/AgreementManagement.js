@@ -104,7 +104,7 @@ const AgreementManagement = () => {
 
   const fetchFees = async () => {
     try {
-      const response = await feesAPI.getFees({ status: 'pending' });
+      const response = await feesAPI.getFees({ status: 'pending,overdue' });
       setFees(response.data);
     } catch (err) {
       console.error('Error fetching fees:', err);
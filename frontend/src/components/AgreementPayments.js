@@ -278,7 +278,7 @@ const AgreementPayments = () => {
                       >
                         <EditIcon />
                       </IconButton>
-                      {installment.status === 'pending' && (
+                      {(installment.status === 'pending' || installment.status === 'overdue') && (
                         <Button
                           size="small"
                           variant="contained"
@@ -341,7 +341,7 @@ const AgreementPayments = () => {
                 required
               >
                 {installments
-                  .filter(inst => inst.status === 'pending')
+                  .filter(inst => inst.status === 'pending' || inst.status === 'overdue')
                   .map((installment) => (
                     <MenuItem key={installment.id} value={installment.id}>
                       {installment.agreement_number} - {installment.property_info} - Cuota {installment.installment_number} - S/ {installment.amount.toFixed(2)} - Vence: {new Date(installment.due_date).toLocaleDateString('es-ES')}
@@ -235,6 +235,8 @@ const FeeManagement = () => {
         return 'success';
       case 'pending':
         return 'warning';
+      case 'overdue':
+        return 'error';
       case 'partially_paid':
         return 'info';
       case 'failed':
@@ -254,6 +256,8 @@ const FeeManagement = () => {
         return 'Completado';
       case 'pending':
         return 'Pendiente';
+      case 'overdue':
+        return 'Vencido';
       case 'partially_paid':
         return 'Pago Parcial';
       case 'failed':
@@ -448,6 +452,7 @@ const FeeManagement = () => {
                   <em>Todos</em>
                 </MenuItem>
                 <MenuItem value="pending">Pendiente</MenuItem>
+                <MenuItem value="overdue">Vencido</MenuItem>
                 <MenuItem value="partially_paid">Pago Parcial</MenuItem>
                 <MenuItem value="completed">Completado</MenuItem>
                 <MenuItem value="failed">Fallido</MenuItem>
@@ -425,11 +425,11 @@ const PaymentManagement = () => {
     setSelectedHouse(houseId);
     if (houseId) {
       try {
-        // Get pending and partially paid fees for this specific property
+        // Get pending, overdue and partially paid fees for this specific property
         const response = await feesAPI.getFees({
           property_id: houseId,
-          status: 'pending,partially_paid'
-        }, 1, 100); // Get up to 100 pending and partially paid fees, sorted by period
+          status: 'pending,overdue,partially_paid'
+        }, 1, 100); // Get up to 100 unpaid fees, sorted by period
 
         const propertyFees = response.data.data;
         if (propertyFees.length > 0) {